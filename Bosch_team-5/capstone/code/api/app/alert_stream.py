@@ -0,0 +1,166 @@
+# app/alert_stream.py
+
+import asyncio
+import threading
+from collections import deque
+from typing import AsyncIterator, Deque, Iterable, List, Optional, Sequence, Set, Tuple
+import aiosqlite
+from app import alerts, serialization
+
+STREAM_BUFFER = 256
+KEEPALIVE_SECONDS = 15.0
+REPLAY_PAGE = 500
+
+# Stream payloads carry the fields of models.Alert.
+ALERT_FIELDS = ["alert_id"] + alerts.ALERT_COLUMNS
+
+class Subscription:
+    """
+    One client's view of the alert stream: the turbines and severities it asked for (None
+    means all) and a buffer of at most `maxlen` matching alerts. When the client falls
+    behind, the oldest buffered alerts are dropped and counted, so a slow console costs a
+    bounded amount of memory and learns that it should resume from its last alert id.
+
+    Alerts are pushed from whichever thread committed them; the waiting coroutine is woken
+    on the event loop that created the subscription.
+    """
+
+    def __init__(self, turbine_ids: Optional[Iterable[int]], severities: Optional[Iterable[str]], maxlen: int = STREAM_BUFFER):
+        self.turbine_ids = frozenset(turbine_ids) if turbine_ids else None
+        self.severities = frozenset(severities) if severities else None
+        self._buffer: Deque[tuple] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self._dropped = 0
+        self.delivered = 0
+        self.dropped_total = 0
+
+    def matches(self, row: tuple) -> bool:
+        # row is (alert_id, *ALERT_COLUMNS): turbine_id at 1, severity at 5.
+        return (self.turbine_ids is None or row[1] in self.turbine_ids) and (self.severities is None or row[5] in self.severities)
+
+    def push(self, rows: Sequence[tuple]) -> None:
+        matching = [row for row in rows if self.matches(row)]
+        if not matching:
+            return
+        with self._lock:
+            overflow = max(0, len(self._buffer) + len(matching) - self._buffer.maxlen)
+            self._dropped += overflow
+            self.dropped_total += overflow
+            self._buffer.extend(matching)
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass  # the client's event loop is gone; the stream is being torn down
+
+    async def next(self, timeout: float) -> Tuple[List[tuple], int]:
+        """Waits up to `timeout` seconds for alerts; returns them with the count dropped since the last call."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._ready.clear()
+        with self._lock:
+            rows, dropped = list(self._buffer), self._dropped
+            self._buffer.clear()
+            self._dropped = 0
+        self.delivered += len(rows)
+        return rows, dropped
+
+class AlertHub:
+    """
+    In-process fan-out of committed alerts to stream subscribers. Every write path hands
+    the alerts it inserted to `publish` from `etl.after_commit`, so consoles are pushed new
+    alerts instead of polling /data/alerts.
+    """
+
+    def __init__(self, buffer: int = STREAM_BUFFER):
+        self.buffer = buffer
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, turbine_ids: Optional[Iterable[int]] = None, severities: Optional[Iterable[str]] = None) -> Subscription:
+        subscription = Subscription(turbine_ids, severities, self.buffer)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, rows: Sequence[tuple]) -> None:
+        """Delivers committed alerts, as (alert_id, *ALERT_COLUMNS) tuples, to every matching subscriber."""
+        if not rows:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += len(rows)
+        for subscription in subscribers:
+            subscription.push(rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = list(self._subscribers)
+            return {
+                "subscribers": len(subscribers),
+                "buffer": self.buffer,
+                "published": self.published,
+                "buffered": sum(len(subscription._buffer) for subscription in subscribers),
+                "dropped": sum(subscription.dropped_total for subscription in subscribers),
+            }
+
+hub = AlertHub()
+
+async def _replay(db: aiosqlite.Connection, subscription: Subscription, after_id: int) -> AsyncIterator[tuple]:
+    """Stored alerts after `after_id` that match the subscription, oldest first, one page at a time."""
+    where, params = "alert_id > ?", []
+    if subscription.turbine_ids is not None:
+        where += f" AND turbine_id IN ({','.join('?' for _ in subscription.turbine_ids)})"
+        params += sorted(subscription.turbine_ids)
+    if subscription.severities is not None:
+        where += f" AND severity IN ({','.join('?' for _ in subscription.severities)})"
+        params += sorted(subscription.severities)
+    while True:
+        rows = await db.execute_fetchall(f"SELECT {', '.join(ALERT_FIELDS)} FROM alerts WHERE {where} ORDER BY alert_id LIMIT ?", [after_id] + params + [REPLAY_PAGE])
+        for row in rows:
+            yield tuple(row)
+        if len(rows) < REPLAY_PAGE:
+            return
+        after_id = rows[-1][0]
+
+def _event(row: tuple) -> bytes:
+    return b"id: %d\nevent: alert\ndata: %s\n\n" % (row[0], serialization.dumps(dict(zip(ALERT_FIELDS, row))))
+
+async def sse(db: aiosqlite.Connection, subscription: Subscription, last_id: Optional[int] = None, keepalive: float = KEEPALIVE_SECONDS) -> AsyncIterator[bytes]:
+    """
+    Server-sent events for a subscription that is already attached to the hub. With
+    `last_id`, stored alerts after it are replayed first; live alerts that arrived during
+    the replay are then sent without repeats. Other live alerts are sent as they come,
+    which is not always in id order: writers on several threads publish after committing.
+    A `dropped` event tells the client how many
+    alerts its buffer lost, and a comment line every `keepalive` seconds keeps proxies from
+    closing an idle stream. The subscription is detached when the client goes away.
+    """
+    try:
+        # Alert ids follow commit order, so every alert at or below the last one replayed was
+        # visible to the replay: those are the only repeats.
+        replayed = last_id if last_id is not None else 0
+        if last_id is not None:
+            async for row in _replay(db, subscription, last_id):
+                replayed = row[0]
+                yield _event(row)
+        yield b": connected\n\n"
+        while True:
+            rows, dropped = await subscription.next(keepalive)
+            if dropped:
+                yield b"event: dropped\ndata: %s\n\n" % serialization.dumps({"count": dropped})
+            rows = [row for row in rows if row[0] > replayed]
+            for row in rows:
+                yield _event(row)
+            if not rows and not dropped:
+                yield b": keepalive\n\n"
+    finally:
+        hub.unsubscribe(subscription)
@@ -0,0 +1,205 @@
+# app/alerts.py
+
+import operator
+import sqlite3
+import threading
+import time
+from itertools import repeat
+from string import Formatter
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from app import derived
+
+ALERT_COLUMNS = ['turbine_id', 'timestamp', 'metric', 'alert_type', 'severity', 'actual_value', 'threshold_value', 'description']
+INSERT_ALERT_SQL = f"INSERT INTO alerts ({', '.join(ALERT_COLUMNS)}) VALUES ({', '.join('?' for _ in ALERT_COLUMNS)})"
+
+OPERATORS: Dict[str, Callable] = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+# Metrics a rule may reference that are not stored columns; all come from one kernel call.
+DERIVED_METRICS = derived.DERIVED_METRICS
+
+class ThresholdRule(NamedTuple):
+    metric: str
+    op: str
+    threshold: float
+    alert_type: str
+    severity: str
+    description: str  # str.format template with a single {value:<spec>} field
+    reported_threshold: Optional[float] = None  # threshold_value written to the alert, if different
+    guard: Optional[Tuple[str, str, float]] = None  # (metric, op, value) that must also hold
+    name: str = ""
+
+def _compile_description(template: str) -> Tuple[str, str, str]:
+    """Splits "T48={value:.2f}°C" into ("T48=", "%.2f", "°C") for column-wise formatting."""
+    parts = list(Formatter().parse(template))
+    prefix, field, spec, _ = parts[0]
+    if field != "value" or any(p[1] is not None for p in parts[1:]):
+        raise ValueError(f"Description template must contain exactly one {{value}} field: {template!r}")
+    suffix = "".join(p[0] for p in parts[1:])
+    return prefix, "%" + (spec or "s"), suffix
+
+class RuleSet:
+    """
+    Evaluates a list of threshold rules over column arrays at once: each rule becomes one
+    NumPy boolean mask, its descriptions are formatted column-wise for the matching rows only,
+    and the result is a list of alert tuples ready for a single `executemany`.
+    """
+
+    def __init__(self, rules: Sequence[ThresholdRule]):
+        self.rules = list(rules)
+        for rule in self.rules:
+            if rule.op not in OPERATORS or (rule.guard is not None and rule.guard[1] not in OPERATORS):
+                raise ValueError(f"Unsupported operator in rule {rule.name or rule.metric!r}")
+        self._descriptions = [_compile_description(rule.description) for rule in self.rules]
+        # Per-rule counters: [batches, rows evaluated, hits, nanoseconds spent].
+        self._counters = [[0, 0, 0, 0] for _ in self.rules]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _metric(columns: Mapping[str, np.ndarray], cache: Dict[str, np.ndarray], name: str) -> np.ndarray:
+        if name not in cache:
+            if name in columns:
+                cache[name] = np.asarray(columns[name], dtype=np.float64)
+            else:
+                # Undefined ratios come back as NaN, which no threshold comparison matches,
+                # except that rules read a zero inlet pressure as a zero pressure ratio.
+                values = derived.compute_derived(columns)
+                if "p1" in columns:
+                    np.copyto(values["pressure_ratio"], 0.0, where=np.asarray(columns["p1"]) == 0)
+                cache.update(values)
+        return cache[name]
+
+    def evaluate(self, columns: Mapping[str, np.ndarray], timestamps: np.ndarray, turbine_ids, counts: Optional[np.ndarray] = None) -> List[tuple]:
+        """
+        `columns` maps metric names to equal-length arrays; `turbine_ids` is either one id for
+        the whole batch or an array aligned with the rows. Alerts are grouped rule by rule.
+        If given, `counts` (an integer array aligned with the rows) is incremented per alert.
+        """
+        cache: Dict[str, np.ndarray] = {}
+        timestamps = np.asarray(timestamps)
+        per_row_ids = not np.isscalar(turbine_ids)
+        alerts: List[tuple] = []
+        timings = []
+        for rule, (prefix, fmt, suffix) in zip(self.rules, self._descriptions):
+            started = time.perf_counter_ns()
+            values = self._metric(columns, cache, rule.metric)
+            mask = OPERATORS[rule.op](values, rule.threshold)
+            if rule.guard is not None:
+                guard_metric, guard_op, guard_value = rule.guard
+                mask &= OPERATORS[guard_op](self._metric(columns, cache, guard_metric), guard_value)
+            hits = np.flatnonzero(mask)
+            if not len(hits):
+                timings.append((len(values), 0, time.perf_counter_ns() - started))
+                continue
+            if counts is not None:
+                counts[hits] += 1
+            actual = values[hits]
+            descriptions = np.char.add(np.char.add(prefix, np.char.mod(fmt, actual)), suffix)
+            threshold = rule.threshold if rule.reported_threshold is None else rule.reported_threshold
+            alerts.extend(zip(
+                np.asarray(turbine_ids)[hits].tolist() if per_row_ids else repeat(int(turbine_ids)),
+                timestamps[hits].tolist(),
+                repeat(rule.metric), repeat(rule.alert_type), repeat(rule.severity),
+                actual.tolist(), repeat(float(threshold)), descriptions.tolist(),
+            ))
+            timings.append((len(values), len(hits), time.perf_counter_ns() - started))
+        self._record(timings)
+        return alerts
+
+    def _record(self, timings: List[Tuple[int, int, int]]):
+        with self._lock:
+            for counters, (rows, hits, elapsed_ns) in zip(self._counters, timings):
+                counters[0] += 1
+                counters[1] += rows
+                counters[2] += hits
+                counters[3] += elapsed_ns
+
+    def stats(self) -> List[dict]:
+        with self._lock:
+            return [
+                {
+                    "name": rule.name, "metric": rule.metric, "condition": f"{rule.metric} {rule.op} {rule.threshold}",
+                    "batches": batches, "rows_evaluated": rows, "hits": hits,
+                    "total_eval_ms": elapsed_ns / 1e6, "ns_per_row": elapsed_ns / rows if rows else 0.0,
+                }
+                for rule, (batches, rows, hits, elapsed_ns) in zip(self.rules, self._counters)
+            ]
+
+    def carry_stats_from(self, previous: "RuleSet"):
+        """Keeps the counters of rules that survive a reload unchanged."""
+        with previous._lock:
+            earlier = {rule: list(counters) for rule, counters in zip(previous.rules, previous._counters)}
+        for index, rule in enumerate(self.rules):
+            if rule in earlier:
+                self._counters[index] = earlier[rule]
+
+def insert_alerts(db: sqlite3.Connection, alerts: List[tuple], writes=None) -> int:
+    """Inserts ALERT_COLUMNS tuples; with a cache.WriteSet, records them with their new ids."""
+    if alerts:
+        db.executemany(INSERT_ALERT_SQL, alerts)
+        if writes is not None:
+            # The transaction holds the write lock, so the batch received consecutive rowids.
+            last_id = db.execute("SELECT last_insert_rowid()").fetchone()[0]
+            writes.alerts.extend((alert_id, *alert) for alert_id, alert in zip(range(last_id - len(alerts) + 1, last_id + 1), alerts))
+    return len(alerts)
+
+def load_rules(db: sqlite3.Connection) -> RuleSet:
+    rows = db.execute(
+        """
+        SELECT name, metric, op, threshold, alert_type, severity, description, reported_threshold, guard_metric, guard_op, guard_value
+        FROM alert_rules WHERE enabled = 1 ORDER BY rule_id
+        """
+    ).fetchall()
+    return RuleSet([
+        ThresholdRule(
+            metric, op, threshold, alert_type, severity, description, reported_threshold,
+            (guard_metric, guard_op, guard_value) if guard_metric is not None else None, name
+        )
+        for name, metric, op, threshold, alert_type, severity, description, reported_threshold, guard_metric, guard_op, guard_value in rows
+    ])
+
+def rules_version(db: sqlite3.Connection) -> int:
+    return db.execute("SELECT version FROM alert_rules_meta WHERE id = 1").fetchone()[0]
+
+class RuleRegistry:
+    """
+    Process-wide cache of the compiled `alert_rules` table. Rules are compiled once into a
+    RuleSet; callers re-check the table's version counter at most every `check_interval`
+    seconds, so edits made by any worker (or directly in SQL) are picked up without a restart.
+    """
+
+    def __init__(self, check_interval: float = 5.0):
+        self.check_interval = check_interval
+        self._ruleset: Optional[RuleSet] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def reload(self, db: sqlite3.Connection) -> RuleSet:
+        with self._lock:
+            version = rules_version(db)
+            ruleset = load_rules(db)
+            if self._ruleset is not None:
+                ruleset.carry_stats_from(self._ruleset)
+            self._ruleset, self._version, self._checked_at = ruleset, version, time.monotonic()
+            return ruleset
+
+    def rules(self, db: sqlite3.Connection) -> RuleSet:
+        ruleset = self._ruleset
+        if ruleset is None:
+            return self.reload(db)
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            if rules_version(db) != self._version:
+                return self.reload(db)
+        return ruleset
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = 0.0
+            self._version = None
+
+    def stats(self) -> List[dict]:
+        return self._ruleset.stats() if self._ruleset is not None else []
+
+registry = RuleRegistry()
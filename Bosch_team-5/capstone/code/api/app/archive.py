@@ -0,0 +1,215 @@
+# app/archive.py
+
+import argparse
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from app import buckets, etl
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # the archive tier is optional; without pyarrow nothing is ever archived
+    pa = pq = None
+
+ARCHIVE_ROOT = Path(__file__).resolve().parent.parent.parent / "data" / "archive"
+ARCHIVE_HORIZON_DAYS = 180
+ARCHIVE_INTERVAL_SECONDS = 3600.0
+# Rows per Parquet row group; each group carries its own min/max statistics for skipping.
+ROW_GROUP_ROWS = 16_384
+
+ARCHIVED_COLUMNS = ["id", "turbine_id", "timestamp"] + etl.REQUIRED_COLUMNS
+# UTC instant of each reading, parsed the way SQLite parses the stored text; rows are
+# sorted by it so row-group statistics prune time filters.
+TIME_COLUMN = "utc_time"
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+def available() -> bool:
+    return pa is not None
+
+def _has_manifest(db: sqlite3.Connection) -> bool:
+    return db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'archive_files'").fetchone() is not None
+
+def _column_stats(table) -> Dict[str, list]:
+    stats = {}
+    for name in etl.REQUIRED_COLUMNS:
+        values = table.column(name).to_numpy(zero_copy_only=False)
+        finite = values[~np.isnan(values)]
+        stats[name] = [float(finite.min()), float(finite.max()), int(len(values) - len(finite))] if len(finite) else [None, None, len(values)]
+    return stats
+
+def _archive_group(db: sqlite3.Connection, root: Path, turbine_id: int, month: str, cutoff_date: str) -> int:
+    """Moves one turbine-month of readings older than the cutoff into a new Parquet file."""
+    month_start = f"{month}-01"
+    next_month = (datetime.strptime(month_start, "%Y-%m-%d") + timedelta(days=32)).strftime("%Y-%m-01")
+    where = "turbine_id = ? AND reading_date >= ? AND reading_date < ? AND reading_date < ?"
+    params = (turbine_id, month_start, next_month, cutoff_date)
+
+    # The write lock is held from the read to the delete, so rows that arrive meanwhile
+    # either wait for this group or were already part of it.
+    db.execute("BEGIN IMMEDIATE")
+    path = None
+    try:
+        df = pd.read_sql_query(f"SELECT {', '.join(ARCHIVED_COLUMNS)} FROM sensor_readings WHERE {where}", db, params=params)
+        if df.empty:
+            db.rollback()
+            return 0
+        df[TIME_COLUMN] = buckets.utc_instants(df["timestamp"])
+        df = df.sort_values([TIME_COLUMN, "id"], kind="stable")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        relative = Path(f"turbine_id={turbine_id}") / f"month={month}" / f"part-{uuid.uuid4().hex}.parquet"
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, path, row_group_size=ROW_GROUP_ROWS, compression="zstd")
+
+        times = df[TIME_COLUMN]
+        db.execute(
+            """
+            INSERT INTO archive_files (turbine_id, month, path, row_count, byte_size, min_time, max_time, column_stats, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (turbine_id, month, relative.as_posix(), len(df), path.stat().st_size,
+             times.min().strftime(_TIME_FORMAT), times.max().strftime(_TIME_FORMAT),
+             json.dumps(_column_stats(table)), datetime.now().isoformat())
+        )
+        db.execute(f"DELETE FROM sensor_readings WHERE {where}", params)
+        db.commit()
+        return len(df)
+    except BaseException:
+        db.rollback()
+        if path is not None and path.exists():
+            path.unlink()
+        raise
+
+def archive_readings(db: sqlite3.Connection, horizon: timedelta = timedelta(days=ARCHIVE_HORIZON_DAYS), now: Optional[datetime] = None, root: Optional[Path] = None) -> int:
+    """
+    Moves every reading dated before `now - horizon` (whole UTC days) out of sensor_readings
+    into Parquet files partitioned as turbine_id=<id>/month=<YYYY-MM>, one new file per
+    turbine-month per run, each in its own transaction. Readings without a parseable
+    timestamp stay in SQLite. Rollups and buckets already count archived readings and are
+    left untouched. Returns the number of readings moved.
+    """
+    if not available():
+        raise RuntimeError("The archive tier needs pyarrow.")
+    root = root or ARCHIVE_ROOT
+    cutoff_date = ((now or datetime.now(timezone.utc).replace(tzinfo=None)) - horizon).date().isoformat()
+    groups = db.execute(
+        """
+        SELECT turbine_id, substr(reading_date, 1, 7) FROM sensor_readings
+        WHERE turbine_id IS NOT NULL AND reading_date < ? GROUP BY 1, 2 ORDER BY 1, 2
+        """,
+        (cutoff_date,)
+    ).fetchall()
+    return sum(_archive_group(db, root, turbine_id, month, cutoff_date) for turbine_id, month in groups)
+
+def files(db: sqlite3.Connection, turbine_ids: Optional[Sequence[int]] = None, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+    """
+    Archive files that may hold readings of the turbines in [start, end): partition pruning
+    on (turbine_id, month), then skipping by each file's min/max reading time.
+    """
+    if not _has_manifest(db):
+        return []
+    where, params = "1 = 1", []
+    if turbine_ids is not None:
+        where += f" AND turbine_id IN ({','.join('?' for _ in turbine_ids)})"
+        params += list(turbine_ids)
+    if start is not None:
+        where += " AND month >= ? AND month <= ? AND max_time >= ? AND min_time < ?"
+        params += [start.strftime("%Y-%m"), end.strftime("%Y-%m"), start.strftime(_TIME_FORMAT), end.strftime(_TIME_FORMAT)]
+    return [row[0] for row in db.execute(f"SELECT path FROM archive_files WHERE {where} ORDER BY file_id", params)]
+
+def read(paths: Sequence[str], columns: Sequence[str], start: Optional[datetime] = None, end: Optional[datetime] = None, root: Optional[Path] = None):
+    """
+    Reads only `columns` (plus turbine_id and timestamp) of the given files, skipping row
+    groups whose utc_time statistics fall outside [start, end). Returns a pyarrow Table.
+    """
+    if not available():
+        raise RuntimeError("Readings have been archived, but pyarrow is not installed to read them.")
+    root = root or ARCHIVE_ROOT
+    wanted = list(dict.fromkeys(["turbine_id", "timestamp"] + list(columns)))
+    filters = [(TIME_COLUMN, ">=", pd.Timestamp(start)), (TIME_COLUMN, "<", pd.Timestamp(end))] if start is not None else None
+    # Partitions are pruned through the manifest; the files carry turbine_id themselves.
+    return pq.read_table([str(root / path) for path in paths], columns=wanted, filters=filters, partitioning=None)
+
+def batches(db: sqlite3.Connection, columns: Sequence[str], root: Optional[Path] = None) -> Iterator[Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]]:
+    """Every archived reading as (turbine_ids, timestamps, {column: values}), one file at a time."""
+    for path in files(db):
+        table = read([path], columns, root=root)
+        yield (
+            table.column("turbine_id").to_numpy(),
+            np.array(table.column("timestamp").to_pylist(), dtype=object),
+            {name: table.column(name).to_numpy(zero_copy_only=False).astype(np.float64) for name in columns},
+        )
+
+def stats(db: sqlite3.Connection) -> dict:
+    if not _has_manifest(db):
+        return {"available": available(), "files": 0, "rows": 0, "bytes": 0, "turbines": 0, "oldest": None, "newest": None}
+    file_count, rows, size, turbines, oldest, newest = db.execute(
+        "SELECT COUNT(*), COALESCE(SUM(row_count), 0), COALESCE(SUM(byte_size), 0), COUNT(DISTINCT turbine_id), MIN(min_time), MAX(max_time) FROM archive_files"
+    ).fetchone()
+    return {"available": available(), "files": file_count, "rows": rows, "bytes": size, "turbines": turbines, "oldest": oldest, "newest": newest}
+
+class ArchiveScheduler:
+    """Runs `archive_readings` every `interval` seconds on a connection of its own."""
+
+    def __init__(self, horizon_days: float = ARCHIVE_HORIZON_DAYS, interval: float = ARCHIVE_INTERVAL_SECONDS):
+        self.horizon = timedelta(days=horizon_days)
+        self.interval = interval
+        self.last_run: Optional[str] = None
+        self.last_moved = 0
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, path) -> None:
+        if self._thread is not None or not available():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(path,), name="archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, path) -> None:
+        while not self._stop.wait(self.interval):
+            conn = sqlite3.connect(path, timeout=30)
+            try:
+                self.last_moved = archive_readings(conn, self.horizon)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            finally:
+                conn.close()
+            self.last_run = datetime.now().isoformat()
+
+scheduler = ArchiveScheduler()
+
+def main():
+    from app import database
+
+    parser = argparse.ArgumentParser(description="Move old sensor readings into the Parquet archive.")
+    parser.add_argument("--database", default=database.DATABASE_PATH, help="Path to the SQLite database")
+    parser.add_argument("--horizon-days", type=float, default=ARCHIVE_HORIZON_DAYS, help="Archive readings older than this many days")
+    parser.add_argument("--root", type=Path, default=ARCHIVE_ROOT, help="Archive directory")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database, timeout=30)
+    try:
+        moved = archive_readings(conn, timedelta(days=args.horizon_days), root=args.root)
+    finally:
+        conn.close()
+    print(f"Archived {moved} readings.")
+
+if __name__ == "__main__":
+    main()
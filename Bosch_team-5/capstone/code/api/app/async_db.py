@@ -0,0 +1,186 @@
+# app/async_db.py
+
+import asyncio
+import itertools
+import os
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, List, Optional, TypeVar
+import aiosqlite
+from fastapi import HTTPException
+from app import database
+
+READER_CONNECTIONS = 4
+CPU_WORKERS = min(4, os.cpu_count() or 1)
+# Offloaded calls allowed to wait for or run on the CPU executor before new ones get a 503.
+CPU_QUEUE_LIMIT = 64
+
+T = TypeVar("T")
+
+class Overloaded(Exception):
+    pass
+
+class AsyncDatabase:
+    """
+    Data layer for async endpoints, so no request holds one of Starlette's threadpool slots
+    while it waits on SQLite or on NumPy:
+
+    - Reads go through `READER_CONNECTIONS` aiosqlite connections, handed out round-robin.
+      Each runs its statements on a thread of its own, so a slow query only delays the
+      requests sharing its connection, never the event loop.
+    - Writes run as plain functions `fn(conn, *args)` on one dedicated writer thread, one
+      at a time, so they never contend with each other for SQLite's write lock. Every
+      ingestion path (uploads, single and batch readings, write-behind groups, telemetry
+      flushes), alert inserts and turbine management write here, which covers everything
+      that publishes to in-memory state after committing. Alert rule edits (through
+      database.pool), the archiver and offline scripts still write on connections of
+      their own, so the writer may wait up to busy_timeout for the lock; the column store,
+      drift monitor and alert stream do not rely on a single writer. Whatever a function leaves
+      uncommitted, because it raised or returned early, is rolled back.
+    - CPU-heavy pandas/NumPy work is offloaded to a bounded executor of `cpu_workers`
+      threads; at most `queue_limit` calls may be pending there, beyond that callers get
+      Overloaded rather than an ever-growing backlog. Offloaded reads that need a plain
+      sqlite3 connection borrow one from database.pool.
+
+    Connections are opened on first use. Every call awaits a future of its own, so the
+    layer is not tied to the event loop it was first used from.
+    """
+
+    def __init__(self, path, readers: int = READER_CONNECTIONS, cpu_workers: int = CPU_WORKERS, queue_limit: int = CPU_QUEUE_LIMIT):
+        self.path = path
+        self.cpu_workers = cpu_workers
+        self.queue_limit = queue_limit
+        self._readers: List[Optional[aiosqlite.Connection]] = [None] * readers
+        self._turn = itertools.count()
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="sqlite-writer")
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._cpu = ThreadPoolExecutor(cpu_workers, thread_name_prefix="offload")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._reads = self._writes = self._offloaded = self._rejected = 0
+
+    async def _connect_reader(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        for pragma in database.CONNECTION_PRAGMAS:
+            await conn.execute(pragma)
+        return conn
+
+    async def reader(self) -> aiosqlite.Connection:
+        slot = next(self._turn) % len(self._readers)
+        conn = self._readers[slot]
+        if conn is None:
+            conn = await self._connect_reader()
+            if self._readers[slot] is None:
+                self._readers[slot] = conn
+            else:
+                # Another request opened this slot while we were connecting.
+                await conn.close()
+                conn = self._readers[slot]
+        with self._lock:
+            self._reads += 1
+        return conn
+
+    def _run_write(self, fn: Callable[..., T], args) -> T:
+        if self._writer_conn is None:
+            self._writer_conn = sqlite3.connect(self.path)
+            self._writer_conn.row_factory = sqlite3.Row
+            for pragma in database.CONNECTION_PRAGMAS:
+                self._writer_conn.execute(pragma)
+        conn = self._writer_conn
+        try:
+            return fn(conn, *args)
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+
+    def submit(self, fn: Callable[..., T], *args) -> "Future[T]":
+        """`write` for threads without an event loop: returns a concurrent.futures.Future."""
+        with self._lock:
+            self._writes += 1
+        return self._writer.submit(self._run_write, fn, args)
+
+    def write(self, fn: Callable[..., T], *args) -> "asyncio.Future[T]":
+        """
+        Queues `fn(conn, *args)` to run on the writer connection, after every write queued
+        before it, and returns a future to await for its result. The write is queued by the
+        call itself, so it is not lost if the caller is cancelled before awaiting it.
+        """
+        return asyncio.wrap_future(self.submit(fn, *args))
+
+    def _run_offloaded(self, fn: Callable[..., T], args) -> T:
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def offload(self, fn: Callable[..., T], *args) -> T:
+        """Runs `fn(*args)` on the bounded CPU executor."""
+        with self._lock:
+            if self._pending >= self.queue_limit:
+                self._rejected += 1
+                raise Overloaded(f"{self._pending} offloaded calls are already pending")
+            self._pending += 1
+            self._offloaded += 1
+        return await asyncio.wrap_future(self._cpu.submit(self._run_offloaded, fn, args))
+
+    async def offload_read(self, fn: Callable[..., T], *args) -> T:
+        """Runs `fn(conn, *args)` on the CPU executor with a connection from database.pool."""
+        return await self.offload(_with_pooled_connection, fn, args)
+
+    async def close(self) -> None:
+        for slot, conn in enumerate(self._readers):
+            self._readers[slot] = None
+            if conn is not None:
+                await conn.close()
+        self._cpu.shutdown(wait=True)
+        if self._writer_conn is not None:
+            await asyncio.wrap_future(self._writer.submit(self._writer_conn.close))
+            self._writer_conn = None
+        self._writer.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "reader_connections": len(self._readers),
+                "open_readers": sum(conn is not None for conn in self._readers),
+                "writer_open": self._writer_conn is not None,
+                "cpu_workers": self.cpu_workers,
+                "queue_limit": self.queue_limit,
+                "pending_offloads": self._pending,
+                "reads": self._reads,
+                "writes": self._writes,
+                "offloaded": self._offloaded,
+                "rejected": self._rejected,
+            }
+
+def _with_pooled_connection(fn: Callable[..., T], args) -> T:
+    conn = database.pool.acquire()
+    try:
+        return fn(conn, *args)
+    finally:
+        database.pool.release(conn)
+
+db = AsyncDatabase(database.DATABASE_PATH)
+
+async def get_async_db() -> AsyncIterator[aiosqlite.Connection]:
+    """Async counterpart of database.get_db: a reader connection for the request."""
+    yield await db.reader()
+
+async def offload(fn: Callable[..., T], *args) -> T:
+    """`db.offload` for routes: an overloaded executor becomes a 503."""
+    try:
+        return await db.offload(fn, *args)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+async def offload_read(fn: Callable[..., T], *args) -> T:
+    """`db.offload_read` for routes: an overloaded executor or an exhausted pool becomes a 503."""
+    try:
+        return await db.offload_read(fn, *args)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except database.PoolTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
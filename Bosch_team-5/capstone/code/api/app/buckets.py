@@ -0,0 +1,303 @@
+# app/buckets.py
+
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from app import derived
+
+# Every min/avg/max figure of TurbineAnalyticsReport, by the metric it summarizes.
+STATS_METRICS = (
+    "t1", "t2", "p1", "p2", "pressure_ratio", "t48", "p48", "gtt", "gtn", "ggn", "power_proxy_kw",
+    "thermal_efficiency", "compressor_efficiency", "fuel_per_rpm", "rpm_ratio_gtn_ggn", "total_decay_score",
+    "temp_ratio_t48_p48", "temp_ratio_t1_p1", "temp_ratio_t2_p2", "torque_diff", "total_prop_torque",
+)
+AGGREGATES = ("min", "max", "sum")
+STATS_COLUMNS = [f"{metric}_{agg}" for metric in STATS_METRICS for agg in AGGREGATES]
+_COLUMN_AGGREGATES = [agg for _ in STATS_METRICS for agg in AGGREGATES]
+_IS_MIN = np.array([agg == "min" for agg in _COLUMN_AGGREGATES])
+_IS_MAX = np.array([agg == "max" for agg in _COLUMN_AGGREGATES])
+PARTIAL_COLUMNS = ["record_count", "first_timestamp", "last_timestamp"] + STATS_COLUMNS
+
+# Coarsest first. Bucket keys are UTC wall-clock strings, matching what SQLite's date() and
+# strftime() make of the stored timestamps, so buckets line up with reading_date.
+RESOLUTIONS: Tuple[Tuple[str, str, timedelta], ...] = (
+    ("day", "%Y-%m-%d", timedelta(days=1)),
+    ("hour", "%Y-%m-%d %H:00:00", timedelta(hours=1)),
+)
+RAW_TIMESTAMP_SQL = "strftime('%Y-%m-%d %H:%M:%f', timestamp)"
+REBUILD_CHUNK_SIZE = 50_000
+# Reduce raw readings inside SQLite rather than in NumPy (see _raw_partials).
+RAW_PUSHDOWN = True
+
+# Every STATS_COLUMNS figure as one SQL aggregate; missing values count as 0, as in _stats_matrix.
+_PUSHDOWN_STATS_SQL = ", ".join(
+    f"{agg.upper()}(COALESCE({derived.SQL_EXPRESSIONS.get(metric, metric)}, 0.0))" for metric in STATS_METRICS for agg in AGGREGATES
+)
+_math_functions: Optional[bool] = None
+
+_BUCKET_COLUMNS = ["turbine_id", "resolution", "bucket_start"] + PARTIAL_COLUMNS
+_MERGE = {"min": "min({0}, excluded.{0})", "max": "max({0}, excluded.{0})", "sum": "{0} + excluded.{0}"}
+UPSERT_BUCKET_SQL = f"""
+    INSERT INTO reading_buckets ({', '.join(_BUCKET_COLUMNS)}) VALUES ({', '.join('?' for _ in _BUCKET_COLUMNS)})
+    ON CONFLICT (turbine_id, resolution, bucket_start) DO UPDATE SET
+        record_count = record_count + excluded.record_count,
+        first_timestamp = min(first_timestamp, excluded.first_timestamp),
+        last_timestamp = max(last_timestamp, excluded.last_timestamp),
+        {', '.join(f"{column} = {_MERGE[column.rsplit('_', 1)[1]].format(column)}" for column in STATS_COLUMNS)}
+"""
+
+def _stats_matrix(columns: Mapping[str, np.ndarray]) -> np.ndarray:
+    """Rows x STATS_METRICS matrix of a batch, derived metrics included."""
+    values = {name: np.asarray(column, dtype=np.float64) for name, column in columns.items()}
+    values.update(derived.compute_derived(values))
+    n = len(next(iter(values.values())))
+    matrix = np.column_stack([values[metric] if metric in values else np.full(n, np.nan) for metric in STATS_METRICS])
+    # Missing values count as 0, as they always have in the analytics report.
+    matrix[np.isnan(matrix)] = 0.0
+    return matrix
+
+def _reduce(block: np.ndarray) -> List[float]:
+    """One group's figures in STATS_COLUMNS order."""
+    return np.stack([block.min(axis=0), block.max(axis=0), block.sum(axis=0)], axis=1).ravel().tolist()
+
+def _has_utc_offset(text: np.ndarray) -> np.ndarray:
+    """Vectorized test for a trailing 'Z', '+HH:MM' or '+HHMM' after the date part."""
+    lengths = np.char.str_len(text)
+    if not len(text) or not lengths.max():
+        return np.zeros(len(text), dtype=bool)
+    chars = text.view("U1").reshape(len(text), -1)
+    rows = np.arange(len(text))
+
+    def char_at(offset: int) -> np.ndarray:
+        index = lengths - offset
+        return np.where(index > 10, chars[rows, np.clip(index, 0, None)], "")
+
+    return (char_at(1) == "Z") | np.isin(char_at(6), ["+", "-"]) | np.isin(char_at(5), ["+", "-"])
+
+def utc_instants(timestamps: pd.Series) -> pd.Series:
+    """
+    Parses stored timestamps the way SQLite does: offsets are converted to UTC, naive values
+    are taken as UTC, anything unparseable becomes NaT. Naive and offset-bearing values are
+    parsed separately because pandas applies one offset to a whole mixed column.
+    """
+    text = timestamps.astype("string")
+    aware = _has_utc_offset(text.fillna("").to_numpy(dtype=str))
+    instants = pd.Series(pd.NaT, index=timestamps.index, dtype="datetime64[ns]")
+    instants[~aware] = pd.to_datetime(text[~aware], format="ISO8601", errors="coerce")
+    if aware.any():
+        instants[aware] = pd.to_datetime(text[aware], format="ISO8601", utc=True, errors="coerce").dt.tz_localize(None)
+    return instants
+
+def summarize(columns: Mapping[str, np.ndarray], timestamps, turbine_ids) -> List[tuple]:
+    """
+    Hourly and daily bucket rows for a batch of readings, shaped for UPSERT_BUCKET_SQL. Rows
+    are sorted once per resolution by (turbine, bucket, timestamp text) and every metric is
+    reduced with ufunc.reduceat, so a batch costs a few vectorized passes whatever its size.
+    """
+    stamps = pd.Series(np.asarray(timestamps, dtype=object))
+    instants = utc_instants(stamps).to_numpy()
+    dated = ~np.isnat(instants)
+    if not dated.any():
+        return []
+
+    matrix = _stats_matrix(columns)[dated]
+    n = len(stamps)
+    ids = np.broadcast_to(np.asarray(turbine_ids, dtype=np.int64), (n,))[dated]
+    text = stamps.to_numpy()[dated].astype(str)
+    nanos = instants[dated].astype(np.int64)
+
+    rows: List[tuple] = []
+    for resolution, key_format, step in RESOLUTIONS:
+        step_ns = step // timedelta(microseconds=1) * 1000
+        keys = nanos // step_ns
+        order = np.lexsort((text, keys, ids))
+        group_ids, group_keys = ids[order], keys[order]
+        starts = np.flatnonzero(np.r_[True, (np.diff(group_ids) != 0) | (np.diff(group_keys) != 0)])
+        ends = np.r_[starts[1:], len(order)]
+        block = matrix[order]
+        stats = np.stack([np.minimum.reduceat(block, starts), np.maximum.reduceat(block, starts), np.add.reduceat(block, starts)], axis=2)
+        labels = pd.to_datetime(group_keys[starts] * step_ns).strftime(key_format)
+        sorted_text = text[order]
+        rows.extend(
+            (turbine_id, resolution, label, count, first, last, *figures)
+            for turbine_id, label, count, first, last, figures in zip(
+                group_ids[starts].tolist(), labels, (ends - starts).tolist(),
+                sorted_text[starts].tolist(), sorted_text[ends - 1].tolist(), stats.reshape(len(starts), -1).tolist()
+            )
+        )
+    return rows
+
+def record(db: sqlite3.Connection, columns: Mapping[str, np.ndarray], timestamps, turbine_ids) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Folds a batch of newly inserted readings into its buckets, in the caller's transaction.
+    Returns the hour-aligned half-open UTC span the dated readings fall in, or None if none are.
+    """
+    rows = summarize(columns, timestamps, turbine_ids)
+    db.executemany(UPSERT_BUCKET_SQL, rows)
+    hours = [row[2] for row in rows if row[1] == "hour"]
+    if not hours:
+        return None
+    return datetime.fromisoformat(min(hours)), datetime.fromisoformat(max(hours)) + timedelta(hours=1)
+
+def rebuild(db: sqlite3.Connection, metrics: Sequence[str], chunk_size: int = REBUILD_CHUNK_SIZE) -> int:
+    """
+    Recomputes every bucket from sensor_readings, then from the archive, in one chunked pass
+    (caller's transaction).
+    """
+    from app import archive  # archive builds on this module
+
+    db.execute("DELETE FROM reading_buckets")
+    selected = ", ".join(["turbine_id", "timestamp"] + list(metrics))
+    cursor = db.execute(f"SELECT {selected} FROM sensor_readings WHERE turbine_id IS NOT NULL AND timestamp IS NOT NULL")
+    scanned = 0
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        turbine_ids, timestamps, *values = zip(*rows)
+        columns = {metric: np.array(column, dtype=np.float64) for metric, column in zip(metrics, values)}
+        record(db, columns, np.array(timestamps, dtype=object), np.array(turbine_ids, dtype=np.int64))
+        scanned += len(rows)
+    for turbine_ids, timestamps, columns in archive.batches(db, metrics):
+        record(db, columns, timestamps, turbine_ids)
+        scanned += len(turbine_ids)
+    return scanned
+
+# --- Report composition ---
+
+def _floor(instant: datetime, step: timedelta) -> datetime:
+    return datetime.min + ((instant - datetime.min) // step) * step
+
+def _ceil(instant: datetime, step: timedelta) -> datetime:
+    floored = _floor(instant, step)
+    return floored if floored == instant else floored + step
+
+def cover(start: datetime, end: datetime, levels=RESOLUTIONS) -> List[Tuple[str, datetime, datetime]]:
+    """
+    Splits the half-open window [start, end) into the coarsest aligned pieces that exactly cover
+    it: whole days, then whole hours at the ragged ends, then ("raw", a, b) sub-hour edges.
+    """
+    if start >= end:
+        return []
+    if not levels:
+        return [("raw", start, end)]
+    resolution, _, step = levels[0]
+    lo, hi = _ceil(start, step), _floor(end, step)
+    if lo >= hi:
+        return cover(start, end, levels[1:])
+    return cover(start, lo, levels[1:]) + [(resolution, lo, hi)] + cover(hi, end, levels[1:])
+
+def _bucket_partials(db: sqlite3.Connection, turbine_ids: Sequence[int], resolution: str, start: Optional[datetime], end: Optional[datetime]) -> List[tuple]:
+    key_format = dict((name, fmt) for name, fmt, _ in RESOLUTIONS)[resolution]
+    merged = ", ".join(f"{agg.upper()}({column})" for column, agg in zip(STATS_COLUMNS, _COLUMN_AGGREGATES))
+    where = f"resolution = ? AND turbine_id IN ({','.join('?' for _ in turbine_ids)})"
+    params: list = [resolution] + list(turbine_ids)
+    if start is not None:
+        where += " AND bucket_start >= ? AND bucket_start < ?"
+        params += [start.strftime(key_format), end.strftime(key_format)]
+    query = f"""
+        SELECT turbine_id, SUM(record_count), MIN(first_timestamp), MAX(last_timestamp), {merged}
+        FROM reading_buckets WHERE {where} GROUP BY turbine_id
+    """
+    return [tuple(row) for row in db.execute(query, params).fetchall()]
+
+def raw_bound(instant: datetime) -> str:
+    # strftime('%f') renders seconds with millisecond precision.
+    return instant.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+def _array_partials(ids: np.ndarray, stamps: np.ndarray, columns: Mapping[str, np.ndarray]) -> List[tuple]:
+    """Per-turbine partials of rows already in memory, reduced with NumPy."""
+    if not len(ids):
+        return []
+    matrix = _stats_matrix(columns)
+    partials = []
+    for turbine_id in np.unique(ids).tolist():
+        mask = ids == turbine_id
+        dated = [stamp for stamp in stamps[mask] if stamp is not None]
+        partials.append((turbine_id, int(mask.sum()), min(dated, default=None), max(dated, default=None), *_reduce(matrix[mask])))
+    return partials
+
+def _has_math_functions(db: sqlite3.Connection) -> bool:
+    global _math_functions
+    if _math_functions is None:
+        try:
+            db.execute("SELECT pow(2.0, 0.5)")
+            _math_functions = True
+        except sqlite3.OperationalError:
+            _math_functions = False
+    return _math_functions
+
+def _raw_partials(db: sqlite3.Connection, turbine_ids: Sequence[int], start: Optional[datetime], end: Optional[datetime]) -> List[tuple]:
+    """
+    Per-turbine partials of the raw readings in [start, end), or of the undated ones when no
+    window is given. With RAW_PUSHDOWN (and SQLite's math functions) hot rows are reduced by
+    one GROUP BY turbine_id query that evaluates the derived metrics in SQL, so only a row of
+    figures per turbine leaves SQLite; otherwise they are fetched and reduced with NumPy.
+    Archived rows are always reduced with NumPy.
+    """
+    from app import archive  # archive builds on this module
+
+    where = f"turbine_id IN ({','.join('?' for _ in turbine_ids)})"
+    params: list = list(turbine_ids)
+    if start is None:
+        # Readings whose timestamp is missing or unparseable never land in a bucket (nor in the archive).
+        where += " AND reading_date IS NULL"
+    else:
+        where += f" AND reading_date BETWEEN ? AND ? AND {RAW_TIMESTAMP_SQL} >= ? AND {RAW_TIMESTAMP_SQL} < ?"
+        params += [start.date().isoformat(), end.date().isoformat(), raw_bound(start), raw_bound(end)]
+    pushdown = RAW_PUSHDOWN and _has_math_functions(db)
+    # Hot rows and the archive manifest are read in one snapshot, so a concurrent archive run
+    # cannot make a reading appear in both or in neither.
+    snapshot = not db.in_transaction
+    if snapshot:
+        db.execute("BEGIN")
+    try:
+        if pushdown:
+            partials = [tuple(row) for row in db.execute(f"SELECT turbine_id, COUNT(*), MIN(timestamp), MAX(timestamp), {_PUSHDOWN_STATS_SQL} FROM sensor_readings WHERE {where} GROUP BY turbine_id", params)]
+        else:
+            rows = db.execute(f"SELECT turbine_id, timestamp, {', '.join(derived.BASE_INPUTS)} FROM sensor_readings WHERE {where}", params).fetchall()
+        archived = archive.files(db, turbine_ids, start, end) if start is not None else []
+    finally:
+        if snapshot:
+            db.commit()
+
+    if not pushdown:
+        values = np.array([row[2:] for row in rows], dtype=np.float64).reshape(len(rows), len(derived.BASE_INPUTS))
+        partials = _array_partials(
+            np.array([row[0] for row in rows], dtype=np.int64), np.array([row[1] for row in rows], dtype=object),
+            {name: values[:, i] for i, name in enumerate(derived.BASE_INPUTS)}
+        )
+    if archived:
+        table = archive.read(archived, derived.BASE_INPUTS, start, end)
+        partials += _array_partials(
+            table.column("turbine_id").to_numpy(), np.array(table.column("timestamp").to_pylist(), dtype=object),
+            {name: table.column(name).to_numpy(zero_copy_only=False) for name in derived.BASE_INPUTS}
+        )
+    return partials
+
+def compose(db: sqlite3.Connection, turbine_ids: Sequence[int], window: Optional[Tuple[datetime, datetime]] = None) -> Dict[int, dict]:
+    """
+    Per-turbine aggregates over a half-open UTC window (or all history), merged from the
+    coarsest buckets that exactly cover it plus raw rows for the sub-hour edges. Each value is
+    a dict of PARTIAL_COLUMNS; turbines without readings in the window are omitted.
+    """
+    pieces = cover(*window) if window is not None else [("day", None, None), ("raw", None, None)]
+    merged: Dict[int, list] = {}
+    for resolution, start, end in pieces:
+        partials = _raw_partials(db, turbine_ids, start, end) if resolution == "raw" else _bucket_partials(db, turbine_ids, resolution, start, end)
+        for turbine_id, count, first, last, *figures in partials:
+            figures = np.array(figures, dtype=np.float64)
+            if turbine_id not in merged:
+                merged[turbine_id] = [count, first, last, figures]
+                continue
+            total = merged[turbine_id]
+            total[0] += count
+            total[1] = min((t for t in (total[1], first) if t is not None), default=None)
+            total[2] = max((t for t in (total[2], last) if t is not None), default=None)
+            total[3] = np.where(_IS_MIN, np.minimum(total[3], figures), np.where(_IS_MAX, np.maximum(total[3], figures), total[3] + figures))
+    return {
+        turbine_id: dict(zip(PARTIAL_COLUMNS, [count, first, last, *figures.tolist()]))
+        for turbine_id, (count, first, last, figures) in sorted(merged.items())
+    }
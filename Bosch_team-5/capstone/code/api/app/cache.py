@@ -0,0 +1,173 @@
+# app/cache.py
+
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Deque, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+Window = Optional[Tuple[datetime, datetime]]
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 300.0
+# Recent invalidations remembered for `store`; a computation that outlived more writes than
+# this is not cached.
+INVALIDATION_LOG = 256
+
+class WriteSet:
+    """
+    What a committed write touched, for `after_commit`: per turbine the span of its readings,
+    plus staged column-store turbines, inserted alerts and advanced drift states.
+    """
+
+    def __init__(self):
+        self.spans: Dict[int, Window] = {}
+        self.undated: Set[int] = set()
+        self.new_turbines: Set[int] = set()
+        self.staged: Set[int] = set()
+        self.alerts: List[tuple] = []
+        self.drift: Dict[int, object] = {}
+        self.drift_saved: Dict[int, object] = {}
+
+    def add(self, turbine_id: int, span: Window, new_turbine: bool = False) -> None:
+        if span is None:
+            self.undated.add(turbine_id)
+        else:
+            current = self.spans.get(turbine_id)
+            self.spans[turbine_id] = span if current is None else (min(current[0], span[0]), max(current[1], span[1]))
+        if new_turbine:
+            self.new_turbines.add(turbine_id)
+
+    @property
+    def turbine_ids(self) -> Set[int]:
+        return set(self.spans) | self.undated
+
+    def footprint(self) -> "WriteSet":
+        """A copy holding only what invalidation looks at."""
+        copy = WriteSet()
+        copy.spans, copy.undated, copy.new_turbines = dict(self.spans), set(self.undated), set(self.new_turbines)
+        return copy
+
+class _Entry:
+    __slots__ = ("body", "expires_at", "turbines", "window", "fleet")
+
+    def __init__(self, body: bytes, expires_at: float, turbines: FrozenSet[int], window: Window, fleet: bool):
+        self.body = body
+        self.expires_at = expires_at
+        self.turbines = turbines
+        self.window = window
+        self.fleet = fleet
+
+    def stale_after(self, writes: WriteSet) -> bool:
+        if self.fleet and writes.new_turbines:
+            return True
+        for turbine_id in self.turbines & writes.turbine_ids:
+            if self.window is None:
+                return True
+            span = writes.spans.get(turbine_id)
+            if span is not None and span[0] < self.window[1] and self.window[0] < span[1]:
+                return True
+        return False
+
+class Lookup:
+    """Outcome of `ResponseCache.lookup`: the cached body on a hit, else what `store` needs."""
+    __slots__ = ("key", "body", "version", "fleet")
+
+    def __init__(self, key: Hashable, body: Optional[bytes], version: int, fleet: bool):
+        self.key = key
+        self.body = body
+        self.version = version
+        self.fleet = fleet
+
+class ResponseCache:
+    """
+    LRU + TTL cache of serialized report responses, bounded by entry count and total size.
+    Each entry records its turbines and UTC window (None for all time); `invalidate` drops
+    the entries a committed write overlaps, and `store` refuses a body an invalidation raced.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._version = 0
+        # (version, footprint of the write) of recent invalidations; None for a clear().
+        self._recent: Deque[Tuple[int, Optional[WriteSet]]] = deque(maxlen=INVALIDATION_LOG)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def lookup(self, key: Hashable, fleet: bool = False) -> Lookup:
+        with self._lock:
+            version = self._version
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return Lookup(key, entry.body, version, fleet)
+            self.misses += 1
+            return Lookup(key, None, version, fleet)
+
+    def store(self, lookup: Lookup, body: bytes, turbines: Iterable[int], window: Window = None) -> None:
+        if len(body) > self.max_bytes:
+            return
+        entry = _Entry(body, time.monotonic() + self.ttl_seconds, frozenset(turbines), window, lookup.fleet)
+        with self._lock:
+            if self._raced(entry, lookup.version):
+                return
+            if lookup.key in self._entries:
+                self._drop(lookup.key)
+            self._entries[lookup.key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, writes: WriteSet) -> int:
+        """Drops every entry the committed writes overlap; returns how many were dropped."""
+        if not writes.turbine_ids:
+            return 0
+        footprint = writes.footprint()
+        with self._lock:
+            self._version += 1
+            self._recent.append((self._version, footprint))
+            stale = [key for key, entry in self._entries.items() if entry.stale_after(writes)]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._recent.append((self._version, None))
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries), "bytes": self._bytes,
+                "max_entries": self.max_entries, "max_bytes": self.max_bytes, "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions, "expirations": self.expirations, "invalidations": self.invalidations,
+            }
+
+    def _raced(self, entry: _Entry, version: int) -> bool:
+        """Whether an invalidation after `version` overlaps `entry` (or is no longer known)."""
+        missed = self._version - version
+        if missed > len(self._recent):
+            return True
+        return any(writes is None or entry.stale_after(writes) for _, writes in list(self._recent)[len(self._recent) - missed:])
+
+    def _drop(self, key: Hashable) -> None:
+        self._bytes -= len(self._entries.pop(key).body)
+
+response_cache = ResponseCache()
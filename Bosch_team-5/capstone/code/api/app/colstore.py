@@ -0,0 +1,321 @@
+# app/colstore.py
+
+import argparse
+import os
+import sqlite3
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from app import buckets, cache
+
+COLSTORE_ROOT = Path(__file__).resolve().parent.parent.parent / "data" / "colstore"
+
+# Every file is a 64-byte header followed by little-endian values:
+#   magic (8s) | numpy dtype string (8s) | committed row count (Q) | flags (Q) | reserved (32x)
+# Bytes past the committed count are uncommitted appends and are ignored by readers.
+HEADER = struct.Struct("<8s8sQQ32x")
+MAGIC = b"TRBCOL01"
+TIMESTAMP_FILE = "_timestamp.i8"
+TIMESTAMP_DTYPE = np.dtype("<i8")  # UTC nanoseconds since the epoch
+FLAG_UNSORTED = 1
+# A committed write publishes its rows within moments; rows another thread staged that are
+# still unpublished after this long belong to a transaction that rolled back.
+STAGE_WAIT_SECONDS = 10.0
+
+def _read_header(path: Path) -> Tuple[np.dtype, int, int]:
+    with open(path, "rb") as f:
+        magic, dtype, count, flags = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a column store file")
+    return np.dtype(dtype.rstrip(b"\0").decode()), count, flags
+
+def _write_header(path: Path, dtype: np.dtype, count: int, flags: int = 0) -> None:
+    mode = "r+b" if path.exists() else "wb"
+    with open(path, mode) as f:
+        f.write(HEADER.pack(MAGIC, dtype.str.encode(), count, flags))
+
+def _append(path: Path, dtype: np.dtype, start: int, values: np.ndarray) -> None:
+    """Writes values at row `start`, discarding anything previously staged past it."""
+    if not path.exists():
+        _write_header(path, dtype, 0)
+    with open(path, "r+b") as f:
+        f.truncate(HEADER.size + start * dtype.itemsize)
+        f.seek(0, os.SEEK_END)
+        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+def _view(path: Path, dtype: np.dtype, count: int) -> np.ndarray:
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER.size, shape=(count,))
+
+class TurbineColumns:
+    """
+    Read-only view of one turbine's files. `timestamps` and `column()` are memory-mapped
+    arrays of the committed rows; nothing is read until it is touched.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        _, self.count, flags = _read_header(directory / TIMESTAMP_FILE)
+        self.sorted = not flags & FLAG_UNSORTED
+        self.timestamps = _view(directory / TIMESTAMP_FILE, TIMESTAMP_DTYPE, self.count)
+        self._mapped: Dict[str, np.ndarray] = {}
+
+    @property
+    def columns(self) -> List[str]:
+        return sorted(path.name.rsplit(".", 1)[0] for path in self.directory.iterdir() if path.name != TIMESTAMP_FILE and not path.name.endswith(".tmp"))
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self._mapped:
+            path = next(self.directory.glob(f"{name}.*"), None)
+            if path is None:
+                raise KeyError(name)
+            self._mapped[name] = _view(path, _read_header(path)[0], self.count)
+        return self._mapped[name]
+
+    def slice(self, start: Optional[np.datetime64] = None, end: Optional[np.datetime64] = None, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Rows with start <= timestamp < end, as {"timestamp": ..., column: ...}. While the index is
+        sorted (the store only loses that when older readings are appended after newer ones,
+        until `ColumnStore.compact`) these are zero-copy views found by binary search;
+        otherwise they are copies selected by a mask.
+        """
+        lo = None if start is None else np.datetime64(start, "ns").astype(np.int64)
+        hi = None if end is None else np.datetime64(end, "ns").astype(np.int64)
+        if self.sorted:
+            first = 0 if lo is None else int(np.searchsorted(self.timestamps, lo, side="left"))
+            last = self.count if hi is None else int(np.searchsorted(self.timestamps, hi, side="left"))
+            rows = slice(first, last)
+        else:
+            rows = np.ones(self.count, dtype=bool)
+            if lo is not None:
+                rows &= self.timestamps >= lo
+            if hi is not None:
+                rows &= self.timestamps < hi
+        names = self.columns if columns is None else columns
+        result = {"timestamp": self.timestamps[rows].view("datetime64[ns]")}
+        result.update({name: self.column(name)[rows] for name in names})
+        return result
+
+class ColumnStore:
+    """
+    Append-only, per-turbine, per-column binary files for fleet-scale scans that would
+    otherwise go through sqlite3 rows and pandas. Each turbine directory holds one file per
+    column plus a UTC timestamp index; readers map them with numpy.memmap.
+
+    Ingestion stages rows while its database transaction is open: bytes are appended past
+    the committed count, so readers do not see them. `commit` then publishes the new counts,
+    column headers first and the timestamp index last, which is the commit point. A rolled
+    back transaction's staged bytes are overwritten by the next append.
+
+    SQLite's write lock serializes staging, but not publishing: it is released by the
+    database commit, before `commit` here. So a turbine staged by a transaction on another
+    thread stays reserved until that write publishes. A later stage waits for it, so it
+    neither overwrites nor takes over rows that did commit, for up to STAGE_WAIT_SECONDS,
+    after which the rows are taken to be rolled back. A thread runs one transaction at a
+    time, so what its own earlier transaction left unpublished was rolled back and is
+    overwritten at once. One process should write a store.
+
+    Readings without a parseable timestamp are not stored, as they cannot be indexed.
+    """
+
+    def __init__(self, root: Path, dtype=np.float64):
+        self.root = Path(root)
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self._lock = threading.Condition()
+        # turbine_id -> (owning WriteSet, staged row count, staged flags, staging thread, staged at)
+        self._pending: Dict[int, Tuple[cache.WriteSet, int, int, int, float]] = {}
+
+    def _directory(self, turbine_id: int) -> Path:
+        return self.root / f"turbine_{int(turbine_id)}"
+
+    def turbines(self) -> List[int]:
+        if not self.root.exists():
+            return []
+        return sorted(int(path.name.split("_", 1)[1]) for path in self.root.glob("turbine_*") if (path / TIMESTAMP_FILE).exists())
+
+    def open(self, turbine_id: int) -> Optional[TurbineColumns]:
+        directory = self._directory(turbine_id)
+        return TurbineColumns(directory) if (directory / TIMESTAMP_FILE).exists() else None
+
+    def scan(self, columns: Optional[Sequence[str]] = None, start=None, end=None) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+        """(turbine_id, slice) for every turbine, for fleet-wide studies."""
+        for turbine_id in self.turbines():
+            yield turbine_id, self.open(turbine_id).slice(start, end, columns)
+
+    def frame(self, columns: Optional[Sequence[str]] = None, start=None, end=None) -> pd.DataFrame:
+        """The fleet's readings as one DataFrame with a turbine_id column; values are copied once."""
+        parts = [pd.DataFrame({"turbine_id": turbine_id, **values}) for turbine_id, values in self.scan(columns, start, end)]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["turbine_id", "timestamp", *(columns or [])])
+
+    def stats(self) -> dict:
+        turbine_ids = self.turbines()
+        opened = [self.open(turbine_id) for turbine_id in turbine_ids]
+        size = sum(path.stat().st_size for path in self.root.rglob("*") if path.is_file()) if turbine_ids else 0
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "turbines": len(turbine_ids), "rows": sum(columns.count for columns in opened), "bytes": size,
+            "unsorted_turbines": [turbine_id for turbine_id, columns in zip(turbine_ids, opened) if not columns.sorted],
+            "pending_turbines": pending, "dtype": self.dtype.name,
+        }
+
+    def stage(self, writes: cache.WriteSet, turbine_ids, timestamps, columns: Mapping[str, np.ndarray]) -> None:
+        """
+        Appends a batch past the committed rows of each of its turbines and notes them in
+        `writes`; `turbine_ids` is one id or an array aligned with the rows.
+        """
+        stamps = pd.Series(np.asarray(timestamps, dtype=object))
+        instants = buckets.utc_instants(stamps).to_numpy()
+        dated = ~np.isnat(instants)
+        ids = np.broadcast_to(np.asarray(turbine_ids, dtype=np.int64), (len(stamps),))[dated]
+        nanos = instants[dated].astype(np.int64)
+        values = {name: np.asarray(column, dtype=np.float64)[dated] for name, column in columns.items()}
+
+        with self._lock:
+            for turbine_id in np.unique(ids).tolist():
+                self._wait_for_publish(writes, turbine_id)
+                rows = np.flatnonzero(ids == turbine_id)
+                rows = rows[np.argsort(nanos[rows], kind="stable")]
+                self._stage_turbine(writes, turbine_id, nanos[rows], {name: column[rows] for name, column in values.items()})
+                writes.staged.add(turbine_id)
+
+    def _wait_for_publish(self, writes: cache.WriteSet, turbine_id: int) -> None:
+        """Called with the lock held: waits until no other thread's write holds the turbine's staged rows."""
+        while True:
+            pending = self._pending.get(turbine_id)
+            if pending is None or pending[0] is writes or pending[3] == threading.get_ident():
+                return
+            remaining = pending[4] + STAGE_WAIT_SECONDS - time.monotonic()
+            if remaining <= 0:
+                return
+            self._lock.wait(remaining)
+
+    def _stage_turbine(self, writes: cache.WriteSet, turbine_id: int, nanos: np.ndarray, values: Mapping[str, np.ndarray]) -> None:
+        directory = self._directory(turbine_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        index = directory / TIMESTAMP_FILE
+        if not index.exists():
+            _write_header(index, TIMESTAMP_DTYPE, 0)
+        _, committed, flags = _read_header(index)
+        owner, start, staged_flags, _, _ = self._pending.get(turbine_id, (writes, committed, flags, 0, 0.0))
+        if owner is writes:
+            flags = staged_flags
+        else:
+            # Whatever another (rolled back) transaction staged is overwritten.
+            start = committed
+
+        last = None
+        if start:
+            with open(index, "rb") as f:
+                f.seek(HEADER.size + (start - 1) * TIMESTAMP_DTYPE.itemsize)
+                last = np.frombuffer(f.read(TIMESTAMP_DTYPE.itemsize), dtype=TIMESTAMP_DTYPE)[0]
+        if last is not None and len(nanos) and nanos[0] < last:
+            flags |= FLAG_UNSORTED
+
+        files = {path.name.rsplit(".", 1)[0]: path for path in directory.iterdir() if path.name != TIMESTAMP_FILE and not path.name.endswith(".tmp")}
+        for name in set(values) - set(files):
+            # A column first seen after other rows exist is back-filled with NaN.
+            files[name] = directory / f"{name}.{self.dtype.kind}{self.dtype.itemsize}"
+            _append(files[name], self.dtype, 0, np.full(start, np.nan))
+        for name, path in files.items():
+            dtype, _, _ = _read_header(path)
+            _append(path, dtype, start, values.get(name, np.full(len(nanos), np.nan)))
+        _append(index, TIMESTAMP_DTYPE, start, nanos)
+        self._pending[turbine_id] = (writes, start + len(nanos), flags, threading.get_ident(), time.monotonic())
+
+    def commit(self, writes: cache.WriteSet) -> None:
+        """Publishes the rows `writes` staged; call once its database transaction has committed."""
+        with self._lock:
+            for turbine_id in writes.staged:
+                owner, count, flags, _, _ = self._pending.get(turbine_id, (None, 0, 0, 0, 0.0))
+                if owner is not writes:
+                    continue
+                del self._pending[turbine_id]
+                directory = self._directory(turbine_id)
+                for path in directory.iterdir():
+                    if path.name != TIMESTAMP_FILE and not path.name.endswith(".tmp"):
+                        _write_header(path, _read_header(path)[0], count)
+                _write_header(directory / TIMESTAMP_FILE, TIMESTAMP_DTYPE, count, flags)
+            self._lock.notify_all()
+
+    def append(self, turbine_ids, timestamps, columns: Mapping[str, np.ndarray]) -> None:
+        """Stages and commits in one step, for writers that are not inside a transaction."""
+        writes = cache.WriteSet()
+        self.stage(writes, turbine_ids, timestamps, columns)
+        self.commit(writes)
+
+    def compact(self, turbine_id: int) -> bool:
+        """
+        Rewrites one turbine's files in timestamp order, restoring zero-copy range slicing.
+        Waits like `stage` for another thread's write to publish; returns False, leaving the
+        files alone, while rows staged for the turbine are still unpublished.
+        """
+        with self._lock:
+            self._wait_for_publish(cache.WriteSet(), turbine_id)
+            if turbine_id in self._pending:
+                return False
+            current = self.open(turbine_id)
+            if current is None or current.sorted:
+                return True
+            order = np.argsort(current.timestamps, kind="stable")
+            directory, count = current.directory, current.count
+            for path in list(directory.iterdir()):
+                if path.name.endswith(".tmp"):
+                    continue
+                dtype, _, _ = _read_header(path)
+                reordered = np.array(_view(path, dtype, count))[order]
+                temporary = path.with_name(path.name + ".tmp")
+                _write_header(temporary, dtype, 0)
+                _append(temporary, dtype, 0, reordered)
+                _write_header(temporary, dtype, count)
+                os.replace(temporary, path)
+            return True
+
+    def backfill(self, db: sqlite3.Connection, metrics: Sequence[str], chunk_size: int = 50_000) -> int:
+        """Appends every stored reading, turbine by turbine in time order; returns the rows read."""
+        loaded = 0
+        cursor = db.execute(
+            f"SELECT turbine_id, timestamp, {', '.join(metrics)} FROM sensor_readings WHERE turbine_id IS NOT NULL ORDER BY turbine_id, timestamp"
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return loaded
+            turbine_ids, stamps, *values = zip(*rows)
+            self.append(np.array(turbine_ids), np.array(stamps, dtype=object), {name: np.array(column, dtype=np.float64) for name, column in zip(metrics, values)})
+            loaded += len(rows)
+
+store = ColumnStore(COLSTORE_ROOT)
+
+def main():
+    from app import database, etl
+
+    parser = argparse.ArgumentParser(description="Load the stored sensor readings into the memory-mapped column store.")
+    parser.add_argument("--database", default=database.DATABASE_PATH, help="Path to the SQLite database")
+    parser.add_argument("--root", type=Path, default=COLSTORE_ROOT, help="Column store directory (should start empty)")
+    parser.add_argument("--float32", action="store_true", help="Store values as float32 instead of float64")
+    parser.add_argument("--compact", action="store_true", help="Re-sort the turbines appended out of order instead of loading (stop the API first)")
+    args = parser.parse_args()
+
+    if args.compact:
+        target = ColumnStore(args.root)
+        unsorted = target.stats()["unsorted_turbines"]
+        for turbine_id in unsorted:
+            target.compact(turbine_id)
+        print(f"Compacted {len(unsorted)} turbines in {args.root}.")
+        return
+
+    conn = sqlite3.connect(args.database)
+    try:
+        loaded = ColumnStore(args.root, np.float32 if args.float32 else np.float64).backfill(conn, etl.REQUIRED_COLUMNS)
+    finally:
+        conn.close()
+    print(f"Loaded {loaded} readings into {args.root}.")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,16 @@
 # app/database.py
 
+import queue
 import sqlite3
+import threading
+import time
+from fastapi import HTTPException
 from sqlalchemy import create_engine
 from pathlib import Path
+from typing import List
+from app import buckets, rollups
+from app.etl import REQUIRED_COLUMNS
+from app.migrations import run_migrations
 
 # --- Database Setup (Modified) ---
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -11,10 +19,155 @@ DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 
+# --- Connection Pool ---
+POOL_SIZE = 8
+POOL_TIMEOUT_SECONDS = 10.0
+
+# Applied once per physical connection. WAL lets readers proceed while a writer commits,
+# synchronous=NORMAL is durable in WAL mode except on power loss, and the mmap/page cache
+# settings keep hot pages warm across requests since connections are reused.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA busy_timeout = 5000",
+)
+
+class PoolTimeout(Exception):
+    pass
+
+class ConnectionPool:
+    """
+    Bounded pool of tuned sqlite3 connections shared by the threadpool workers that run
+    sync endpoints. Connections are created lazily up to `max_size` and handed out LIFO
+    so the most recently used (warmest) connection is reused first.
+    """
+
+    def __init__(self, path, max_size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT_SECONDS):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._acquired = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_seconds = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._created < self.max_size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                started = time.perf_counter()
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolTimeout(f"No database connection available within {self.timeout}s")
+                with self._lock:
+                    self._waits += 1
+                    self._wait_seconds += time.perf_counter() - started
+        with self._lock:
+            self._in_use += 1
+            self._acquired += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        # A request that failed mid-transaction must not leak its writes into the next user.
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "connections": self._created,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "acquisitions": self._acquired,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": (self._wait_seconds / self._waits * 1000) if self._waits else 0.0,
+            }
+
+pool = ConnectionPool(DATABASE_PATH)
+
 def get_db():
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    try:
+        conn = pool.acquire()
+    except PoolTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
     try:
         yield conn
     finally:
-        conn.close()
\ No newline at end of file
+        pool.release(conn)
+
+REBUILDS = {"turbine_rollups": rollups.rebuild, "reading_buckets": buckets.rebuild}
+
+def rebuild_pending(conn: sqlite3.Connection) -> List[str]:
+    """
+    Fills the derived tables migrations queued in pending_rebuilds from the readings, with
+    the current code, in one transaction that also clears the queue. Returns their names.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pending_rebuilds'").fetchone() is None:
+        return []
+    tables = [row[0] for row in conn.execute("SELECT table_name FROM pending_rebuilds ORDER BY table_name")]
+    present = {row[1] for row in conn.execute("PRAGMA table_xinfo(sensor_readings)")}
+    try:
+        for table in tables:
+            REBUILDS[table](conn, [col for col in REQUIRED_COLUMNS if col in present])
+        conn.execute("DELETE FROM pending_rebuilds")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return tables
+
+def init_db() -> int:
+    """Brings the database schema up to date and fills the tables it queued for rebuilding; called once from the app lifespan."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        version = run_migrations(conn)
+        rebuild_pending(conn)
+        return version
+    finally:
+        conn.close()
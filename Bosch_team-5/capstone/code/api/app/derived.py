@@ -0,0 +1,120 @@
+# app/derived.py
+
+from typing import Dict, Mapping, Optional
+import numpy as np
+import pandas as pd
+
+GAMMA = 1.4
+KELVIN_OFFSET = 273.15
+ISENTROPIC_EXPONENT = (GAMMA - 1) / GAMMA
+RAD_PER_SEC_PER_RPM = 2 * np.pi / 60
+
+BASE_INPUTS = ("p1", "p2", "t1", "t2", "t48", "p48", "ts", "tp", "gtn", "ggn", "gtt", "mf", "decay_coeff_comp", "decay_coeff_turbine")
+
+DERIVED_METRICS = (
+    "pressure_ratio", "compressor_efficiency", "thermal_efficiency",
+    "temp_ratio_t48_p48", "temp_ratio_t1_p1", "temp_ratio_t2_p2",
+    "torque_diff", "rpm_ratio_gtn_ggn", "fuel_per_rpm", "total_prop_torque",
+    "power_proxy_kw", "total_decay_score",
+)
+
+# The same metrics as SQL over sensor_readings columns, in the kernel's order of operations.
+# SQLite yields NULL where NumPy yields NaN or ±inf (x/0, pow of a negative base), which the
+# kernel turns into NaN as well.
+# 1.0 * keeps division real for columns that hold integers; pow() needs SQLite's math functions.
+_ISENTROPIC_SQL = f"pow(1.0 * p2 / p1, {ISENTROPIC_EXPONENT!r})"
+SQL_EXPRESSIONS = {
+    "pressure_ratio": "(1.0 * p2 / p1)",
+    "compressor_efficiency": f"(({_ISENTROPIC_SQL} - 1.0) * (t1 + {KELVIN_OFFSET!r}) / (t2 - t1) * 100.0)",
+    # NumPy's p2 / 0 is ±inf, whose isentropic term is +inf and efficiency exactly 100.
+    "thermal_efficiency": f"(CASE WHEN p1 = 0 AND p2 <> 0 THEN 100.0 ELSE (1.0 - 1.0 / {_ISENTROPIC_SQL}) * 100.0 END)",
+    "temp_ratio_t48_p48": "(1.0 * t48 / p48)",
+    "temp_ratio_t1_p1": "(1.0 * t1 / p1)",
+    "temp_ratio_t2_p2": "(1.0 * t2 / p2)",
+    "torque_diff": "(ts - tp)",
+    "rpm_ratio_gtn_ggn": "(1.0 * gtn / ggn)",
+    "fuel_per_rpm": "(1.0 * mf / gtn)",
+    "total_prop_torque": "(ts + tp)",
+    "power_proxy_kw": f"(gtt * gtn * {RAD_PER_SEC_PER_RPM!r})",
+    "total_decay_score": "((1.0 - decay_coeff_comp) + (1.0 - decay_coeff_turbine))",
+}
+
+def allocate(n: int) -> Dict[str, np.ndarray]:
+    """Preallocated output buffers for `compute_derived(..., out=...)`, reusable across batches of size n."""
+    return {name: np.empty(n, dtype=np.float64) for name in DERIVED_METRICS}
+
+def compute_derived(columns: Mapping[str, np.ndarray], out: Optional[Dict[str, np.ndarray]] = None, finite: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Computes every derived turbine metric in one pass over the base columns.
+
+    Inputs are coerced to contiguous float64 arrays (a no-op for columns that already are).
+    All arithmetic writes into the output buffers; the few intermediates (the isentropic
+    term pressure_ratio**((gamma-1)/gamma), T1 in Kelvin, T2-T1, 1-decay) are staged in
+    output buffers that are filled afterwards, so no temporaries are allocated. The
+    isentropic term is computed once and shared by both efficiencies. Division by zero yields
+    NaN rather than ±inf when `finite` is set, matching what the report endpoints expect.
+    A missing input column reads as NaN, so only the metrics that depend on it are undefined.
+    """
+    n = len(next(iter(columns.values())))
+    c = {
+        name: np.ascontiguousarray(columns[name], dtype=np.float64) if name in columns else np.full(n, np.nan)
+        for name in BASE_INPUTS
+    }
+    if out is None:
+        out = allocate(n)
+
+    pr, comp_eff, therm_eff = out["pressure_ratio"], out["compressor_efficiency"], out["thermal_efficiency"]
+    torque_diff, fuel_per_rpm = out["torque_diff"], out["fuel_per_rpm"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(c["p2"], c["p1"], out=pr)
+
+        # therm_eff holds x = pr ** ((gamma - 1) / gamma) until the end of this block.
+        np.power(pr, ISENTROPIC_EXPONENT, out=therm_eff)
+
+        # Compressor efficiency = T1k * (x - 1) / (T2k - T1k) * 100; T2k - T1k == T2 - T1.
+        np.subtract(therm_eff, 1.0, out=comp_eff)
+        np.add(c["t1"], KELVIN_OFFSET, out=torque_diff)
+        comp_eff *= torque_diff
+        np.subtract(c["t2"], c["t1"], out=torque_diff)
+        comp_eff /= torque_diff
+        comp_eff *= 100.0
+
+        # Thermal efficiency = (1 - 1 / x) * 100, in place over x.
+        np.reciprocal(therm_eff, out=therm_eff)
+        np.subtract(1.0, therm_eff, out=therm_eff)
+        therm_eff *= 100.0
+
+        np.divide(c["t48"], c["p48"], out=out["temp_ratio_t48_p48"])
+        np.divide(c["t1"], c["p1"], out=out["temp_ratio_t1_p1"])
+        np.divide(c["t2"], c["p2"], out=out["temp_ratio_t2_p2"])
+        np.subtract(c["ts"], c["tp"], out=torque_diff)
+        np.divide(c["gtn"], c["ggn"], out=out["rpm_ratio_gtn_ggn"])
+        np.add(c["ts"], c["tp"], out=out["total_prop_torque"])
+
+        np.multiply(c["gtt"], c["gtn"], out=out["power_proxy_kw"])
+        out["power_proxy_kw"] *= RAD_PER_SEC_PER_RPM
+
+        # (1 - comp decay) + (1 - turbine decay), staging the second term in fuel_per_rpm.
+        decay = out["total_decay_score"]
+        np.subtract(1.0, c["decay_coeff_comp"], out=decay)
+        np.subtract(1.0, c["decay_coeff_turbine"], out=fuel_per_rpm)
+        decay += fuel_per_rpm
+
+        np.divide(c["mf"], c["gtn"], out=fuel_per_rpm)
+
+    if finite:
+        for buffer in out.values():
+            np.copyto(buffer, np.nan, where=np.isinf(buffer))
+    return out
+
+def derive_row(reading: Mapping[str, float]) -> Dict[str, float]:
+    """Row-wise entry point for single readings: same kernel, one-element arrays."""
+    derived = compute_derived({name: np.array([reading[name]], dtype=np.float64) for name in BASE_INPUTS})
+    return {name: float(values[0]) for name, values in derived.items()}
+
+def add_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Column-wise entry point: appends every derived metric to a frame of readings, in place."""
+    for name, values in compute_derived({name: df[name].to_numpy() for name in BASE_INPUTS}).items():
+        df[name] = values
+    return df
@@ -0,0 +1,323 @@
+# app/drift.py
+
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+import numpy as np
+import pandas as pd
+from app import cache, derived
+
+# Slowly degrading signals, where a drift matters more than any fixed threshold.
+DRIFT_METRICS = ["decay_coeff_comp", "decay_coeff_turbine", "pressure_ratio"]
+EWMA_ALPHA = 0.01
+# Readings a metric's baseline needs before they are scored.
+WARMUP_READINGS = 50
+Z_LIMIT = 4.0
+CUSUM_SLACK = 0.5
+# With the slack, about 10,000 in-control readings between false alarms per side.
+CUSUM_LIMIT = 8.0
+# Keeps a perfectly flat baseline from turning the first tiny change into a huge z-score.
+STD_FLOOR_RATIO = 1e-3
+PERSIST_INTERVAL_SECONDS = 30.0
+# A committed write makes its states current within moments; a turbine another thread's
+# write still holds after this long belongs to a transaction that rolled back.
+COMMIT_WAIT_SECONDS = 10.0
+
+OUTLIER = ("Statistical Outlier", "Medium")
+UPWARD_DRIFT = ("Upward Drift", "High")
+DOWNWARD_DRIFT = ("Downward Drift", "High")
+
+class DriftState:
+    """
+    One turbine's detector state, one entry per DRIFT_METRICS: how many readings were seen,
+    their EWMA mean and variance (both started at zero; see _unbiased), and both sides of a CUSUM over the z-scores. Each CUSUM is
+    kept as its cumulative sum `c` and running minimum `m` (Lindley's form: the statistic is
+    c - m), so a batch is a cumsum and a minimum.accumulate rather than a loop. `outside`
+    and the latches remember an alert that is still open, so a persisting excursion raises
+    one alert rather than one per reading.
+    """
+
+    FIELDS = ["count", "mean", "var", "c_high", "m_high", "c_low", "m_low", "outside", "high_latched", "low_latched"]
+
+    def __init__(self, metrics: int = len(DRIFT_METRICS)):
+        self.count = np.zeros(metrics, dtype=np.int64)
+        self.mean = np.zeros(metrics)
+        self.var = np.zeros(metrics)
+        self.c_high, self.m_high = np.zeros(metrics), np.zeros(metrics)
+        self.c_low, self.m_low = np.zeros(metrics), np.zeros(metrics)
+        self.outside = np.zeros(metrics, dtype=bool)
+        self.high_latched = np.zeros(metrics, dtype=bool)
+        self.low_latched = np.zeros(metrics, dtype=bool)
+
+    def snapshot(self) -> Dict[str, dict]:
+        mean = _unbiased(self.mean, self.count)
+        std = np.sqrt(_unbiased(self.var, np.maximum(self.count - 1, 0)))
+        return {
+            metric: {
+                "count": int(self.count[i]),
+                "mean": None if np.isnan(mean[i]) else float(mean[i]),
+                "std": None if np.isnan(std[i]) else float(std[i]),
+                "cusum_high": float(self.c_high[i] - self.m_high[i]),
+                "cusum_low": float(self.c_low[i] - self.m_low[i]),
+                "outlier_open": bool(self.outside[i]),
+                "drift_open": bool(self.high_latched[i] or self.low_latched[i]),
+            }
+            for i, metric in enumerate(DRIFT_METRICS)
+        }
+
+def _ewm(seed: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # pandas' adjust=False recurrence is applied row by row, so seeding it with the previous
+    # level gives the same floats however the rows are split into calls.
+    frame = pd.DataFrame(np.vstack([seed, values]))
+    return frame.ewm(alpha=EWMA_ALPHA, adjust=False, ignore_na=True).mean().to_numpy()[1:]
+
+def _unbiased(level: np.ndarray, updates: np.ndarray) -> np.ndarray:
+    """
+    An EWMA that started at zero, divided by the weight its `updates` have had so far, so a
+    young baseline is not pulled towards zero (NaN before the first update).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(updates > 0, level / (1 - (1 - EWMA_ALPHA) ** updates), np.nan)
+
+def _shifted(initial: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Each row's value before that row: `initial`, then every row but the last."""
+    return np.vstack([initial, rows[:-1]])
+
+def _held(events: np.ndarray, values: np.ndarray, initial: np.ndarray) -> np.ndarray:
+    """A flag after each row: the value of the last row with an event, else `initial`."""
+    rows = np.arange(len(events))[:, None]
+    last = np.maximum.accumulate(np.where(events, rows, -1), axis=0)
+    columns = np.broadcast_to(np.arange(events.shape[1]), events.shape)
+    return np.where(last >= 0, values[np.maximum(last, 0), columns], initial)
+
+def _cusum(state_c: np.ndarray, state_m: np.ndarray, steps: np.ndarray):
+    c = np.cumsum(np.vstack([state_c, steps]), axis=0)
+    m = np.minimum.accumulate(np.vstack([state_m, c[1:]]), axis=0)
+    return c[1:], m[1:]
+
+def score(state: DriftState, values: np.ndarray):
+    """
+    Scores a rows x DRIFT_METRICS matrix, in order, against `state`. Returns the state after
+    the last row and, per detector, a rows x metrics mask of the rows that raise an alert,
+    along with the baselines and statistics the alerts report. Readings are scored against
+    the baseline of the readings before them; NaN readings are skipped.
+
+    A single reading costs O(1), and every row is computed with the same float operations
+    whether the rows arrive one by one or as one batch, so both give identical results.
+    """
+    present = ~np.isnan(values)
+    counts = np.cumsum(present, axis=0) + state.count
+    before = counts - present
+    means = _ewm(state.mean, values)
+    baseline = _unbiased(_shifted(state.mean, means), before)
+    deviation = values - baseline
+    variances = _ewm(state.var, deviation ** 2)
+    # A reading's deviation is only defined once there is a baseline, so the variance has
+    # had one update fewer than the mean.
+    spread = _unbiased(_shifted(state.var, variances), np.maximum(before - 1, 0))
+    std = np.maximum(np.sqrt(spread), STD_FLOOR_RATIO * np.abs(baseline))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = deviation / std
+    scored = present & (before >= WARMUP_READINGS) & np.isfinite(z)
+    z = np.where(scored, z, 0.0)
+
+    outside = scored & (np.abs(z) > Z_LIMIT)
+    outside_after = _held(scored, outside, state.outside)
+    outliers = outside & ~_shifted(state.outside, outside_after)
+
+    new = DriftState(values.shape[1])
+    new.count, new.mean, new.var, new.outside = counts[-1], means[-1], variances[-1], outside_after[-1]
+    drifts, statistics = [], []
+    # Capped at the outlier limit, so a single spike is reported as an outlier, not a drift.
+    capped = np.clip(z, -Z_LIMIT, Z_LIMIT)
+    for side, sign in (("high", 1.0), ("low", -1.0)):
+        c, m = _cusum(getattr(state, f"c_{side}"), getattr(state, f"m_{side}"), np.where(scored, sign * capped - CUSUM_SLACK, 0.0))
+        statistic = c - m
+        above = statistic > CUSUM_LIMIT
+        # An alarm stays open until the statistic falls back to zero.
+        latched = _held(above | (statistic == 0), above, getattr(state, f"{side}_latched"))
+        drifts.append(above & ~_shifted(getattr(state, f"{side}_latched"), latched))
+        statistics.append(statistic)
+        setattr(new, f"c_{side}", c[-1])
+        setattr(new, f"m_{side}", m[-1])
+        setattr(new, f"{side}_latched", latched[-1])
+    return new, {"outliers": outliers, "upward": drifts[0], "downward": drifts[1], "baseline": baseline, "z": z, "cusum_high": statistics[0], "cusum_low": statistics[1]}
+
+def metric_matrix(columns: Mapping[str, np.ndarray]) -> np.ndarray:
+    """The DRIFT_METRICS of a batch of readings, as a rows x metrics matrix."""
+    values = {name: np.asarray(columns[name], dtype=np.float64) for name in DRIFT_METRICS if name in columns}
+    missing = [name for name in DRIFT_METRICS if name not in values]
+    if missing:
+        extra = derived.compute_derived(columns)
+        values.update({name: extra[name] for name in missing})
+    return np.column_stack([values[name] for name in DRIFT_METRICS])
+
+def alert_rows(turbine_id: int, timestamps: np.ndarray, values: np.ndarray, result: dict) -> List[tuple]:
+    """ALERT_COLUMNS tuples for the rows `score` flagged, in row order."""
+    found = []
+    for kind, (alert_type, severity) in (("outliers", OUTLIER), ("upward", UPWARD_DRIFT), ("downward", DOWNWARD_DRIFT)):
+        for row, col in zip(*np.nonzero(result[kind])):
+            metric, value, baseline = DRIFT_METRICS[col], float(values[row, col]), float(result["baseline"][row, col])
+            if kind == "outliers":
+                description = f"{metric}={value:.4f} is {result['z'][row, col]:+.1f} standard deviations from its EWMA baseline {baseline:.4f}"
+            else:
+                statistic = result["cusum_high" if kind == "upward" else "cusum_low"][row, col]
+                description = f"{metric} is drifting {'above' if kind == 'upward' else 'below'} its EWMA baseline {baseline:.4f} (CUSUM {statistic:.2f} > {CUSUM_LIMIT:g})"
+            found.append((row, col, (turbine_id, str(timestamps[row]), metric, alert_type, severity, value, baseline, description)))
+    found.sort(key=lambda item: item[:2])
+    return [alert for _, _, alert in found]
+
+# --- Per-turbine persisted state (drift_state table) ---
+
+def load_state(db: sqlite3.Connection, turbine_id: int) -> DriftState:
+    state = DriftState()
+    rows = db.execute(f"SELECT metric, {', '.join(DriftState.FIELDS)} FROM drift_state WHERE turbine_id = ?", (turbine_id,)).fetchall()
+    for row in rows:
+        if row[0] not in DRIFT_METRICS:
+            continue
+        i = DRIFT_METRICS.index(row[0])
+        for field, value in zip(DriftState.FIELDS, row[1:]):
+            # SQLite stores NaN as NULL.
+            getattr(state, field)[i] = np.nan if value is None else value
+    return state
+
+def save_states(db: sqlite3.Connection, states: Mapping[int, DriftState]):
+    """Persists detector states (in the caller's transaction)."""
+    updated_at = datetime.now().isoformat()
+    db.executemany(
+        f"""
+        INSERT INTO drift_state (turbine_id, metric, {', '.join(DriftState.FIELDS)}, updated_at) VALUES ({', '.join('?' for _ in range(len(DriftState.FIELDS) + 3))})
+        ON CONFLICT (turbine_id, metric) DO UPDATE SET {', '.join(f'{field} = excluded.{field}' for field in DriftState.FIELDS)}, updated_at = excluded.updated_at
+        """,
+        [
+            (turbine_id, metric, *(getattr(state, field)[i].item() for field in DriftState.FIELDS), updated_at)
+            for turbine_id, state in states.items() for i, metric in enumerate(DRIFT_METRICS)
+        ]
+    )
+
+class DriftMonitor:
+    """
+    Online drift detection over DRIFT_METRICS for every turbine: each reading is scored
+    against an EWMA baseline of the turbine's earlier readings, and raises an alert when its
+    z-score leaves +/-Z_LIMIT or when a CUSUM of the z-scores passes CUSUM_LIMIT.
+
+    States live in memory. A write's new states travel in its cache.WriteSet and replace
+    the committed ones in `commit`, so a rolled-back write leaves no trace and a streaming
+    upload's chunks build on each other. Changed states are saved to drift_state inside a
+    write's transaction at most every `persist_interval` seconds, and on `save`.
+
+    Every reading must build on the ones before it, so a turbine is held by the write that
+    scored it until that write's `commit`: a write on another thread waits for it (up to
+    COMMIT_WAIT_SECONDS, after which it is taken to have rolled back) rather than scoring
+    from the same committed state and losing the first write's readings. A thread's own
+    uncommitted hold is from a write that rolled back, as a thread runs one at a time.
+    """
+
+    def __init__(self, persist_interval: float = PERSIST_INTERVAL_SECONDS):
+        self.persist_interval = persist_interval
+        self._states: Dict[int, DriftState] = {}
+        self._dirty: Set[int] = set()
+        self._saved_at = time.monotonic()
+        self._lock = threading.Condition()
+        # turbine_id -> (WriteSet holding it, its thread, when it last scored the turbine)
+        self._held: Dict[int, Tuple[cache.WriteSet, int, float]] = {}
+        self._scored = self._alerts = self._saves = 0
+
+    def _committed(self, db: sqlite3.Connection, turbine_id: int) -> DriftState:
+        with self._lock:
+            state = self._states.get(turbine_id)
+        if state is None:
+            state = load_state(db, turbine_id)
+            with self._lock:
+                state = self._states.setdefault(turbine_id, state)
+        return state
+
+    def _hold(self, writes: cache.WriteSet, turbine_id: int) -> None:
+        """Waits until no other thread's uncommitted write holds the turbine, then holds it for `writes`."""
+        with self._lock:
+            while True:
+                held = self._held.get(turbine_id)
+                if held is None or held[0] is writes or held[1] == threading.get_ident():
+                    break
+                remaining = held[2] + COMMIT_WAIT_SECONDS - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._lock.wait(remaining)
+            self._held[turbine_id] = (writes, threading.get_ident(), time.monotonic())
+
+    def evaluate(self, db: sqlite3.Connection, columns: Mapping[str, np.ndarray], timestamps: np.ndarray, turbine_ids, writes: cache.WriteSet, counts: Optional[np.ndarray] = None) -> List[tuple]:
+        """
+        Alert tuples for a batch of readings, in the caller's transaction; `turbine_ids` is one
+        id or an array aligned with the rows, whose order is the readings' order. If given,
+        `counts` is incremented per alert, as in RuleSet.evaluate.
+        """
+        values = metric_matrix(columns)
+        timestamps = np.asarray(timestamps)
+        ids = np.broadcast_to(np.asarray(turbine_ids, dtype=np.int64), (len(values),))
+        found: List[tuple] = []
+        for turbine_id in np.unique(ids).tolist():
+            self._hold(writes, turbine_id)
+            rows = np.flatnonzero(ids == turbine_id)
+            state = writes.drift.get(turbine_id) or self._committed(db, turbine_id)
+            writes.drift[turbine_id], result = score(state, values[rows])
+            alerts = alert_rows(turbine_id, timestamps[rows], values[rows], result)
+            if counts is not None:
+                np.add.at(counts, rows, (result["outliers"].sum(axis=1) + result["upward"].sum(axis=1) + result["downward"].sum(axis=1)))
+            found.extend(alerts)
+        with self._lock:
+            self._scored += len(values)
+            self._alerts += len(found)
+            due = time.monotonic() - self._saved_at >= self.persist_interval
+            dirty = {turbine_id: self._states[turbine_id] for turbine_id in self._dirty if turbine_id not in writes.drift}
+        if due and writes.drift:
+            states = {**dirty, **writes.drift}
+            save_states(db, states)
+            writes.drift_saved = states
+        return found
+
+    def commit(self, writes: cache.WriteSet) -> None:
+        """Makes the states `writes` carries current; call once its transaction has committed."""
+        with self._lock:
+            self._states.update(writes.drift)
+            self._dirty.update(writes.drift)
+            for turbine_id in writes.drift:
+                if self._held.get(turbine_id, (None,))[0] is writes:
+                    del self._held[turbine_id]
+            self._lock.notify_all()
+            if writes.drift_saved:
+                self._dirty.difference_update(turbine_id for turbine_id, state in writes.drift_saved.items() if self._states.get(turbine_id) is state)
+                self._saved_at = time.monotonic()
+                self._saves += 1
+
+    def save(self, db: sqlite3.Connection) -> int:
+        """Saves and commits every changed state, e.g. at shutdown. Returns how many turbines were saved."""
+        with self._lock:
+            states = {turbine_id: self._states[turbine_id] for turbine_id in self._dirty}
+        if states:
+            save_states(db, states)
+            db.commit()
+        with self._lock:
+            self._dirty.difference_update(turbine_id for turbine_id, state in states.items() if self._states.get(turbine_id) is state)
+            self._saved_at = time.monotonic()
+            self._saves += 1
+        return len(states)
+
+    def state(self, turbine_id: int) -> Optional[DriftState]:
+        with self._lock:
+            return self._states.get(turbine_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "metrics": DRIFT_METRICS,
+                "turbines": len(self._states),
+                "unsaved_turbines": len(self._dirty),
+                "readings_scored": self._scored,
+                "alerts": self._alerts,
+                "saves": self._saves,
+                "persist_interval_seconds": self.persist_interval,
+            }
+
+monitor = DriftMonitor()
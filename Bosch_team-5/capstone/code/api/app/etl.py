@@ -0,0 +1,282 @@
+# app/etl.py
+
+import operator
+import sqlite3
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from app import alert_stream, alerts, buckets, cache, colstore, drift, rollups, smoothing
+from app.sketch import KLLSketch, load_sketches, save_sketches
+
+COLUMN_MAPPING = {
+    "lever position (lp)": "lp", "ship speed (v) [knots]": "v", "gas turbine shaft torque (gtt) [kn/m]": "gtt",
+    "gas turbine revolutions (gtn) [rpm]": "gtn", "gas generator revolutions (ggn) [rpm]": "ggn",
+    "starboard propeller torque (ts) [kn/m]": "ts", "port propeller torque (tp) [kn/m]": "tp",
+    "hp turbine exit temperature (t48) [°c]": "t48", "compressor inlet air temperature (t1) [°c]": "t1",
+    "compressor outlet air temperature (t2) [°c]": "t2", "hp turbine exit pressure (p48) [bar]": "p48",
+    "compressor inlet air pressure (p1) [bar]": "p1", "compressor outlet air pressure (p2) [bar]": "p2",
+    "exhaust gas pressure [bar]": "pexh", "turbine injection control (tic) [%]": "tic",
+    "fuel flow (mf) [kg/s]": "mf", "compressor decay coefficient": "decay_coeff_comp",
+    "turbine decay coefficient": "decay_coeff_turbine"
+}
+REQUIRED_COLUMNS = list(COLUMN_MAPPING.values())
+READING_FIELDS = operator.attrgetter(*REQUIRED_COLUMNS)
+
+SMOOTHING_WINDOW = 3
+SMOOTHING_KIND = "sma"
+DEFAULT_CHUNK_SIZE = 50_000
+# Normalized rank error of the streaming quartile estimates used for IQR clipping.
+SKETCH_RANK_ERROR = 0.005
+CLIP_REFERENCES = ("upload", "history")
+
+class CsvFormatError(ValueError):
+    pass
+
+def normalize_column_name(name: str) -> str:
+    name = name.lower().strip()
+    return COLUMN_MAPPING.get(name, name)
+
+def missing_columns(columns) -> List[str]:
+    return [col for col in REQUIRED_COLUMNS if col not in columns]
+
+def iqr_bounds(df: pd.DataFrame, columns: List[str]) -> Dict[str, Tuple[float, float]]:
+    bounds = {}
+    for col in columns:
+        Q1, Q3 = df[col].quantile(0.25), df[col].quantile(0.75)
+        IQR = Q3 - Q1
+        bounds[col] = (Q1 - 1.5 * IQR, Q3 + 1.5 * IQR)
+    return bounds
+
+def sketch_bounds(sketches: Dict[str, KLLSketch]) -> Dict[str, Tuple[float, float]]:
+    return {col: sketch.iqr_bounds() for col, sketch in sketches.items()}
+
+def new_sketch() -> KLLSketch:
+    return KLLSketch.for_error(SKETCH_RANK_ERROR)
+
+def merge_history(db: sqlite3.Connection, turbine_id: int, sketches: Dict[str, KLLSketch]) -> Dict[str, KLLSketch]:
+    """This upload's column sketches merged into the turbine's persisted ones, without saving them."""
+    history = load_sketches(db, turbine_id)
+    merged = {}
+    for col, sketch in sketches.items():
+        base = history.get(col)
+        merged[col] = (base if base is not None else new_sketch()).merge(sketch)
+    return merged
+
+def fold_into_history(db: sqlite3.Connection, turbine_id: int, sketches: Dict[str, KLLSketch]) -> Dict[str, KLLSketch]:
+    """
+    Merges this upload's column sketches into the turbine's persisted ones (in the caller's
+    transaction) and returns the merged sketches.
+    """
+    merged = merge_history(db, turbine_id, sketches)
+    save_sketches(db, turbine_id, merged)
+    return merged
+
+def load_smoother(db: sqlite3.Connection, turbine_id: int, kind: Optional[str] = SMOOTHING_KIND) -> smoothing.Smoother:
+    """The turbine's smoother over REQUIRED_COLUMNS, resumed where its last write left off."""
+    return smoothing.load_smoother(db, turbine_id, REQUIRED_COLUMNS, kind, SMOOTHING_WINDOW)
+
+def save_smoother(db: sqlite3.Connection, turbine_id: int, smoother: smoothing.Smoother):
+    smoothing.save_smoother(db, turbine_id, REQUIRED_COLUMNS, smoother)
+
+def advance_smoothers(db: sqlite3.Connection, columns: Dict[str, np.ndarray], turbine_ids) -> None:
+    """
+    Carries each turbine's persisted smoother over readings that are stored as sent (single
+    readings, batches, streams), in the caller's transaction, so the next upload's window
+    continues from them. The kind the state was saved with is kept.
+    """
+    matrix = np.column_stack([np.asarray(columns[col], dtype=np.float64) for col in REQUIRED_COLUMNS])
+    ids = np.broadcast_to(np.asarray(turbine_ids, dtype=np.int64), (len(matrix),))
+    for turbine_id in np.unique(ids).tolist():
+        smoother = load_smoother(db, turbine_id, None)
+        smoother.apply(matrix[ids == turbine_id])
+        save_smoother(db, turbine_id, smoother)
+
+def check_readings(db: sqlite3.Connection, columns: Dict[str, np.ndarray], timestamps: np.ndarray, turbine_ids, writes: cache.WriteSet,
+                   ruleset: Optional[alerts.RuleSet] = None, counts: Optional[np.ndarray] = None) -> List[tuple]:
+    """
+    Alerts for a batch of readings, in the caller's transaction: the threshold rules' first,
+    then the drift detectors', whose advanced state `writes` carries to `after_commit`.
+    """
+    ruleset = ruleset if ruleset is not None else alerts.registry.rules(db)
+    return ruleset.evaluate(columns, timestamps, turbine_ids, counts) + drift.monitor.evaluate(db, columns, timestamps, turbine_ids, writes, counts)
+
+def detect_alerts(df: pd.DataFrame, turbine_id: int, ruleset: alerts.RuleSet) -> List[tuple]:
+    """Applies the alert rules to a cleaned frame and returns rows shaped for the alerts table."""
+    columns = {col: df[col].to_numpy() for col in REQUIRED_COLUMNS}
+    return ruleset.evaluate(columns, df['timestamp'].astype(str).to_numpy(), turbine_id)
+
+def detect_drift(db: sqlite3.Connection, df: pd.DataFrame, unsmoothed: pd.DataFrame, turbine_id: int, writes: cache.WriteSet) -> List[tuple]:
+    """
+    Runs the drift detectors over a cleaned frame and returns rows shaped for the alerts table.
+    They score `unsmoothed`, the same rows before clipping and smoothing: a rolling mean
+    correlates neighbouring readings, and the CUSUM assumes they are not.
+    """
+    columns = {col: unsmoothed[col].to_numpy() for col in REQUIRED_COLUMNS}
+    return drift.monitor.evaluate(db, columns, df['timestamp'].astype(str).to_numpy(), turbine_id, writes)
+
+def insert_readings(db: sqlite3.Connection, df: pd.DataFrame, turbine_id: int, writes: Optional[cache.WriteSet] = None) -> int:
+    """
+    Inserts cleaned readings and folds them into the rollups and buckets, in the caller's
+    transaction. `writes`, if given, collects what was touched for `after_commit` and stages
+    the readings in the column store.
+    """
+    new_turbine = writes is not None and not rollups.has_turbine(db, turbine_id)
+    columns = ['timestamp'] + REQUIRED_COLUMNS + ['turbine_id']
+    placeholders = ', '.join('?' for _ in columns)
+    rows = df[['timestamp'] + REQUIRED_COLUMNS].itertuples(index=False, name=None)
+    db.executemany(
+        f"INSERT INTO sensor_readings ({', '.join(columns)}) VALUES ({placeholders})",
+        (row + (turbine_id,) for row in rows)
+    )
+    values = {col: df[col].to_numpy() for col in REQUIRED_COLUMNS}
+    rollups.record(db, values, turbine_id)
+    span = buckets.record(db, values, df['timestamp'].to_numpy(), turbine_id)
+    if writes is not None:
+        writes.add(turbine_id, span, new_turbine)
+        colstore.store.stage(writes, turbine_id, df['timestamp'].to_numpy(), values)
+    return len(df)
+
+def reading_arrays(readings: Sequence) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Column arrays and ISO timestamps for validated TurbineReadingCreate models."""
+    matrix = np.array([READING_FIELDS(reading) for reading in readings], dtype=np.float64).reshape(len(readings), len(REQUIRED_COLUMNS))
+    columns = {col: matrix[:, i] for i, col in enumerate(REQUIRED_COLUMNS)}
+    return columns, np.array([reading.timestamp.isoformat() for reading in readings])
+
+def insert_reading_batch(db: sqlite3.Connection, columns: Dict[str, np.ndarray], timestamps: np.ndarray, turbine_ids: np.ndarray, writes: Optional[cache.WriteSet] = None) -> List[int]:
+    """
+    Inserts readings for any mix of turbines with one executemany and folds them into the
+    rollups, buckets and smoothing state, in the caller's transaction. Returns the ids of the
+    new rows, in order: rowids are max(id) + 1 onwards, and the transaction holds SQLite's
+    write lock.
+    """
+    distinct = np.unique(turbine_ids).tolist()
+    new_turbines = {turbine_id for turbine_id in distinct if writes is not None and not rollups.has_turbine(db, turbine_id)}
+    names = ['timestamp'] + REQUIRED_COLUMNS + ['turbine_id']
+    values = np.column_stack([columns[col] for col in REQUIRED_COLUMNS]).tolist()
+    db.executemany(
+        f"INSERT INTO sensor_readings ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+        ((timestamp, *row, turbine_id) for timestamp, row, turbine_id in zip(timestamps.tolist(), values, turbine_ids.tolist()))
+    )
+    last_id = db.execute("SELECT max(id) FROM sensor_readings").fetchone()[0]
+    rollups.record(db, columns, turbine_ids)
+    advance_smoothers(db, columns, turbine_ids)
+    for turbine_id in distinct:
+        rows = turbine_ids == turbine_id
+        span = buckets.record(db, {col: column[rows] for col, column in columns.items()}, timestamps[rows], turbine_id)
+        if writes is not None:
+            writes.add(turbine_id, span, turbine_id in new_turbines)
+    if writes is not None:
+        colstore.store.stage(writes, turbine_ids, timestamps, columns)
+    return list(range(last_id - len(values) + 1, last_id + 1))
+
+def after_commit(writes: cache.WriteSet) -> None:
+    """
+    Invalidates the cached responses a committed write affected, publishes its staged columns
+    and drift detector states, and pushes its alerts to stream subscribers.
+    """
+    cache.response_cache.invalidate(writes)
+    colstore.store.commit(writes)
+    drift.monitor.commit(writes)
+    alert_stream.hub.publish(writes.alerts)
+
+class StreamingCsvIngestor:
+    """
+    Cleans, smooths, checks and inserts an uploaded CSV one chunk at a time, so peak memory
+    depends on `chunk_size` rather than on the file size. The spooled upload is read twice:
+
+      1. `sketch` feeds every required column into a KLL quantile sketch, giving the fill
+         values (medians) and IQR clip bounds for the whole upload in O(k) memory, and
+         rejects a malformed file before anything is written;
+      2. `chunks` cleans each chunk against those fixed limits and smooths it with the
+         turbine's smoother, which carries its window from chunk to chunk and from the
+         turbine's previous upload, so the rolling mean does not restart at chunk or file
+         boundaries.
+
+    Only `prepare` and `load` touch the database, so a caller can run the parsing elsewhere
+    and hold the writer connection for one chunk's insert at a time. Each `load` commits
+    its chunk with the smoother's state after it; the first also folds the upload's
+    sketches into the turbine's persisted ones.
+
+    With clip_reference="history" the bounds come from the upload's sketches merged with the
+    turbine's persisted ones, so new data is clipped consistently with everything seen before
+    without rescanning it.
+    Duplicate removal is per chunk.
+    """
+
+    def __init__(self, turbine_id: int, chunk_size: int = DEFAULT_CHUNK_SIZE, clip_reference: str = "upload", smoothing_kind: str = SMOOTHING_KIND):
+        self.turbine_id = turbine_id
+        self.chunk_size = chunk_size
+        self.clip_reference = clip_reference
+        self.smoothing_kind = smoothing_kind
+        self.timestamp = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.upload_sketches: Optional[Dict[str, KLLSketch]] = None
+        self.fill_values: Optional[Dict[str, float]] = None
+        self.bounds: Optional[Dict[str, Tuple[float, float]]] = None
+        self.ruleset: Optional[alerts.RuleSet] = None
+        self.smoother: Optional[smoothing.Smoother] = None
+        self.rows_loaded = 0
+        self.alerts_logged = 0
+        self.chunks_loaded = 0
+
+    def _reader(self, stream: BinaryIO):
+        stream.seek(0)
+        header = pd.read_csv(stream, nrows=0).columns
+        stream.seek(0)
+        renamed = {col: normalize_column_name(col) for col in header}
+        missing = missing_columns(set(renamed.values()))
+        if missing:
+            raise CsvFormatError(f"CSV is missing required columns: {missing}")
+        wanted = {col: name for col, name in renamed.items() if name in REQUIRED_COLUMNS or name == 'timestamp'}
+        dtypes = {col: np.float64 for col, name in wanted.items() if name in REQUIRED_COLUMNS}
+        reader = pd.read_csv(stream, usecols=list(wanted), dtype=dtypes, chunksize=self.chunk_size)
+        for chunk in reader:
+            yield chunk.rename(columns=wanted)
+
+    def sketch(self, stream: BinaryIO) -> None:
+        self.upload_sketches = {col: new_sketch() for col in REQUIRED_COLUMNS}
+        for chunk in self._reader(stream):
+            for col in REQUIRED_COLUMNS:
+                self.upload_sketches[col].update(chunk[col].to_numpy())
+
+    def prepare(self, db: sqlite3.Connection) -> None:
+        """Reads what cleaning and checking need: history sketches, alert rules and the smoother."""
+        reference = merge_history(db, self.turbine_id, self.upload_sketches) if self.clip_reference == "history" else self.upload_sketches
+        self.fill_values = {col: sketch.quantile(0.5) for col, sketch in reference.items()}
+        self.bounds = sketch_bounds(reference)
+        self.ruleset = alerts.registry.rules(db)
+        self.smoother = load_smoother(db, self.turbine_id, self.smoothing_kind)
+
+    def _clean(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """The cleaned chunk, and its filled readings before clipping and smoothing."""
+        chunk = chunk.drop_duplicates()
+        chunk = chunk.fillna(self.fill_values)
+        unsmoothed = chunk[REQUIRED_COLUMNS].copy()
+        for col, (lower_bound, upper_bound) in self.bounds.items():
+            chunk[col] = chunk[col].clip(lower_bound, upper_bound)
+
+        chunk[REQUIRED_COLUMNS] = self.smoother.apply(chunk[REQUIRED_COLUMNS].to_numpy())
+        if 'timestamp' not in chunk.columns:
+            chunk['timestamp'] = self.timestamp
+        return chunk, unsmoothed
+
+    def chunks(self, stream: BinaryIO) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame, List[tuple]]]:
+        """(cleaned chunk, unsmoothed readings, threshold alerts) for each non-empty chunk; advances the smoother."""
+        for chunk in self._reader(stream):
+            if chunk.empty:
+                continue
+            chunk, unsmoothed = self._clean(chunk)
+            yield chunk, unsmoothed, detect_alerts(chunk, self.turbine_id, self.ruleset)
+
+    def load(self, db: sqlite3.Connection, chunk: pd.DataFrame, unsmoothed: pd.DataFrame, rule_alerts: List[tuple]) -> None:
+        """Inserts one chunk from `chunks`, with its alerts, and commits it."""
+        writes = cache.WriteSet()
+        if not self.chunks_loaded:
+            fold_into_history(db, self.turbine_id, self.upload_sketches)
+        alerts_logged = alerts.insert_alerts(db, rule_alerts + detect_drift(db, chunk, unsmoothed, self.turbine_id, writes), writes)
+        rows_loaded = insert_readings(db, chunk.round(4), self.turbine_id, writes)
+        save_smoother(db, self.turbine_id, self.smoother)
+        db.commit()
+        after_commit(writes)
+        self.alerts_logged += alerts_logged
+        self.rows_loaded += rows_loaded
+        self.chunks_loaded += 1
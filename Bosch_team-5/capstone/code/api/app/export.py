@@ -0,0 +1,168 @@
+# app/export.py
+
+import io
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Iterator, List, Optional, Sequence
+import pandas as pd
+from app import archive, buckets, etl
+
+EXPORT_CHUNK_ROWS = 10_000
+EXPORT_COLUMNS = ["id", "turbine_id", "timestamp"] + etl.REQUIRED_COLUMNS
+_INTEGER_COLUMNS = ("id", "turbine_id")
+
+# format -> (media type, file extension)
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+# compression -> (media type of the compressed file, file suffix)
+COMPRESSIONS = {
+    "none": (None, ""),
+    "gzip": ("application/gzip", ".gz"),
+    "zstd": ("application/zstd", ".zst"),
+}
+
+class ExportError(ValueError):
+    pass
+
+def projection(columns: Optional[str]) -> List[str]:
+    """Validated column list from a comma-separated projection, in table order."""
+    if not columns:
+        return list(EXPORT_COLUMNS)
+    wanted = {name.strip() for name in columns.split(",") if name.strip()}
+    unknown = sorted(wanted - set(EXPORT_COLUMNS))
+    if unknown:
+        raise ExportError(f"Unknown export columns: {unknown}")
+    return [name for name in EXPORT_COLUMNS if name in wanted]
+
+def check(fmt: str, compression: str) -> None:
+    """Rejects a format or compression this install cannot produce, before streaming starts."""
+    if (fmt == "arrow" or compression == "zstd") and not archive.available():
+        raise ExportError(f"{'Arrow IPC' if fmt == 'arrow' else 'zstd'} export needs pyarrow.")
+
+def _nullable_integers(df: pd.DataFrame) -> pd.DataFrame:
+    # Keeps ids integral in every format even where a turbine_id is NULL.
+    for name in _INTEGER_COLUMNS:
+        if name in df.columns:
+            df[name] = df[name].astype("Int64")
+    return df
+
+def chunks(db: sqlite3.Connection, names: Sequence[str], turbine_ids: Optional[Sequence[int]] = None, start: Optional[datetime] = None, end: Optional[datetime] = None, chunk_size: int = EXPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Readings in [start, end) (naive UTC) as DataFrames of at most `chunk_size` rows: archived
+    readings first, file by file, then hot rows in id order through one SQLite cursor. The
+    whole walk reads a single snapshot, so a concurrent archive run cannot make a reading
+    appear twice or not at all. Readings without a parseable timestamp only match when no
+    window is given.
+    """
+    where, params = "1 = 1", []
+    if turbine_ids is not None:
+        where += f" AND turbine_id IN ({','.join('?' for _ in turbine_ids)})"
+        params += list(turbine_ids)
+    if start is not None:
+        where += f" AND reading_date BETWEEN ? AND ? AND {buckets.RAW_TIMESTAMP_SQL} >= ? AND {buckets.RAW_TIMESTAMP_SQL} < ?"
+        params += [start.date().isoformat(), end.date().isoformat(), buckets.raw_bound(start), buckets.raw_bound(end)]
+
+    db.execute("BEGIN")
+    try:
+        for path in archive.files(db, turbine_ids, start, end):
+            table = archive.read([path], [name for name in names if name not in ("turbine_id", "timestamp")], start, end)
+            for batch in table.select(list(names)).to_batches(chunk_size):
+                if batch.num_rows:
+                    yield _nullable_integers(batch.to_pandas())
+        cursor = db.execute(f"SELECT {', '.join(names)} FROM sensor_readings WHERE {where} ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield _nullable_integers(pd.DataFrame.from_records(rows, columns=names))
+    finally:
+        db.rollback()
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+class _Gzip:
+    def __init__(self):
+        self._compressor = zlib.compressobj(wbits=31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+class _Zstd:
+    def __init__(self):
+        self._sink = _Sink()
+        self._stream = archive.pa.CompressedOutputStream(archive.pa.PythonFile(self._sink, mode="w"), "zstd")
+
+    def compress(self, data: bytes) -> bytes:
+        self._stream.write(data)
+        self._stream.flush()
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._stream.close()
+        return self._sink.drain()
+
+class _Identity:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def finish(self) -> bytes:
+        return b""
+
+_COMPRESSORS = {"none": _Identity, "gzip": _Gzip, "zstd": _Zstd}
+
+def _arrow_schema(names: Sequence[str]):
+    pa = archive.pa
+    types = {"id": pa.int64(), "turbine_id": pa.int64(), "timestamp": pa.string()}
+    return pa.schema([(name, types.get(name, pa.float64())) for name in names])
+
+def _encoded(frames: Iterator[pd.DataFrame], names: Sequence[str], fmt: str) -> Iterator[bytes]:
+    if fmt == "arrow":
+        sink = _Sink()
+        schema = _arrow_schema(names)
+        with archive.pa.ipc.new_stream(archive.pa.PythonFile(sink, mode="w"), schema) as writer:
+            for df in frames:
+                writer.write_batch(archive.pa.RecordBatch.from_pandas(df, schema=schema, preserve_index=False))
+                yield sink.drain()
+        yield sink.drain()
+        return
+    if fmt == "csv":
+        yield (",".join(names) + "\n").encode()
+    for df in frames:
+        if fmt == "csv":
+            yield df.to_csv(index=False, header=False).encode()
+        else:
+            # to_json keeps at most 15 decimals; NaN becomes null.
+            yield (df.to_json(orient="records", lines=True, double_precision=15).rstrip("\n") + "\n").encode()
+
+def stream(db: sqlite3.Connection, names: Sequence[str], fmt: str, compression: str, turbine_ids: Optional[Sequence[int]] = None, start: Optional[datetime] = None, end: Optional[datetime] = None, chunk_size: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Encoded, optionally compressed response body, produced one chunk at a time."""
+    compressor = _COMPRESSORS[compression]()
+    for data in _encoded(chunks(db, names, turbine_ids, start, end, chunk_size), names, fmt):
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    tail = compressor.finish()
+    if tail:
+        yield tail
@@ -0,0 +1,241 @@
+# app/ingest_queue.py
+
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional, Tuple
+import numpy as np
+from app import alerts, async_db, cache, etl
+
+QUEUE_MAX_DEPTH = 10_000
+GROUP_COMMIT_ROWS = 500
+GROUP_COMMIT_INTERVAL_MS = 50.0
+# Commit latencies kept for the percentile in stats().
+LATENCY_WINDOW = 1024
+# Backoff between attempts while another connection holds SQLite's write lock.
+RETRY_BACKOFF_MS = 50.0
+RETRY_BACKOFF_MAX_MS = 2000.0
+# How long one batch may keep retrying before it is dead-lettered.
+RETRY_DEADLINE_SECONDS = 30.0
+# How long shutdown waits for the queue to drain.
+STOP_TIMEOUT_SECONDS = 120.0
+
+logger = logging.getLogger(__name__)
+
+class QueueFull(Exception):
+    pass
+
+class WriterStopped(Exception):
+    pass
+
+class WriteBehindQueue:
+    """
+    Bounded in-process queue for write-behind ingestion of single readings. Requests validate
+    and enqueue, then return at once; one thread drains the queue in group commits of up to
+    `batch_rows` readings, committing a partial batch once its oldest reading has waited
+    `flush_interval_ms`. Each group goes through the batch write path (vectorized alerts, one
+    executemany, rollups, buckets, column store, cache invalidation) on async_db's writer, so
+    one fsync covers many readings and the queue never contends with the API's other writes.
+
+    A batch stays at the head of the queue until it is written. While another connection
+    (the archiver, an offline script) holds the write lock past busy_timeout, it is retried
+    with backoff for up to `retry_deadline` seconds. A batch that still fails, or fails for
+    any other reason, is counted in `failed_rows`, logged and saved to ingest_dead_letters,
+    so an acknowledged reading is never dropped silently. `stop()` refuses new readings and
+    waits for everything already accepted to be written.
+    """
+
+    def __init__(self, max_depth: int = QUEUE_MAX_DEPTH, batch_rows: int = GROUP_COMMIT_ROWS, flush_interval_ms: float = GROUP_COMMIT_INTERVAL_MS,
+                 retry_deadline: float = RETRY_DEADLINE_SECONDS):
+        self.max_depth = max_depth
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.retry_deadline = retry_deadline
+        self._items: Deque[Tuple[float, int, object]] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._accepting = False
+        self._flush_waiters = 0
+        self._enqueued = 0
+        self._done = 0
+        self._rejected = 0
+        self._committed_rows = 0
+        self._failed_rows = 0
+        self._dead_lettered_rows = 0
+        self._commits = 0
+        self._retries = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._accepting
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._accepting = True
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the queue has drained; returns False if `timeout` ran out first."""
+        with self._cond:
+            thread, self._accepting = self._thread, False
+            self._cond.notify_all()
+        if thread is None:
+            return True
+        thread.join(timeout)
+        if thread.is_alive():
+            return False
+        with self._cond:
+            self._thread = None
+        return True
+
+    def put(self, turbine_id: int, reading) -> int:
+        """Enqueues one validated TurbineReadingCreate; returns its sequence number."""
+        with self._cond:
+            if not self._accepting:
+                raise WriterStopped("Write-behind ingestion is not running.")
+            if len(self._items) >= self.max_depth:
+                self._rejected += 1
+                raise QueueFull(f"Ingestion queue is full ({self.max_depth} readings pending).")
+            self._items.append((time.monotonic(), turbine_id, reading))
+            self._enqueued += 1
+            if len(self._items) >= self.batch_rows or len(self._items) == 1:
+                self._cond.notify_all()
+            return self._enqueued
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every reading enqueued so far has been written (or failed)."""
+        with self._cond:
+            target = self._enqueued
+            self._flush_waiters += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: self._done >= target, timeout)
+            finally:
+                self._flush_waiters -= 1
+
+    def _next_batch(self) -> Optional[List[Tuple[float, int, object]]]:
+        with self._cond:
+            while True:
+                if not self._items:
+                    if not self._accepting:
+                        return None
+                    self._cond.wait()
+                    continue
+                # Commit early on stop, or while a flush() is waiting on what is queued.
+                wait = self._items[0][0] + self.flush_interval - time.monotonic()
+                if len(self._items) >= self.batch_rows or wait <= 0 or not self._accepting or self._flush_waiters:
+                    break
+                self._cond.wait(wait)
+            # Left in the queue (and in its depth) until written; put() only appends.
+            return list(itertools.islice(self._items, self.batch_rows))
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._write(batch)
+
+    def _write(self, batch: List[Tuple[float, int, object]]) -> None:
+        readings = [reading for _, _, reading in batch]
+        turbine_ids = np.array([turbine_id for _, turbine_id, _ in batch], dtype=np.int64)
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.retry_deadline
+        backoff = RETRY_BACKOFF_MS / 1000
+        error = None
+        while True:
+            try:
+                columns, timestamps = etl.reading_arrays(readings)
+                async_db.db.submit(_commit_group, columns, timestamps, turbine_ids).result()
+            except sqlite3.OperationalError as e:
+                if _is_locked(e) and time.monotonic() + backoff < deadline:
+                    with self._cond:
+                        self._retries += 1
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, RETRY_BACKOFF_MAX_MS / 1000)
+                    continue
+                error = e
+            except Exception as e:
+                # The writer must outlive a bad batch; its readings are dead-lettered.
+                error = e
+            break
+        elapsed = time.perf_counter() - started
+        dead_lettered = error is not None and self._dead_letter(batch, error)
+
+        with self._cond:
+            for _ in batch:
+                self._items.popleft()
+            if error is None:
+                self._committed_rows += len(batch)
+                self._commits += 1
+                self._latencies.append(elapsed)
+                self._latency_total += elapsed
+                self._latency_max = max(self._latency_max, elapsed)
+            else:
+                self._failed_rows += len(batch)
+                self._dead_lettered_rows += len(batch) if dead_lettered else 0
+            self._done += len(batch)
+            self._cond.notify_all()
+
+    def _dead_letter(self, batch: List[Tuple[float, int, object]], error: Exception) -> bool:
+        rows = [(turbine_id, reading.model_dump_json(), repr(error)) for _, turbine_id, reading in batch]
+        try:
+            async_db.db.submit(_save_dead_letters, rows).result()
+        except Exception as e:
+            logger.error("Lost %d write-behind readings that failed with %r; saving them failed with %r", len(batch), error, e)
+            return False
+        logger.warning("Dead-lettered %d write-behind readings that failed with %r", len(batch), error)
+        return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            latencies = np.array(self._latencies) * 1000
+            return {
+                "running": self._accepting,
+                "queue_depth": len(self._items),
+                "max_depth": self.max_depth,
+                "batch_rows": self.batch_rows,
+                "flush_interval_ms": self.flush_interval * 1000,
+                "enqueued": self._enqueued,
+                "rejected": self._rejected,
+                "committed_rows": self._committed_rows,
+                "failed_rows": self._failed_rows,
+                "dead_lettered_rows": self._dead_lettered_rows,
+                "commits": self._commits,
+                "lock_retries": self._retries,
+                "avg_batch_rows": self._committed_rows / self._commits if self._commits else 0.0,
+                "avg_commit_ms": self._latency_total / self._commits * 1000 if self._commits else 0.0,
+                "p95_commit_ms": float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+                "max_commit_ms": self._latency_max * 1000,
+            }
+
+def _is_locked(error: sqlite3.OperationalError) -> bool:
+    return str(error).startswith("database is locked")
+
+def _commit_group(conn: sqlite3.Connection, columns, timestamps: np.ndarray, turbine_ids: np.ndarray) -> None:
+    """Runs on the writer connection: checks and inserts one group in one transaction."""
+    writes = cache.WriteSet()
+    alerts.insert_alerts(conn, etl.check_readings(conn, columns, timestamps, turbine_ids, writes), writes)
+    etl.insert_reading_batch(conn, columns, timestamps, turbine_ids, writes)
+    conn.commit()
+    etl.after_commit(writes)
+
+def _save_dead_letters(conn: sqlite3.Connection, rows: List[Tuple[int, str, str]]) -> None:
+    failed_at = datetime.now().isoformat()
+    conn.executemany(
+        "INSERT INTO ingest_dead_letters (turbine_id, reading, error, failed_at) VALUES (?, ?, ?, ?)",
+        [row + (failed_at,) for row in rows]
+    )
+    conn.commit()
+
+writer = WriteBehindQueue()
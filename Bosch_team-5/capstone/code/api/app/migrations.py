@@ -0,0 +1,270 @@
+# app/migrations.py
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+# The API owns the schema for turbine_metadata, sensor_readings and alerts. Each migration
+# runs once, in its own transaction, and bumps PRAGMA user_version to its number, so a
+# database can be brought up to date from any earlier version (including an empty file).
+# Migrations are frozen: they run their own SQL and never call into application modules,
+# whose later edits would otherwise change what an old migration does. Tables derived from
+# the readings are created empty and queued in pending_rebuilds, for the application to
+# fill with its current code once the schema is up to date (database.rebuild_pending).
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    # table_xinfo (unlike table_info) also lists generated columns.
+    return [row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})").fetchall()]
+
+def _queue_rebuild(conn: sqlite3.Connection, table: str):
+    conn.execute("CREATE TABLE IF NOT EXISTS pending_rebuilds (table_name TEXT PRIMARY KEY)")
+    conn.execute("INSERT OR IGNORE INTO pending_rebuilds (table_name) VALUES (?)", (table,))
+
+def _base_schema(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS turbine_metadata (
+            turbine_id INTEGER PRIMARY KEY,
+            location TEXT,
+            manufacturer TEXT,
+            model TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sensor_readings (
+            id INTEGER PRIMARY KEY,
+            turbine_id INTEGER,
+            timestamp TEXT,
+            lp REAL, v REAL, gtt REAL, gtn REAL, ggn REAL, ts REAL, tp REAL,
+            t48 REAL, t1 REAL, t2 REAL, p48 REAL, p1 REAL, p2 REAL, pexh REAL, tic REAL,
+            mf REAL, decay_coeff_comp REAL, decay_coeff_turbine REAL,
+            reading_date TEXT GENERATED ALWAYS AS (date(timestamp)) STORED
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS alerts (
+            alert_id INTEGER PRIMARY KEY,
+            turbine_id INTEGER,
+            timestamp TEXT,
+            metric TEXT,
+            alert_type TEXT,
+            severity TEXT,
+            actual_value REAL,
+            threshold_value REAL,
+            description TEXT,
+            alert_date TEXT GENERATED ALWAYS AS (date(timestamp)) STORED
+        )
+    """)
+
+def _normalized_dates(conn: sqlite3.Connection):
+    # Tables created before the API owned the schema lack the date columns. SQLite can only
+    # add generated columns as VIRTUAL; the indexes in the next migration materialize them.
+    if "reading_date" not in _table_columns(conn, "sensor_readings"):
+        conn.execute("ALTER TABLE sensor_readings ADD COLUMN reading_date TEXT GENERATED ALWAYS AS (date(timestamp)) VIRTUAL")
+    if "alert_date" not in _table_columns(conn, "alerts"):
+        conn.execute("ALTER TABLE alerts ADD COLUMN alert_date TEXT GENERATED ALWAYS AS (date(timestamp)) VIRTUAL")
+
+def _hot_path_indexes(conn: sqlite3.Connection):
+    # Every index implicitly ends in the rowid, so (turbine_id, timestamp) also serves the
+    # `ORDER BY timestamp DESC, id DESC` keyset scans without a temp b-tree.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sensor_readings_turbine_ts ON sensor_readings (turbine_id, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sensor_readings_turbine_date ON sensor_readings (turbine_id, reading_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_turbine_ts ON alerts (turbine_id, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_turbine_date ON alerts (turbine_id, alert_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_date ON alerts (alert_date)")
+
+def _quantile_sketches(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS quantile_sketches (
+            turbine_id INTEGER NOT NULL,
+            column_name TEXT NOT NULL,
+            sketch BLOB NOT NULL,
+            value_count INTEGER NOT NULL,
+            updated_at TEXT,
+            PRIMARY KEY (turbine_id, column_name)
+        )
+    """)
+
+def _alert_rules(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS alert_rules (
+            rule_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            metric TEXT NOT NULL,
+            op TEXT NOT NULL CHECK (op IN ('>', '>=', '<', '<=')),
+            threshold REAL NOT NULL,
+            alert_type TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            description TEXT NOT NULL,
+            reported_threshold REAL,
+            guard_metric TEXT,
+            guard_op TEXT CHECK (guard_op IS NULL OR guard_op IN ('>', '>=', '<', '<=')),
+            guard_value REAL,
+            enabled INTEGER NOT NULL DEFAULT 1
+        )
+    """)
+    # Bumped by triggers on every change so workers can detect edits with one cheap read.
+    conn.execute("CREATE TABLE IF NOT EXISTS alert_rules_meta (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)")
+    conn.execute("INSERT OR IGNORE INTO alert_rules_meta (id, version) VALUES (1, 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_alert_rules_{event.lower()} AFTER {event} ON alert_rules
+            BEGIN UPDATE alert_rules_meta SET version = version + 1 WHERE id = 1; END
+        """)
+    # One rule set for every ingestion path, reconciling the thresholds that had drifted
+    # apart between the CSV upload, single-reading and offline analysis code.
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO alert_rules (name, metric, op, threshold, alert_type, severity, description, guard_metric, guard_op, guard_value)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            ("t48_high", "t48", ">", 800.0, "High Exit Temperature", "Warning", "HP Turbine exit temperature T48={value:.2f} °C is above 800 °C", None, None, None),
+            ("t48_overheat", "t48", ">", 950.0, "Overheat", "High", "Critical Turbine Exit Temperature: {value:.2f} °C", None, None, None),
+            ("mf_high", "mf", ">", 0.3, "High Fuel Flow", "Critical", "mf={value:.2f} kg/s exceeds threshold", None, None, None),
+            ("turbine_decay", "decay_coeff_turbine", "<", 0.96, "Component Decay", "Medium", "Medium Turbine Decay Detected: {value:.4f}", None, None, None),
+            ("compressor_decay", "decay_coeff_comp", "<", 0.96, "Component Decay", "Medium", "Medium Compressor Decay Detected: {value:.4f}", None, None, None),
+            ("total_decay_severe", "total_decay_score", ">", 0.06, "Severe Decay Detected", "Critical", "Total decay score {value:.4f} is critically high (> 0.06)", None, None, None),
+            ("low_pressure_ratio", "pressure_ratio", "<", 9.0, "Pressure Anomaly", "Low", "Low Pressure Ratio at Speed: {value:.2f}", "gtn", ">", 1500.0),
+        ]
+    )
+
+def _turbine_rollups(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS turbine_rollups (
+            turbine_id INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            value_count INTEGER NOT NULL,
+            value_sum REAL NOT NULL,
+            value_sum_sq REAL NOT NULL,
+            PRIMARY KEY (turbine_id, metric)
+        ) WITHOUT ROWID
+    """)
+    _queue_rebuild(conn, "turbine_rollups")
+
+# The reading_buckets statistics as of migration 7.
+_BUCKET_METRICS = [
+    "t1", "t2", "p1", "p2", "pressure_ratio", "t48", "p48", "gtt", "gtn", "ggn", "power_proxy_kw", "thermal_efficiency",
+    "compressor_efficiency", "fuel_per_rpm", "rpm_ratio_gtn_ggn", "total_decay_score", "temp_ratio_t48_p48",
+    "temp_ratio_t1_p1", "temp_ratio_t2_p2", "torque_diff", "total_prop_torque",
+]
+
+def _reading_buckets(conn: sqlite3.Connection):
+    stats = ",\n".join(f"{metric}_{stat} REAL NOT NULL" for metric in _BUCKET_METRICS for stat in ("min", "max", "sum"))
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS reading_buckets (
+            turbine_id INTEGER NOT NULL,
+            resolution TEXT NOT NULL CHECK (resolution IN ('day', 'hour')),
+            bucket_start TEXT NOT NULL,
+            record_count INTEGER NOT NULL,
+            first_timestamp TEXT NOT NULL,
+            last_timestamp TEXT NOT NULL,
+            {stats},
+            PRIMARY KEY (turbine_id, resolution, bucket_start)
+        ) WITHOUT ROWID
+    """)
+    _queue_rebuild(conn, "reading_buckets")
+
+def _archive_manifest(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive_files (
+            file_id INTEGER PRIMARY KEY,
+            turbine_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            path TEXT NOT NULL UNIQUE,
+            row_count INTEGER NOT NULL,
+            byte_size INTEGER NOT NULL,
+            min_time TEXT NOT NULL,
+            max_time TEXT NOT NULL,
+            column_stats TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_archive_files_turbine_month ON archive_files (turbine_id, month)")
+
+def _smoothing_state(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS smoothing_state (
+            turbine_id INTEGER NOT NULL,
+            column_name TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            window_size INTEGER NOT NULL,
+            state BLOB NOT NULL,
+            value_count INTEGER NOT NULL,
+            updated_at TEXT,
+            PRIMARY KEY (turbine_id, column_name)
+        )
+    """)
+
+def _drift_state(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS drift_state (
+            turbine_id INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            mean REAL,
+            var REAL NOT NULL,
+            c_high REAL NOT NULL,
+            m_high REAL NOT NULL,
+            c_low REAL NOT NULL,
+            m_low REAL NOT NULL,
+            outside INTEGER NOT NULL,
+            high_latched INTEGER NOT NULL,
+            low_latched INTEGER NOT NULL,
+            updated_at TEXT,
+            PRIMARY KEY (turbine_id, metric)
+        )
+    """)
+
+def _ingest_dead_letters(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ingest_dead_letters (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            turbine_id INTEGER NOT NULL,
+            reading TEXT NOT NULL,
+            error TEXT NOT NULL,
+            failed_at TEXT NOT NULL
+        )
+    """)
+
+def _exclusive_t48_bands(conn: sqlite3.Connection):
+    # Above 950 °C only the overheat rule fires, rather than both it and the warning.
+    conn.execute("""
+        UPDATE alert_rules SET guard_metric = 't48', guard_op = '<=', guard_value = 950.0
+        WHERE name = 't48_high' AND guard_metric IS NULL
+    """)
+
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "base schema", _base_schema),
+    (2, "normalized date columns", _normalized_dates),
+    (3, "hot-path indexes", _hot_path_indexes),
+    (4, "per-turbine quantile sketches", _quantile_sketches),
+    (5, "alert rule registry", _alert_rules),
+    (6, "per-turbine metric rollups", _turbine_rollups),
+    (7, "hourly and daily analytics buckets", _reading_buckets),
+    (8, "parquet archive manifest", _archive_manifest),
+    (9, "per-turbine smoothing state", _smoothing_state),
+    (10, "per-turbine drift detector state", _drift_state),
+    (11, "write-behind dead letters", _ingest_dead_letters),
+    (12, "exclusive t48 alert bands", _exclusive_t48_bands),
+]
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def run_migrations(conn: sqlite3.Connection) -> int:
+    """Applies every pending migration in order and returns the resulting schema version."""
+    current = schema_version(conn)
+    for version, _name, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute("BEGIN")
+        try:
+            migrate(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        current = version
+    conn.execute("PRAGMA optimize")
+    return current
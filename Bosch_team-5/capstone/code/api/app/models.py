@@ -1,13 +1,14 @@
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import date, datetime
 
 class PaginationMetadata(BaseModel):
-    total_items: int
-    total_pages: int
+    total_items: Optional[int] = Field(None, description="Exact number of matching records; omitted when include_total=false.")
+    total_pages: Optional[int] = None
     current_page: int
     page_size: int
+    next_cursor: Optional[str] = Field(None, description="Opaque token for the next page in cursor mode; null on the last page.")
 
 class AlertBase(BaseModel):
     turbine_id: int = Field(default=1)
@@ -32,6 +33,29 @@ class PaginatedAlerts(BaseModel):
     data: List[Alert]
     metadata: PaginationMetadata
 
+class AlertRuleBase(BaseModel):
+    name: str = Field(..., json_schema_extra={"example": "t48_overheat"})
+    metric: str = Field(..., json_schema_extra={"example": "t48"})
+    op: Literal[">", ">=", "<", "<="] = Field(..., json_schema_extra={"example": ">"})
+    threshold: float = Field(..., json_schema_extra={"example": 950.0})
+    alert_type: str = Field(..., json_schema_extra={"example": "Overheat"})
+    severity: str = Field(..., json_schema_extra={"example": "High"})
+    description: str = Field(..., description="Template with exactly one {value} field, e.g. 'T48={value:.2f} °C'")
+    reported_threshold: Optional[float] = Field(None, description="threshold_value written to alerts, if different from threshold")
+    guard_metric: Optional[str] = Field(None, json_schema_extra={"example": "gtn"})
+    guard_op: Optional[Literal[">", ">=", "<", "<="]] = None
+    guard_value: Optional[float] = None
+    enabled: bool = True
+
+class AlertRuleCreate(AlertRuleBase):
+    pass
+
+class AlertRule(AlertRuleBase):
+    rule_id: int
+    model_config = {
+        "from_attributes": True
+    }
+
 class TurbineBase(BaseModel):
     location: Optional[str] = Field(None, json_schema_extra={"example": "North Sea Platform Alpha"})
     manufacturer: Optional[str] = Field(None, json_schema_extra={"example": "Siemens"})
@@ -98,6 +122,21 @@ class TurbineReadingCreate(BaseModel):
     decay_coeff_comp: float
     decay_coeff_turbine: float
 
+MAX_BATCH_READINGS = 10_000
+
+class TurbineReadingBatchItem(TurbineReadingCreate):
+    turbine_id: Optional[int] = Field(None, description="Turbine of this reading; defaults to the batch's turbine_id.")
+
+class TurbineReadingBatch(BaseModel):
+    turbine_id: Optional[int] = Field(None, description="Turbine of every reading that does not name its own.")
+    readings: List[TurbineReadingBatchItem] = Field(..., min_length=1, max_length=MAX_BATCH_READINGS)
+
+class TurbineReadingBatchResult(BaseModel):
+    rows_loaded: int
+    anomalies_logged_count: int
+    ids: List[int] = Field(..., description="Stored id of each reading, in request order.")
+    alert_counts: List[int] = Field(..., description="Alerts raised by each reading, in request order.")
+
 class HealthSummary(BaseModel):
     turbine_id: int
     record_count: int
@@ -175,4 +214,6 @@ class TurbineAnalyticsReport(BaseModel):
 class TimeFilterRequest(BaseModel):
     turbine_ids: List[int] = Field(default=[1])
     start_date: Optional[date] = Field(default=None, description="Optional start date for the report period.")
-    end_date: Optional[date] = Field(default=None, description="Optional end date for the report period.")
\ No newline at end of file
+    end_date: Optional[date] = Field(default=None, description="Optional end date for the report period.")
+    start_time: Optional[datetime] = Field(default=None, description="Optional start instant (inclusive); takes precedence over start_date.")
+    end_time: Optional[datetime] = Field(default=None, description="Optional end instant (inclusive); takes precedence over end_date.")
\ No newline at end of file
@@ -0,0 +1,73 @@
+# app/pagination.py
+
+import base64
+import json
+import math
+import operator
+from typing import List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+
+def encode_cursor(timestamp: Optional[str], row_id: int) -> str:
+    """Packs a (timestamp, id) seek position into an opaque, URL-safe token."""
+    raw = json.dumps([timestamp, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[str], int]:
+    """Unpacks a token produced by `encode_cursor`, rejecting anything malformed with a 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(timestamp, (str, type(None))) or not isinstance(row_id, int):
+            raise ValueError("unexpected cursor payload")
+        return timestamp, row_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+def keyset_query(table: str, where_clause: str, params: list, key_column: str, cursor: str, limit: int) -> Tuple[str, list]:
+    """
+    Builds a query that continues a `timestamp DESC, <key_column> DESC` scan strictly after the
+    cursor position. Dated rows are reached with a row-value range seek on the (…, timestamp)
+    indexes. Rows without a timestamp sort last in DESC order and are read from a second,
+    equally bounded range, so both branches stop after `limit` rows.
+    """
+    timestamp, key = decode_cursor(cursor)
+    undated = f"SELECT * FROM {table} {where_clause} AND timestamp IS NULL"
+    if timestamp is None:
+        return f"{undated} AND {key_column} < ? ORDER BY {key_column} DESC LIMIT ?", [*params, key, limit]
+
+    order_by = f"ORDER BY timestamp DESC, {key_column} DESC LIMIT ?"
+    dated = f"SELECT * FROM {table} {where_clause} AND (timestamp, {key_column}) < (?, ?) {order_by}"
+    undated = f"{undated} ORDER BY {key_column} DESC LIMIT ?"
+    query = f"SELECT * FROM ({dated}) UNION ALL SELECT * FROM ({undated}) {order_by}"
+    return query, [*params, timestamp, key, limit, *params, limit, limit]
+
+def _project(rows: List, fields: Sequence[str]) -> List[dict]:
+    if not rows:
+        return []
+    keys = rows[0].keys()
+    values = operator.itemgetter(*(keys.index(name) for name in fields))
+    return [dict(zip(fields, values(row))) for row in rows] if len(fields) > 1 else [{fields[0]: values(row)} for row in rows]
+
+def build_page(rows: List, page_size: int, key_column: str, total_items: Optional[int], page: int, fields: Optional[Sequence[str]] = None) -> dict:
+    """
+    Trims the look-ahead row fetched by the caller (LIMIT page_size + 1) and assembles the
+    response envelope, including the cursor for the next page when more rows exist. With
+    `fields`, each row keeps only those columns, in that order.
+    """
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(last["timestamp"], last[key_column])
+
+    return {
+        "data": [dict(row) for row in rows] if fields is None else _project(rows, fields),
+        "metadata": {
+            "total_items": total_items,
+            "total_pages": math.ceil(total_items / page_size) if total_items is not None else None,
+            "current_page": page,
+            "page_size": len(rows),
+            "next_cursor": next_cursor,
+        },
+    }
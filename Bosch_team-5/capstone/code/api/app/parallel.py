@@ -0,0 +1,114 @@
+# app/parallel.py
+
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from app import archive, buckets, database
+
+ANALYTICS_WORKERS = min(4, os.cpu_count() or 1)
+# Requests for fewer turbines than this are composed inline; shipping them to a worker
+# costs more than it saves.
+PARALLEL_MIN_TURBINES = 8
+
+# One connection per database file in each worker process, reused across tasks.
+_connections: Dict[str, sqlite3.Connection] = {}
+
+def _worker_connection(path: str) -> sqlite3.Connection:
+    conn = _connections.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path)
+        for pragma in database.CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        _connections[path] = conn
+    return conn
+
+def _compose_slice(path: str, settings: Tuple[Path, bool], turbine_ids: Sequence[int], window: Optional[Tuple[datetime, datetime]]) -> Dict[int, dict]:
+    """Runs in a worker: composes its turbines' aggregates on the worker's own connection."""
+    archive.ARCHIVE_ROOT, buckets.RAW_PUSHDOWN = settings
+    return buckets.compose(_worker_connection(path), turbine_ids, window)
+
+def _slices(turbine_ids: Sequence[int], count: int) -> List[List[int]]:
+    # Round-robin, so every worker gets a near-equal share.
+    return [list(turbine_ids[i::count]) for i in range(count) if turbine_ids[i::count]]
+
+class AnalyticsPool:
+    """
+    Process pool for fleet-wide analytics reports. Turbines are split across `workers`
+    processes; each reads its turbines' buckets, raw edges and archive files through a
+    connection of its own and sends back only the per-turbine aggregates, so composing a
+    large fleet no longer holds the request thread's GIL for the whole computation.
+
+    Small requests, in-memory databases and `workers <= 1` are composed inline on the
+    request's connection, and so is a request whose pool broke (the pool is rebuilt on the
+    next one). Worker processes are spawned on first use, not forked, since the server
+    process runs threads.
+    """
+
+    def __init__(self, workers: int = ANALYTICS_WORKERS, min_turbines: int = PARALLEL_MIN_TURBINES):
+        self.workers = workers
+        self.min_turbines = min_turbines
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._parallel = 0
+        self._inline = 0
+        self._failures = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def compose(self, path, db: sqlite3.Connection, turbine_ids: Sequence[int], window: Optional[Tuple[datetime, datetime]] = None) -> Dict[int, dict]:
+        """`buckets.compose` for `turbine_ids`, fanned out over the pool when worthwhile."""
+        if self.workers <= 1 or len(turbine_ids) < self.min_turbines or str(path) == ":memory:":
+            return self._compose_inline(db, turbine_ids, window)
+
+        executor = self._pool()
+        try:
+            # Workers follow the server's settings, which may have changed since they were spawned.
+            settings = (archive.ARCHIVE_ROOT, buckets.RAW_PUSHDOWN)
+            futures = [executor.submit(_compose_slice, str(path), settings, ids, window) for ids in _slices(list(turbine_ids), self.workers)]
+            merged: Dict[int, dict] = {}
+            for future in futures:
+                merged.update(future.result())
+        except BrokenProcessPool:
+            with self._lock:
+                self._failures += 1
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            return self._compose_inline(db, turbine_ids, window)
+        with self._lock:
+            self._parallel += 1
+        return dict(sorted(merged.items()))
+
+    def _compose_inline(self, db: sqlite3.Connection, turbine_ids: Sequence[int], window: Optional[Tuple[datetime, datetime]]) -> Dict[int, dict]:
+        with self._lock:
+            self._inline += 1
+        return buckets.compose(db, turbine_ids, window)
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "min_turbines": self.min_turbines,
+                "running": self._executor is not None,
+                "parallel_requests": self._parallel,
+                "inline_requests": self._inline,
+                "failures": self._failures,
+            }
+
+pool = AnalyticsPool()
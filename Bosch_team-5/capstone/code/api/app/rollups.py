@@ -0,0 +1,133 @@
+# app/rollups.py
+
+import argparse
+import sqlite3
+from typing import Dict, List, Mapping, Sequence, Tuple
+import numpy as np
+from app import derived
+
+# One row per (turbine, metric) holding the count, sum and sum of squares of its non-null
+# values, for the stored sensor columns and every derived metric. Writers fold each batch in
+# with an additive UPSERT inside their own transaction, so readers never touch raw readings.
+UPSERT_ROLLUP_SQL = """
+    INSERT INTO turbine_rollups (turbine_id, metric, value_count, value_sum, value_sum_sq) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (turbine_id, metric) DO UPDATE SET
+        value_count = value_count + excluded.value_count,
+        value_sum = value_sum + excluded.value_sum,
+        value_sum_sq = value_sum_sq + excluded.value_sum_sq
+"""
+
+REBUILD_CHUNK_SIZE = 50_000
+
+Moments = Tuple[int, float, float]
+
+def summarize(columns: Mapping[str, np.ndarray], turbine_ids) -> List[tuple]:
+    """
+    Count, sum and sum of squares per turbine and metric for a batch of readings. `columns`
+    holds the stored sensor columns; the derived metrics are added through the shared kernel.
+    `turbine_ids` is one id for the whole batch or an array aligned with the rows.
+    """
+    values = {name: np.asarray(column, dtype=np.float64) for name, column in columns.items()}
+    values.update(derived.compute_derived(values))
+    n = len(next(iter(values.values())))
+    if np.isscalar(turbine_ids):
+        groups, inverse = np.array([int(turbine_ids)]), np.zeros(n, dtype=np.intp)
+    else:
+        groups, inverse = np.unique(np.asarray(turbine_ids, dtype=np.int64), return_inverse=True)
+
+    rows = []
+    for metric, column in values.items():
+        valid = ~np.isnan(column)
+        index, kept = inverse[valid], column[valid]
+        counts = np.bincount(index, minlength=len(groups))
+        sums = np.bincount(index, weights=kept, minlength=len(groups))
+        sums_sq = np.bincount(index, weights=kept * kept, minlength=len(groups))
+        rows.extend(zip(groups.tolist(), [metric] * len(groups), counts.tolist(), sums.tolist(), sums_sq.tolist()))
+    return rows
+
+def record(db: sqlite3.Connection, columns: Mapping[str, np.ndarray], turbine_ids) -> None:
+    """Folds a batch of newly inserted readings into the rollups, in the caller's transaction."""
+    db.executemany(UPSERT_ROLLUP_SQL, summarize(columns, turbine_ids))
+
+def rebuild(db: sqlite3.Connection, metrics: Sequence[str], chunk_size: int = REBUILD_CHUNK_SIZE) -> int:
+    """
+    Recomputes every rollup from sensor_readings and then the archive in one streaming pass,
+    holding one chunk of rows plus the running per-turbine totals in memory. Runs in the
+    caller's transaction and returns the number of readings scanned.
+    """
+    from app import archive  # archive builds on this module
+
+    db.execute("DELETE FROM turbine_rollups")
+    if not metrics:
+        return 0
+    totals: Dict[Tuple[int, str], np.ndarray] = {}
+
+    def fold(columns: Mapping[str, np.ndarray], turbine_ids: np.ndarray):
+        for turbine_id, metric, count, total, total_sq in summarize(columns, turbine_ids):
+            running = totals.setdefault((turbine_id, metric), np.zeros(3))
+            running += (count, total, total_sq)
+
+    scanned = 0
+    cursor = db.execute(f"SELECT turbine_id, {', '.join(metrics)} FROM sensor_readings WHERE turbine_id IS NOT NULL")
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        block = np.array(rows, dtype=np.float64)
+        fold({metric: block[:, i + 1] for i, metric in enumerate(metrics)}, block[:, 0].astype(np.int64))
+        scanned += len(rows)
+    for turbine_ids, _, columns in archive.batches(db, metrics):
+        fold(columns, turbine_ids)
+        scanned += len(turbine_ids)
+
+    db.executemany(
+        "INSERT INTO turbine_rollups (turbine_id, metric, value_count, value_sum, value_sum_sq) VALUES (?, ?, ?, ?, ?)",
+        [(turbine_id, metric, int(count), float(total), float(total_sq)) for (turbine_id, metric), (count, total, total_sq) in totals.items()]
+    )
+    return scanned
+
+def has_turbine(db: sqlite3.Connection, turbine_id: int) -> bool:
+    return db.execute("SELECT 1 FROM turbine_rollups WHERE turbine_id = ? LIMIT 1", (turbine_id,)).fetchone() is not None
+
+def count_turbines(db: sqlite3.Connection) -> int:
+    return db.execute("SELECT COUNT(DISTINCT turbine_id) FROM turbine_rollups").fetchone()[0]
+
+def page_turbines(db: sqlite3.Connection, limit: int, offset: int) -> List[int]:
+    rows = db.execute("SELECT DISTINCT turbine_id FROM turbine_rollups ORDER BY turbine_id LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+    return [row[0] for row in rows]
+
+def load(db: sqlite3.Connection, turbine_ids: Sequence[int]) -> Dict[int, Dict[str, Moments]]:
+    """Rollups for the given turbines as {turbine_id: {metric: (count, sum, sum_sq)}}."""
+    placeholders = ','.join('?' for _ in turbine_ids)
+    rows = db.execute(
+        f"SELECT turbine_id, metric, value_count, value_sum, value_sum_sq FROM turbine_rollups WHERE turbine_id IN ({placeholders})",
+        list(turbine_ids)
+    ).fetchall()
+    result: Dict[int, Dict[str, Moments]] = {}
+    for turbine_id, metric, count, total, total_sq in rows:
+        result.setdefault(turbine_id, {})[metric] = (count, total, total_sq)
+    return result
+
+def mean(moments: Mapping[str, Moments], metric: str) -> float:
+    count, total, _ = moments.get(metric, (0, 0.0, 0.0))
+    return total / count if count else float("nan")
+
+def main():
+    from app import database, etl
+
+    parser = argparse.ArgumentParser(description="Recompute the per-turbine rollups from raw sensor readings.")
+    parser.add_argument("--database", default=database.DATABASE_PATH, help="Path to the SQLite database")
+    parser.add_argument("--chunk-size", type=int, default=REBUILD_CHUNK_SIZE, help="Rows fetched per chunk")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database, isolation_level=None)
+    try:
+        conn.execute("BEGIN")
+        scanned = rebuild(conn, etl.REQUIRED_COLUMNS, args.chunk_size)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    print(f"Rebuilt rollups from {scanned} readings.")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,13 @@
 from typing import List
+import aiosqlite
 from fastapi import APIRouter, Depends, HTTPException
-from app import models
-from app.database import get_db
+from app import async_db, models, turbines
+from app.async_db import get_async_db
 import sqlite3
 
 router = APIRouter()
 
-@router.post("/", response_model=models.Turbine, status_code=201, summary="Create a New Turbine")
-def create_turbine(turbine: models.TurbineCreate, db: sqlite3.Connection = Depends(get_db)):
+def _insert_turbine(db: sqlite3.Connection, turbine: models.TurbineCreate) -> dict:
     cursor = db.cursor()
     try:
         cursor.execute(
@@ -16,41 +16,44 @@ def create_turbine(turbine: models.TurbineCreate, db: sqlite3.Connection = Depen
         )
         db.commit()
         new_turbine_id = cursor.lastrowid
-        cursor.execute("SELECT * FROM turbine_metadata WHERE turbine_id = ?", (new_turbine_id,))
-        new_turbine = cursor.fetchone()
-        return dict(new_turbine)
+        turbines.registry.add(new_turbine_id)
+        return {"turbine_id": new_turbine_id, **turbine.model_dump()}
     except sqlite3.IntegrityError as e:
         raise HTTPException(status_code=400, detail=f"Failed to create turbine: {e}")
 
+@router.post("/", response_model=models.Turbine, status_code=201, summary="Create a New Turbine")
+async def create_turbine(turbine: models.TurbineCreate):
+    return await async_db.db.write(_insert_turbine, turbine)
+
 @router.get("/", response_model=List[models.Turbine], summary="Get All Turbine Details")
-def get_all_turbines(db: sqlite3.Connection = Depends(get_db)):
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM turbine_metadata")
-    turbines = cursor.fetchall()
+async def get_all_turbines(db: aiosqlite.Connection = Depends(get_async_db)):
+    turbines = await db.execute_fetchall("SELECT * FROM turbine_metadata")
     return [dict(row) for row in turbines]
 
 @router.get("/{turbine_id}", response_model=models.Turbine, summary="Get a Specific Turbine's Details")
-def get_turbine(turbine_id: int, db: sqlite3.Connection = Depends(get_db)):
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM turbine_metadata WHERE turbine_id = ?", (turbine_id,))
-    turbine = cursor.fetchone()
+async def get_turbine(turbine_id: int, db: aiosqlite.Connection = Depends(get_async_db)):
+    async with db.execute("SELECT * FROM turbine_metadata WHERE turbine_id = ?", (turbine_id,)) as cursor:
+        turbine = await cursor.fetchone()
     if not turbine:
         raise HTTPException(status_code=404, detail="Turbine not found.")
     return dict(turbine)
 
-@router.put("/{turbine_id}", response_model=models.Turbine, summary="Update a Turbine's Details")
-def update_turbine(turbine_id: int, turbine: models.TurbineUpdate, db: sqlite3.Connection = Depends(get_db)):
-    cursor = db.cursor()
-    cursor.execute("SELECT turbine_id FROM turbine_metadata WHERE turbine_id = ?", (turbine_id,))
-    if not cursor.fetchone():
+def _update_turbine(db: sqlite3.Connection, turbine_id: int, turbine: models.TurbineUpdate) -> dict:
+    if not turbines.registry.exists(db, turbine_id):
         raise HTTPException(status_code=404, detail="Turbine not found.")
-    
+
+    cursor = db.cursor()
     cursor.execute(
         "UPDATE turbine_metadata SET location=?, manufacturer=?, model=? WHERE turbine_id=?",
         (turbine.location, turbine.manufacturer, turbine.model, turbine_id)
     )
     db.commit()
-    
-    cursor.execute("SELECT * FROM turbine_metadata WHERE turbine_id = ?", (turbine_id,))
-    updated_turbine = cursor.fetchone()
-    return dict(updated_turbine)
\ No newline at end of file
+    if not cursor.rowcount:
+        # Removed by someone else since the registry saw it.
+        turbines.registry.invalidate()
+        raise HTTPException(status_code=404, detail="Turbine not found.")
+    return {"turbine_id": turbine_id, **turbine.model_dump()}
+
+@router.put("/{turbine_id}", response_model=models.Turbine, summary="Update a Turbine's Details")
+async def update_turbine(turbine_id: int, turbine: models.TurbineUpdate):
+    return await async_db.db.write(_update_turbine, turbine_id, turbine)
@@ -0,0 +1,59 @@
+import sqlite3
+from fastapi import APIRouter, Depends
+from app import alert_stream, alerts, archive, async_db, cache, colstore, database, drift, ingest_queue, parallel, telemetry, turbines
+from app.database import get_db
+
+router = APIRouter()
+
+@router.get("/db-pool", summary="Get Database Connection Pool Statistics")
+def get_pool_stats():
+    return database.pool.stats()
+
+@router.get("/async-db", summary="Get Async Data Layer Connections and Offload Executor Backlog")
+def get_async_db_stats():
+    return async_db.db.stats()
+
+@router.get("/alert-rules", summary="Get Per-Rule Evaluation Cost and Hit Counts")
+def get_alert_rule_stats():
+    return alerts.registry.stats()
+
+@router.get("/alert-stream", summary="Get Alert Stream Subscribers, Published and Dropped Counts")
+def get_alert_stream_stats():
+    return alert_stream.hub.stats()
+
+@router.get("/response-cache", summary="Get Report Response Cache Hit, Miss and Eviction Counters")
+def get_response_cache_stats():
+    return cache.response_cache.stats()
+
+@router.get("/ingest-queue", summary="Get Write-Behind Queue Depth and Group Commit Latency")
+def get_ingest_queue_stats():
+    return ingest_queue.writer.stats()
+
+@router.get("/telemetry", summary="Get WebSocket Telemetry Connections, Frames and Flush Sizes")
+def get_telemetry_stats():
+    return telemetry.hub.stats()
+
+@router.get("/drift", summary="Get Drift Detector Counters and Unsaved State")
+def get_drift_stats():
+    return drift.monitor.stats()
+
+@router.get("/turbine-registry", summary="Get Turbine Registry Size and Lookup Counters")
+def get_turbine_registry_stats():
+    return turbines.registry.stats()
+
+@router.get("/archive", summary="Get Parquet Archive Size and Scheduler Status")
+def get_archive_stats(db: sqlite3.Connection = Depends(get_db)):
+    scheduler = archive.scheduler
+    return {
+        **archive.stats(db),
+        "horizon_days": scheduler.horizon.days, "last_run": scheduler.last_run,
+        "last_moved": scheduler.last_moved, "last_error": scheduler.last_error,
+    }
+
+@router.get("/column-store", summary="Get Memory-Mapped Column Store Size and Pending Appends")
+def get_column_store_stats():
+    return colstore.store.stats()
+
+@router.get("/analytics-pool", summary="Get Analytics Process Pool Size and Parallel/Inline Request Counts")
+def get_analytics_pool_stats():
+    return parallel.pool.stats()
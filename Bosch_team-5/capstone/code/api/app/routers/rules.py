@@ -0,0 +1,71 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from app import alerts, models
+from app.database import get_db
+from app.etl import REQUIRED_COLUMNS
+import sqlite3
+
+router = APIRouter()
+
+RULE_FIELDS = ["name", "metric", "op", "threshold", "alert_type", "severity", "description",
+               "reported_threshold", "guard_metric", "guard_op", "guard_value", "enabled"]
+
+def _validate(rule: models.AlertRuleCreate):
+    known_metrics = set(REQUIRED_COLUMNS) | set(alerts.DERIVED_METRICS)
+    for metric in (rule.metric, rule.guard_metric):
+        if metric is not None and metric not in known_metrics:
+            raise HTTPException(status_code=400, detail=f"Unknown metric '{metric}'.")
+    if (rule.guard_metric is None) != (rule.guard_op is None) or (rule.guard_op is None) != (rule.guard_value is None):
+        raise HTTPException(status_code=400, detail="guard_metric, guard_op and guard_value must be given together.")
+    try:
+        alerts.RuleSet([alerts.ThresholdRule(rule.metric, rule.op, rule.threshold, rule.alert_type, rule.severity, rule.description)])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _values(rule: models.AlertRuleCreate) -> tuple:
+    data = rule.model_dump()
+    data["enabled"] = int(data["enabled"])
+    return tuple(data[field] for field in RULE_FIELDS)
+
+@router.get("/", response_model=List[models.AlertRule], summary="List Alert Rules")
+def list_rules(db: sqlite3.Connection = Depends(get_db)):
+    cursor = db.cursor()
+    cursor.execute(f"SELECT rule_id, {', '.join(RULE_FIELDS)} FROM alert_rules ORDER BY rule_id")
+    return [dict(row) for row in cursor.fetchall()]
+
+@router.post("/", response_model=models.AlertRule, status_code=201, summary="Create an Alert Rule")
+def create_rule(rule: models.AlertRuleCreate, db: sqlite3.Connection = Depends(get_db)):
+    _validate(rule)
+    cursor = db.cursor()
+    try:
+        cursor.execute(
+            f"INSERT INTO alert_rules ({', '.join(RULE_FIELDS)}) VALUES ({', '.join('?' for _ in RULE_FIELDS)})",
+            _values(rule)
+        )
+        db.commit()
+    except sqlite3.IntegrityError as e:
+        raise HTTPException(status_code=400, detail=f"Failed to create rule: {e}")
+    alerts.registry.invalidate()
+    return models.AlertRule(rule_id=cursor.lastrowid, **rule.model_dump())
+
+@router.put("/{rule_id}", response_model=models.AlertRule, summary="Replace an Alert Rule")
+def update_rule(rule_id: int, rule: models.AlertRuleCreate, db: sqlite3.Connection = Depends(get_db)):
+    _validate(rule)
+    cursor = db.cursor()
+    try:
+        cursor.execute(
+            f"UPDATE alert_rules SET {', '.join(f'{field} = ?' for field in RULE_FIELDS)} WHERE rule_id = ?",
+            _values(rule) + (rule_id,)
+        )
+    except sqlite3.IntegrityError as e:
+        raise HTTPException(status_code=400, detail=f"Failed to update rule: {e}")
+    if cursor.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Alert rule not found.")
+    db.commit()
+    alerts.registry.invalidate()
+    return models.AlertRule(rule_id=rule_id, **rule.model_dump())
+
+@router.post("/reload", summary="Recompile the Alert Rules from the Database")
+def reload_rules(db: sqlite3.Connection = Depends(get_db)):
+    ruleset = alerts.registry.reload(db)
+    return {"rules_loaded": len(ruleset.rules)}
@@ -1,13 +1,18 @@
 import pandas as pd
 import io
 import sqlite3
+import aiosqlite
 import numpy as np
 import math
-from typing import List, Dict, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Body, Query
-from app import models
-from app.database import get_db, engine
-from datetime import date
+from typing import List, Dict, Literal, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Body, Header, Query, Response, WebSocket
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from app import alert_stream, alerts, async_db, buckets, cache, colstore, database, derived, drift, etl, export, ingest_queue, models, parallel, rollups, serialization, telemetry, turbines
+from app.async_db import get_async_db
+from app.database import engine
+from app.pagination import build_page, keyset_query
+from datetime import date, datetime, timedelta, timezone
 from sqlalchemy.sql import text as sql_text
 
 router = APIRouter()
@@ -26,199 +31,234 @@ def log_anomaly_to_db(connection, turbine_id: int, timestamp: str, metric: str,
             }
         )
 
+# Rows are sent as stored, projected onto the fields of the declared response models.
+READING_FIELDS = serialization.fields(models.TurbineReading)
+ALERT_FIELDS = serialization.fields(models.Alert)
+
 @router.get("/sensor-metrics/{turbine_id}", response_model=models.PaginatedTurbineReadings, summary="Get Recent Sensor Metrics with Pagination")
-def get_sensor_metrics(
+async def get_sensor_metrics(
     turbine_id: int, 
     page: int = Query(1, ge=1, description="Page number to retrieve"), 
     page_size: int = Query(10, ge=1, le=100, description="Number of records per page"), 
-    db: sqlite3.Connection = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page; seeks instead of skipping"),
+    include_total: bool = Query(True, description="Set to false to skip the exact COUNT(*) of matching records"),
+    db: aiosqlite.Connection = Depends(get_async_db)
 ):
     """
-    Retrieves a paginated list of sensor readings for a specific turbine.
+    Retrieves a paginated list of sensor readings for a specific turbine, newest first.
+    Every page returns a `next_cursor`; passing it back continues the scan from the
+    (timestamp, id) position of the last row, so deep pages cost the same as the first.
     """
-    cursor = db.cursor()
-    
-    cursor.execute("SELECT COUNT(*) FROM sensor_readings WHERE turbine_id = ?", (turbine_id,))
-    total_items = cursor.fetchone()[0]
-    total_pages = math.ceil(total_items / page_size)
+    total_items = None
+    if include_total:
+        count = await db.execute_fetchall("SELECT COUNT(*) FROM sensor_readings WHERE turbine_id = ?", (turbine_id,))
+        total_items = count[0][0]
+
+    if cursor:
+        query, params = keyset_query("sensor_readings", "WHERE turbine_id = ?", [turbine_id], "id", cursor, page_size + 1)
+        readings = await db.execute_fetchall(query, params)
+    else:
+        offset = (page - 1) * page_size
+        readings = await db.execute_fetchall(
+            "SELECT * FROM sensor_readings WHERE turbine_id = ? ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+            (turbine_id, page_size + 1, offset)
+        )
 
-    offset = (page - 1) * page_size
-    cursor.execute(
-        "SELECT * FROM sensor_readings WHERE turbine_id = ? ORDER BY timestamp DESC LIMIT ? OFFSET ?",
-        (turbine_id, page_size, offset)
-    )
-    readings = cursor.fetchall()
+    return serialization.FastJSONResponse(build_page(readings, page_size, "id", total_items, page, READING_FIELDS))
+
+@router.get("/export", summary="Stream Sensor Readings as NDJSON, CSV or Arrow IPC")
+async def export_readings(
+    turbine_id: Optional[List[int]] = Query(None, description="Turbines to export (repeat the parameter for several); all when omitted"),
+    fmt: Literal["ndjson", "csv", "arrow"] = Query("ndjson", alias="format", description="Output format"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to export; every reading column when omitted"),
+    start_time: Optional[datetime] = Query(None, description="Inclusive start of the window (naive values are UTC)"),
+    end_time: Optional[datetime] = Query(None, description="Exclusive end of the window (naive values are UTC)"),
+    compression: Literal["none", "gzip", "zstd"] = Query("none", description="Compress the whole stream"),
+    chunk_size: int = Query(export.EXPORT_CHUNK_ROWS, ge=1, le=100_000, description="Rows read and encoded per chunk"),
+):
+    """
+    Streams every matching reading, archived ones included, without paging or building a
+    model per row: rows are read through one cursor in chunks of `chunk_size` and each chunk
+    is encoded straight to the output, so memory stays flat however much is exported.
+    """
+    if (start_time is None) != (end_time is None):
+        raise HTTPException(status_code=400, detail="start_time and end_time must be given together.")
+    # Compared once both are naive UTC, as one bound may carry an offset and the other not.
+    start, end = (_naive_utc(start_time), _naive_utc(end_time)) if start_time is not None else (None, None)
+    if start is not None and start >= end:
+        raise HTTPException(status_code=400, detail="start_time must be before end_time.")
+    try:
+        names = export.projection(columns)
+        export.check(fmt, compression)
+    except export.ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return {
-        "data": [dict(row) for row in readings],
-         "metadata": {
-            "total_items": total_items,
-            "total_pages": total_pages,
-            "current_page": page,
-            "page_size": len(readings)
-        },
-    }
+    # The body outlives the request's dependencies, so the stream holds its own connection;
+    # a full pool is waited on off the event loop.
+    try:
+        conn = await async_db.offload(database.pool.acquire)
+    except database.PoolTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    def body():
+        try:
+            yield from export.stream(conn, names, fmt, compression, turbine_id, start, end, chunk_size)
+        finally:
+            database.pool.release(conn)
+
+    # The background task runs once the response ends, also when the client disconnects
+    # midway; closing the body then ends its read transaction and returns the connection.
+    stream = body()
+    media_type, extension = export.FORMATS[fmt]
+    compressed_type, suffix = export.COMPRESSIONS[compression]
+    headers = {"Content-Disposition": f'attachment; filename="readings.{extension}{suffix}"'}
+    return StreamingResponse(stream, media_type=compressed_type or media_type, headers=headers, background=BackgroundTask(stream.close))
+
+# HealthSummary average fields and the rollup metric each one reads.
+HEALTH_SUMMARY_AVERAGES = {
+    "avg_shaft_torque_gtt": "gtt", "avg_exit_temp_t48": "t48", "avg_pressure_ratio": "pressure_ratio",
+    "avg_thermal_efficiency_percent": "thermal_efficiency", "avg_compressor_efficiency_percent": "compressor_efficiency",
+    "avg_compressor_decay": "decay_coeff_comp", "avg_turbine_decay": "decay_coeff_turbine",
+    "avg_power_proxy_kw": "power_proxy_kw", "avg_total_decay_score": "total_decay_score",
+    "avg_temp_ratio_t48_p48": "temp_ratio_t48_p48", "avg_temp_ratio_t1_p1": "temp_ratio_t1_p1",
+    "avg_temp_ratio_t2_p2": "temp_ratio_t2_p2", "avg_torque_diff": "torque_diff",
+    "avg_rpm_ratio_gtn_ggn": "rpm_ratio_gtn_ggn", "avg_fuel_per_rpm": "fuel_per_rpm",
+    "avg_total_prop_torque": "total_prop_torque",
+}
+
+def _json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
 
 @router.get("/health-summary", response_model=models.PaginatedHealthSummary, summary="Get Paginated Health Summary for Turbines")
-def get_health_summary(
+async def get_health_summary(
     page: int = Query(1, ge=1, description="Page number of turbines to analyze"), 
-    page_size: int = Query(10, ge=1, le=50, description="Number of turbines per page"), 
-    db: sqlite3.Connection = Depends(get_db)
+    page_size: int = Query(10, ge=1, le=50, description="Number of turbines per page")
 ):
     """
-    Calculates and returns a health summary. The pagination is applied to the list of turbines
-    to ensure the calculation is performed on a manageable subset of data.
+    Returns a health summary per turbine. Every figure is read from the turbine_rollups table,
+    which the write paths keep current, so the cost depends on the page size, not on history.
+    Pages are served from the response cache until a write touches one of their turbines or
+    adds a new one.
     """
-    cursor = db.cursor()
-    cursor.execute("SELECT DISTINCT turbine_id FROM sensor_readings ORDER BY turbine_id")
-    turbine_ids = [row[0] for row in cursor.fetchall()]
+    lookup = cache.response_cache.lookup(("health-summary", page, page_size), fleet=True)
+    if lookup.body is not None:
+        return _json_response(lookup.body)
 
-    total_items = len(turbine_ids)
+    body, paginated_ids = await async_db.offload_read(_health_summary_page, page, page_size)
+    cache.response_cache.store(lookup, body, paginated_ids)
+    return _json_response(body)
+
+def _health_summary_page(db: sqlite3.Connection, page: int, page_size: int) -> Tuple[bytes, List[int]]:
+    total_items = rollups.count_turbines(db)
     total_pages = math.ceil(total_items / page_size)
 
-    offset = (page - 1) * page_size
-    paginated_ids = turbine_ids[offset : offset + page_size]
+    paginated_ids = rollups.page_turbines(db, page_size, (page - 1) * page_size)
 
     if not paginated_ids:
-        return { "data": [], "metadata": {"total_items": total_items, "total_pages": total_pages, "current_page": page, "page_size": 0},}
-    
-    placeholders = ','.join('?' for _ in paginated_ids)
-    query = f"SELECT * FROM sensor_readings WHERE turbine_id IN ({placeholders})"
-    
-    df = pd.read_sql_query(query, db, params=paginated_ids)
-    
-    gamma = 1.4
-    k_to_c = 273.15
-    
-    df['pressure_ratio'] = df['p2'] / df['p1']
-    t1_k, t2_k = df['t1'] + k_to_c, df['t2'] + k_to_c
-    t2s_k = t1_k * (df['pressure_ratio']**((gamma - 1) / gamma))
-    df['compressor_efficiency'] = ((t2s_k - t1_k) / (t2_k - t1_k)) * 100
-    df['thermal_efficiency'] = (1 - (1 / (df['pressure_ratio']**((gamma - 1) / gamma)))) * 100
-    
-    df['temp_ratio_t48_p48'] = df['t48'] / df['p48']
-    df['temp_ratio_t1_p1'] = df['t1'] / df['p1']
-    df['temp_ratio_t2_p2'] = df['t2'] / df['p2']
-    df['torque_diff'] = df['ts'] - df['tp']
-    df['rpm_ratio_gtn_ggn'] = df['gtn'] / df['ggn']
-    df['fuel_per_rpm'] = df['mf'] / df['gtn']
-    df['total_prop_torque'] = df['ts'] + df['tp']
-    
-    angular_velocity_rad_s = df['gtn'] * (2 * np.pi / 60)
-    df['power_proxy_kw'] = (df['gtt'] * angular_velocity_rad_s)
-    df['total_decay_score'] = (1 - df['decay_coeff_comp']) + (1 - df['decay_coeff_turbine'])
-    
-    df.replace([np.inf, -np.inf], np.nan, inplace=True)
-
-    summary_groups = df.groupby('turbine_id').agg(
-        record_count=('mf', 'count'), total_fuel_usage=('mf', 'sum'),
-        avg_shaft_torque_gtt=('gtt', 'mean'), avg_exit_temp_t48=('t48', 'mean'),
-        avg_pressure_ratio=('pressure_ratio', 'mean'), avg_thermal_efficiency_percent=('thermal_efficiency', 'mean'),
-        avg_compressor_efficiency_percent=('compressor_efficiency', 'mean'),
-        avg_compressor_decay=('decay_coeff_comp', 'mean'), avg_turbine_decay=('decay_coeff_turbine', 'mean'),
-        avg_power_proxy_kw=('power_proxy_kw', 'mean'), avg_total_decay_score=('total_decay_score', 'mean'),
-        avg_temp_ratio_t48_p48=('temp_ratio_t48_p48', 'mean'), avg_temp_ratio_t1_p1=('temp_ratio_t1_p1', 'mean'),
-        avg_temp_ratio_t2_p2=('temp_ratio_t2_p2', 'mean'), avg_torque_diff=('torque_diff', 'mean'),
-        avg_rpm_ratio_gtn_ggn=('rpm_ratio_gtn_ggn', 'mean'), avg_fuel_per_rpm=('fuel_per_rpm', 'mean'),
-        avg_total_prop_torque=('total_prop_torque', 'mean')
-    ).reset_index()
-
-    results = summary_groups.to_dict(orient='records')
-    return {
+        return serialization.dumps({ "data": [], "metadata": {"total_items": total_items, "total_pages": total_pages, "current_page": page, "page_size": 0, "next_cursor": None},}), paginated_ids
+
+    summaries = rollups.load(db, paginated_ids)
+    results = []
+    for turbine_id in paginated_ids:
+        moments = summaries.get(turbine_id, {})
+        record_count, total_fuel_usage, _ = moments.get('mf', (0, 0.0, 0.0))
+        summary = {"turbine_id": turbine_id, "record_count": record_count, "total_fuel_usage": total_fuel_usage}
+        summary.update({field: rollups.mean(moments, metric) for field, metric in HEALTH_SUMMARY_AVERAGES.items()})
+        results.append(summary)
+
+    body = serialization.dumps({
        
         "data": results,
          "metadata": {
             "total_items": total_items,
             "total_pages": total_pages,
             "current_page": page,
-            "page_size": len(results)
+            "page_size": len(results),
+            "next_cursor": None
         },
-    }
+    })
+    return body, paginated_ids
 
 
 @router.post("/upload-data/{turbine_id}", status_code=status.HTTP_201_CREATED, summary="Upload, Process, Store, and Analyze Data for Anomalies (ETL)")
-def upload_sensor_data_from_csv(turbine_id: int, file: UploadFile = File(...), db: sqlite3.Connection = Depends(get_db)):
-    cursor = db.cursor()
-    cursor.execute("SELECT turbine_id FROM turbine_metadata WHERE turbine_id = ?", (turbine_id,))
-    if not cursor.fetchone():
+async def upload_sensor_data_from_csv(
+    turbine_id: int,
+    file: UploadFile = File(...),
+    streaming: bool = Query(False, description="Process the file in fixed-size chunks with bounded memory"),
+    chunk_size: int = Query(etl.DEFAULT_CHUNK_SIZE, ge=100, le=1_000_000, description="Rows per chunk in streaming mode"),
+    clip_reference: Literal["upload", "history"] = Query("upload", description="Derive IQR clip bounds from this upload only, or from the turbine's persisted history merged with it"),
+    smoothing: Literal["sma", "ema"] = Query(etl.SMOOTHING_KIND, description="Rolling mean or exponential moving average; either continues from the turbine's previous upload")
+):
+    """
+    Parsing runs on the offload executor and everything that reads or writes the database
+    (history sketches, alert rules, the insert) on the writer connection: in one transaction,
+    or in streaming mode in one per chunk, so a large file never holds the writer for long.
+    """
+    if await _unknown_turbines([turbine_id]):
         raise HTTPException(status_code=404, detail=f"Turbine with ID {turbine_id} not found.")
 
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Invalid file type.")
 
+    if streaming:
+        return await _upload_streaming(turbine_id, file, chunk_size, clip_reference, smoothing)
+
+    df = await async_db.offload(_parse_upload, await file.read())
+    return await async_db.db.write(_load_upload, turbine_id, df, clip_reference, smoothing)
+
+async def _unknown_turbines(turbine_ids: List[int]) -> List[int]:
+    # Off the event loop: a cold registry or an id it has not seen costs a query.
+    return await async_db.offload_read(turbines.registry.missing, turbine_ids)
+
+def _parse_upload(contents: bytes) -> pd.DataFrame:
     try:
-        contents = file.file.read()
         df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
         df.rename(columns=lambda x: x.lower().strip(), inplace=True)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to read or parse CSV file: {e}")
 
-    column_mapping = {
-        "lever position (lp)": "lp", "ship speed (v) [knots]": "v", "gas turbine shaft torque (gtt) [kn/m]": "gtt",
-        "gas turbine revolutions (gtn) [rpm]": "gtn", "gas generator revolutions (ggn) [rpm]": "ggn",
-        "starboard propeller torque (ts) [kn/m]": "ts", "port propeller torque (tp) [kn/m]": "tp",
-        "hp turbine exit temperature (t48) [°c]": "t48", "compressor inlet air temperature (t1) [°c]": "t1",
-        "compressor outlet air temperature (t2) [°c]": "t2", "hp turbine exit pressure (p48) [bar]": "p48",
-        "compressor inlet air pressure (p1) [bar]": "p1", "compressor outlet air pressure (p2) [bar]": "p2",
-        "exhaust gas pressure [bar]": "pexh", "turbine injection control (tic) [%]": "tic",
-        "fuel flow (mf) [kg/s]": "mf", "compressor decay coefficient": "decay_coeff_comp",
-        "turbine decay coefficient": "decay_coeff_turbine"
-    }
-    df.rename(columns=column_mapping, inplace=True)
+    df.rename(columns=etl.COLUMN_MAPPING, inplace=True)
     
-    required_cols = list(column_mapping.values())
-    if not all(col in df.columns for col in required_cols):
-        missing_cols = [col for col in required_cols if col not in df.columns]
+    required_cols = etl.REQUIRED_COLUMNS
+    missing_cols = etl.missing_columns(df.columns)
+    if missing_cols:
         raise HTTPException(status_code=400, detail=f"CSV is missing required columns: {missing_cols}")
 
     df.drop_duplicates(inplace=True)
     for col in required_cols:
         if df[col].isnull().any():
             df[col].fillna(df[col].median(), inplace=True)
+    return df
+
+def _load_upload(db: sqlite3.Connection, turbine_id: int, df: pd.DataFrame, clip_reference: str, smoothing: str) -> dict:
+    required_cols = etl.REQUIRED_COLUMNS
     numeric_cols = df.select_dtypes(include=np.number).columns.tolist()
     if 'index' in numeric_cols: numeric_cols.remove('index')
-    for col in numeric_cols:
-        Q1, Q3 = df[col].quantile(0.25), df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound, upper_bound = Q1 - 1.5 * IQR, Q3 + 1.5 * IQR
+    unsmoothed = df[required_cols].copy()
+    upload_sketches = {col: etl.new_sketch().update(df[col].to_numpy()) for col in required_cols}
+    history_sketches = etl.fold_into_history(db, turbine_id, upload_sketches)
+    bounds = etl.iqr_bounds(df, numeric_cols)
+    if clip_reference == "history":
+        bounds.update(etl.sketch_bounds(history_sketches))
+    for col, (lower_bound, upper_bound) in bounds.items():
         df[col] = df[col].clip(lower_bound, upper_bound)
-    df[numeric_cols] = df[numeric_cols].rolling(window=3, min_periods=1).mean()
+    smoother = etl.load_smoother(db, turbine_id, smoothing)
+    df[required_cols] = smoother.apply(df[required_cols].to_numpy())
+    etl.save_smoother(db, turbine_id, smoother)
     if 'timestamp' not in df.columns:
         df['timestamp'] = pd.to_datetime(pd.Timestamp.now()).strftime('%Y-%m-%d %H:%M:%S')
 
-    alerts_to_log = []
-    t48_alerts = df[df['t48'] > 600].copy()
-    if not t48_alerts.empty:
-        t48_alerts['metric'], t48_alerts['alert_type'], t48_alerts['severity'] = 't48', 'Overheat', 'Critical'
-        t48_alerts['actual_value'], t48_alerts['threshold_value'] = t48_alerts['t48'], 900.0
-        t48_alerts['description'] = t48_alerts.apply(lambda row: f"T48={row['t48']:.2f}°C exceeds threshold", axis=1)
-        alerts_to_log.append(t48_alerts)
-    
-    mf_alerts = df[df['mf'] > 0.3].copy()
-    if not mf_alerts.empty:
-        mf_alerts['metric'], mf_alerts['alert_type'], mf_alerts['severity'] = 'mf', 'High Fuel Flow', 'Critical'
-        mf_alerts['actual_value'], mf_alerts['threshold_value'] = mf_alerts['mf'], 0.3
-        mf_alerts['description'] = mf_alerts.apply(lambda row: f"mf={row['mf']:.2f} kg/s exceeds threshold", axis=1)
-        alerts_to_log.append(mf_alerts)
-
-    alerts_found = 0
+    writes = cache.WriteSet()
+    detected_alerts = etl.detect_alerts(df, turbine_id, alerts.registry.rules(db)) + etl.detect_drift(db, df, unsmoothed, turbine_id, writes)
+
     try:
-        if alerts_to_log:
-            alert_cols = ['turbine_id', 'timestamp', 'metric', 'alert_type', 'severity', 'actual_value', 'threshold_value', 'description']
-            all_alerts_df = pd.concat(alerts_to_log, ignore_index=True)
-            all_alerts_df['turbine_id'] = turbine_id
-            final_alerts_df = all_alerts_df[alert_cols]
-            alerts_found = len(final_alerts_df)
-            final_alerts_df.to_sql('alerts', con=db, if_exists='append', index=False)
-
-        df = df.round(4)
-        df['turbine_id'] = turbine_id
-        load_df = df[required_cols + ['turbine_id']]
-        load_df.to_sql('sensor_readings', con=db, if_exists='append', index=False)
+        alerts_found = alerts.insert_alerts(db, detected_alerts, writes)
+        rows_loaded = etl.insert_readings(db, df.round(4), turbine_id, writes)
 
         db.commit()
+        etl.after_commit(writes)
         
-        response_message = f"Successfully processed and loaded {len(load_df)} records for turbine ID {turbine_id}."
+        response_message = f"Successfully processed and loaded {rows_loaded} records for turbine ID {turbine_id}."
         if alerts_found > 0:
             response_message += f" Found and logged {alerts_found} anomalies."
         return {"message": response_message, "anomalies_logged_count": alerts_found}
@@ -227,198 +267,258 @@ def upload_sensor_data_from_csv(turbine_id: int, file: UploadFile = File(...), d
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to load data into database: {e}")
 
+async def _upload_streaming(turbine_id: int, file: UploadFile, chunk_size: int, clip_reference: str, smoothing: str):
+    """
+    Streaming variant of the upload ETL: the spooled upload is parsed and cleaned one chunk at a
+    time on the offload executor, and each chunk is inserted and committed on the writer. The
+    whole file is parsed once before the first insert, so a malformed upload writes nothing;
+    a chunk that fails to insert stops the upload, keeping the chunks before it.
+    """
+    ingestor = etl.StreamingCsvIngestor(turbine_id, chunk_size=chunk_size, clip_reference=clip_reference, smoothing_kind=smoothing)
+    try:
+        await async_db.offload(ingestor.sketch, file.file)
+        await async_db.db.write(ingestor.prepare)
+        chunks = ingestor.chunks(file.file)
+        while True:
+            prepared = await async_db.offload(next, chunks, None)
+            if prepared is None:
+                break
+            await async_db.db.write(ingestor.load, *prepared)
+    except HTTPException:
+        raise
+    except etl.CsvFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Failed to read or parse CSV file: {e}{_loaded_before(ingestor)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load data into database: {e}{_loaded_before(ingestor)}")
+
+    response_message = f"Successfully processed and loaded {ingestor.rows_loaded} records for turbine ID {turbine_id} in {ingestor.chunks_loaded} chunks."
+    if ingestor.alerts_logged > 0:
+        response_message += f" Found and logged {ingestor.alerts_logged} anomalies."
+    return {"message": response_message, "anomalies_logged_count": ingestor.alerts_logged, "chunks_processed": ingestor.chunks_loaded}
+
+def _loaded_before(ingestor: etl.StreamingCsvIngestor) -> str:
+    if not ingestor.rows_loaded:
+        return ""
+    return f" ({ingestor.rows_loaded} records in {ingestor.chunks_loaded} chunks were loaded before the failure)"
+
 
 @router.post("/alerts", response_model=models.Alert, status_code=status.HTTP_201_CREATED, summary="Log a New Anomaly Alert")
-def log_alert(alert: models.AlertCreate, db: sqlite3.Connection = Depends(get_db)):
-    cursor = db.cursor()
+async def log_alert(alert: models.AlertCreate):
+    return await async_db.db.write(_insert_alert, alert)
+
+def _insert_alert(db: sqlite3.Connection, alert: models.AlertCreate) -> models.Alert:
+    values = alert.model_dump()
+    writes = cache.WriteSet()
     try:
-        cursor.execute(
-             """
-            INSERT INTO alerts (turbine_id, timestamp, metric, alert_type, severity, actual_value, threshold_value, description) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (alert.turbine_id, alert.timestamp, alert.metric, alert.alert_type, alert.severity, 
-             alert.actual_value, alert.threshold_value, alert.description)
-        )
+        alerts.insert_alerts(db, [tuple(values[name] for name in alerts.ALERT_COLUMNS)], writes)
         db.commit()
-        alert_id = cursor.lastrowid
-        return models.Alert(alert_id=alert_id, **alert.model_dump())
     except sqlite3.IntegrityError as e:
         raise HTTPException(status_code=400, detail=f"Database error: {e}")
+    etl.after_commit(writes)
+    alert_id = writes.alerts[0][0]
+    return models.Alert(alert_id=alert_id, **values)
+
+@router.get("/alerts/stream", summary="Stream New Anomaly Alerts as Server-Sent Events")
+async def stream_alerts(
+    turbine_id: Optional[List[int]] = Query(None, description="Turbines to follow (repeat the parameter for several); all when omitted"),
+    severity: Optional[List[str]] = Query(None, description="Severities to follow (repeat the parameter for several); all when omitted"),
+    last_event_id: Optional[int] = Query(None, description="Replay stored alerts after this alert_id before streaming new ones"),
+    last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID", description="Set by EventSource when it reconnects; same as last_event_id"),
+):
+    """
+    Pushes every alert committed from now on (by /alerts, /sensor-reading(s), uploads and
+    write-behind ingestion) as an `alert` event whose id is the alert_id, so consoles need
+    not poll /alerts. Each client has a bounded buffer; when it falls behind, the oldest
+    alerts are dropped and a `dropped` event says how many, after which the client can
+    reconnect with the last id it saw to have them replayed from the database.
+    """
+    resume_after = last_event_id if last_event_id is not None else last_event_id_header
+    # Attached before the replay query runs, so no alert falls between the two.
+    subscription = alert_stream.hub.subscribe(turbine_id, severity)
+    # The body outlives the request's dependencies; reader connections are shared and stay open.
+    reader = await async_db.db.reader()
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(alert_stream.sse(reader, subscription, resume_after), media_type="text/event-stream", headers=headers)
 
 @router.get("/alerts", response_model=models.PaginatedAlerts, summary="Get Paginated Anomaly Alerts with Date Filter")
-def get_alerts(
+async def get_alerts(
     turbine_id: Optional[int] = None, 
     start_date: Optional[date] = None, 
     end_date: Optional[date] = None, 
     page: int = Query(1, ge=1, description="Page number to retrieve"), 
     page_size: int = Query(10, ge=1, le=100, description="Number of records per page"), 
-    db: sqlite3.Connection = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page; seeks instead of skipping"),
+    include_total: bool = Query(True, description="Set to false to skip the exact COUNT(*) of matching alerts"),
+    db: aiosqlite.Connection = Depends(get_async_db)
 ):
     """
     Retrieves a paginated list of alerts, with optional filters for turbine ID and date range.
+    Supports the same cursor mode as /sensor-metrics, keyed on (timestamp, alert_id).
     """
-    cursor = db.cursor()
-    
     where_clause = "WHERE 1=1"
     params = []
     if turbine_id:
         where_clause += " AND turbine_id = ?"
         params.append(turbine_id)
     if start_date and end_date:
-        where_clause += " AND date(timestamp) BETWEEN ? AND ?"
+        where_clause += " AND alert_date BETWEEN ? AND ?"
         params.extend([start_date.isoformat(), end_date.isoformat()])
         
-    count_query = f"SELECT COUNT(*) FROM alerts {where_clause}"
-    cursor.execute(count_query, params)
-    total_items = cursor.fetchone()[0]
-    total_pages = math.ceil(total_items / page_size)
-
-    offset = (page - 1) * page_size
-    data_query = f"SELECT * FROM alerts {where_clause} ORDER BY timestamp DESC LIMIT ? OFFSET ?"
-    params.extend([page_size, offset])
+    total_items = None
+    if include_total:
+        count_query = f"SELECT COUNT(*) FROM alerts {where_clause}"
+        count = await db.execute_fetchall(count_query, params)
+        total_items = count[0][0]
+
+    if cursor:
+        data_query, params = keyset_query("alerts", where_clause, params, "alert_id", cursor, page_size + 1)
+    else:
+        offset = (page - 1) * page_size
+        data_query = f"SELECT * FROM alerts {where_clause} ORDER BY timestamp DESC, alert_id DESC LIMIT ? OFFSET ?"
+        params.extend([page_size + 1, offset])
     
-    cursor.execute(data_query, params)
-    alerts = cursor.fetchall()
+    alert_rows = await db.execute_fetchall(data_query, params)
     
-    return {
-      
-        "data": [dict(row) for row in alerts],
-        "metadata": {
-            "total_items": total_items,
-            "total_pages": total_pages,
-            "current_page": page,
-            "page_size": len(alerts)
-        },
-    }
+    return serialization.FastJSONResponse(build_page(alert_rows, page_size, "alert_id", total_items, page, ALERT_FIELDS))
+
+def _report_window(filters: models.TimeFilterRequest) -> Optional[Tuple[datetime, datetime]]:
+    """Half-open UTC window of the filters; as before, a window needs both of its ends."""
+    start = filters.start_time or (datetime.combine(filters.start_date, datetime.min.time()) if filters.start_date else None)
+    if filters.end_time:
+        end = filters.end_time + timedelta(milliseconds=1)
+    elif filters.end_date:
+        end = datetime.combine(filters.end_date + timedelta(days=1), datetime.min.time())
+    else:
+        end = None
+    if start is None or end is None:
+        return None
+    return _naive_utc(start), _naive_utc(end)
+
+def _naive_utc(instant: datetime) -> datetime:
+    return instant.astimezone(timezone.utc).replace(tzinfo=None) if instant.tzinfo else instant
 
 @router.post("/analytics-report", response_model=Dict[int, models.TurbineAnalyticsReport], summary="Get Advanced Analytics Report")
-def get_analytics_report(filters: models.TimeFilterRequest = Body(...), db: sqlite3.Connection = Depends(get_db)):
-    placeholders = ','.join('?' for _ in filters.turbine_ids)
-    
-    if filters.start_date and filters.end_date:
-        query = f"SELECT * FROM sensor_readings WHERE date(timestamp) BETWEEN ? AND ? AND turbine_id IN ({placeholders})"
-        params = [filters.start_date.isoformat(), filters.end_date.isoformat()] + filters.turbine_ids
-    else:
-        query = f"SELECT * FROM sensor_readings WHERE turbine_id IN ({placeholders})"
-        params = filters.turbine_ids
+async def get_analytics_report(filters: models.TimeFilterRequest = Body(...)):
+    """
+    Composes each turbine's report from the daily and hourly buckets that exactly cover the
+    window, reading raw rows only for its sub-hour edges, so cost grows with the number of
+    buckets rather than the number of readings; fleet-sized requests are split across the
+    analytics process pool. Reports are cached per normalized filter (distinct turbines and
+    window) until a write overlaps one of those turbines in that window. Composition runs on
+    the offload executor.
+    """
+    turbine_ids, window = tuple(sorted(set(filters.turbine_ids))), _report_window(filters)
+    lookup = cache.response_cache.lookup(("analytics-report", turbine_ids, window))
+    if lookup.body is not None:
+        return _json_response(lookup.body)
 
-    df = pd.read_sql_query(query, db, params=params)
-    if df.empty:
+    body = await async_db.offload_read(_analytics_reports, turbine_ids, window)
+    if body is None:
         raise HTTPException(status_code=404, detail="No data found for the specified filters.")
-    
-    reports = {turbine_id: calculate_analytics(group) for turbine_id, group in df.groupby('turbine_id')}
-    return reports
+    cache.response_cache.store(lookup, body, turbine_ids, window)
+    return _json_response(body)
+
+def _analytics_reports(db: sqlite3.Connection, turbine_ids: Tuple[int, ...], window: Optional[Tuple[datetime, datetime]]) -> Optional[bytes]:
+    aggregates = parallel.pool.compose(database.DATABASE_PATH, db, turbine_ids, window)
+    if not aggregates:
+        return None
+
+    reports = {}
+    for turbine_id, agg in aggregates.items():
+        count = agg['record_count']
+        stats = {
+            metric: {"min": agg[f"{metric}_min"], "avg": agg[f"{metric}_sum"] / count, "max": agg[f"{metric}_max"]}
+            for metric in buckets.STATS_METRICS
+        }
+        period_start, period_end = agg['first_timestamp'], agg['last_timestamp']
+        reports[turbine_id] = analytics_report(
+            count, period_start if pd.notna(period_start) else "N/A", period_end if pd.notna(period_end) else "N/A", stats
+        )
+    return serialization.dumps(reports)
+
+def analytics_report(record_count: int, period_start: str, period_end: str, stats: Dict[str, dict]) -> dict:
+    """A TurbineAnalyticsReport as plain dicts; `stats` maps each metric to {"min", "avg", "max"}."""
+    return dict(
+        record_count=record_count,
+        period_start=period_start,
+        period_end=period_end,
+        compressor_stats=dict(
+            inlet_temp_t1=stats['t1'],
+            outlet_temp_t2=stats['t2'],
+            inlet_pressure_p1=stats['p1'],
+            outlet_pressure_p2=stats['p2'],
+            pressure_ratio=stats['pressure_ratio']
+        ),
+        turbine_stats=dict(
+            exit_temp_t48=stats['t48'],
+            exit_pressure_p48=stats['p48'],
+            shaft_torque_gtt=stats['gtt'],
+            rpm_gtn=stats['gtn'],
+            generator_rpm_ggn=stats['ggn'],
+            power_proxy_kw=stats['power_proxy_kw']
+        ),
+        efficiency_metrics=dict(
+            thermal_efficiency_percent=stats['thermal_efficiency'],
+            compressor_efficiency_percent=stats['compressor_efficiency'],
+            fuel_per_rpm=stats['fuel_per_rpm'],
+            rpm_ratio_gtn_ggn=stats['rpm_ratio_gtn_ggn']
+        ),
+        decay_metrics=dict(
+            total_decay_score=stats['total_decay_score']
+        ),
+        temp_pressure_ratios=dict(
+            temp_ratio_t48_p48=stats['temp_ratio_t48_p48'],
+            temp_ratio_t1_p1=stats['temp_ratio_t1_p1'],
+            temp_ratio_t2_p2=stats['temp_ratio_t2_p2']
+        ),
+        torque_metrics=dict(
+            torque_diff=stats['torque_diff'],
+            total_prop_torque=stats['total_prop_torque']
+        )
+    )
 
 def calculate_analytics(df: pd.DataFrame):
+    """Reference implementation over raw readings, which the bucket composition must match."""
     df.columns = df.columns.str.lower()
-    gamma = 1.4
-    k_to_c = 273.15
-
-    df['pressure_ratio'] = df['p2'] / df['p1']
-    t1_k, t2_k = df['t1'] + k_to_c, df['t2'] + k_to_c
-    t2s_k = t1_k * (df['pressure_ratio']**((gamma - 1) / gamma))
-    df['compressor_efficiency'] = ((t2s_k - t1_k) / (t2_k - t1_k)) * 100
-    df['thermal_efficiency'] = (1 - (1 / (df['pressure_ratio']**((gamma - 1) / gamma)))) * 100
-    
-    df['temp_ratio_t48_p48'] = df['t48'] / df['p48']
-    df['temp_ratio_t1_p1'] = df['t1'] / df['p1']
-    df['temp_ratio_t2_p2'] = df['t2'] / df['p2']
-    df['torque_diff'] = df['ts'] - df['tp']
-    df['rpm_ratio_gtn_ggn'] = df['gtn'] / df['ggn']
-    df['fuel_per_rpm'] = df['mf'] / df['gtn']
-    df['total_prop_torque'] = df['ts'] + df['tp']
-    angular_velocity_rad_s = df['gtn'] * (2 * np.pi / 60)
-    df['power_proxy_kw'] = df['gtt'] * angular_velocity_rad_s
-    df['total_decay_score'] = (1 - df['decay_coeff_comp']) + (1 - df['decay_coeff_turbine'])
-
-    df.replace([np.inf, -np.inf], np.nan, inplace=True)
+    derived.add_derived_columns(df)
 
     def get_stats(series):
         series.fillna(0, inplace=True)
-        return models.Stats(min=series.min(), avg=series.mean(), max=series.max())
+        return {"min": series.min(), "avg": series.mean(), "max": series.max()}
 
     start_time = df['timestamp'].min()
     end_time = df['timestamp'].max()
 
-    return models.TurbineAnalyticsReport(
-        record_count=len(df),
-        period_start=str(start_time) if pd.notna(start_time) else "N/A",
-        period_end=str(end_time) if pd.notna(end_time) else "N/A",
-        compressor_stats=models.CompressorStats(
-            inlet_temp_t1=get_stats(df['t1']),
-            outlet_temp_t2=get_stats(df['t2']),
-            inlet_pressure_p1=get_stats(df['p1']),
-            outlet_pressure_p2=get_stats(df['p2']),
-            pressure_ratio=get_stats(df['pressure_ratio'])
-        ),
-        turbine_stats=models.TurbineStats(
-            exit_temp_t48=get_stats(df['t48']),
-            exit_pressure_p48=get_stats(df['p48']),
-            shaft_torque_gtt=get_stats(df['gtt']),
-            rpm_gtn=get_stats(df['gtn']),
-            generator_rpm_ggn=get_stats(df['ggn']),
-            power_proxy_kw=get_stats(df['power_proxy_kw'])
-        ),
-        efficiency_metrics=models.EfficiencyMetrics(
-            thermal_efficiency_percent=get_stats(df['thermal_efficiency']),
-            compressor_efficiency_percent=get_stats(df['compressor_efficiency']),
-            fuel_per_rpm=get_stats(df['fuel_per_rpm']),
-            rpm_ratio_gtn_ggn=get_stats(df['rpm_ratio_gtn_ggn'])
-        ),
-        decay_metrics=models.DecayMetrics(
-            total_decay_score=get_stats(df['total_decay_score'])
-        ),
-        temp_pressure_ratios=models.TemperaturePressureRatios(
-            temp_ratio_t48_p48=get_stats(df['temp_ratio_t48_p48']),
-            temp_ratio_t1_p1=get_stats(df['temp_ratio_t1_p1']),
-            temp_ratio_t2_p2=get_stats(df['temp_ratio_t2_p2'])
-        ),
-        torque_metrics=models.TorqueMetrics(
-            torque_diff=get_stats(df['torque_diff']),
-            total_prop_torque=get_stats(df['total_prop_torque'])
-        )
-    )
+    return models.TurbineAnalyticsReport.model_validate(analytics_report(
+        len(df),
+        str(start_time) if pd.notna(start_time) else "N/A",
+        str(end_time) if pd.notna(end_time) else "N/A",
+        {metric: get_stats(df[metric]) for metric in buckets.STATS_METRICS}
+    ))
 
 @router.post("/sensor-reading/{turbine_id}", response_model=models.TurbineReading, status_code=status.HTTP_201_CREATED, summary="Append a Single Sensor Reading and Check for Anomalies")
-def log_single_reading(turbine_id: int, reading_data: models.TurbineReadingCreate, db: sqlite3.Connection = Depends(get_db)):
-    cursor = db.cursor()
-    
-    cursor.execute("SELECT turbine_id FROM turbine_metadata WHERE turbine_id = ?", (turbine_id,))
-    if not cursor.fetchone():
+async def log_single_reading(
+    turbine_id: int,
+    reading_data: models.TurbineReadingCreate,
+    write_behind: bool = Query(False, description="Acknowledge with 202 once queued; the reading is committed in a later group commit")
+):
+    if write_behind:
+        if await _unknown_turbines([turbine_id]):
+            raise HTTPException(status_code=404, detail=f"Turbine with ID {turbine_id} not found.")
+        return _enqueue_reading(turbine_id, reading_data)
+    return await async_db.db.write(_insert_single_reading, turbine_id, reading_data)
+
+def _insert_single_reading(db: sqlite3.Connection, turbine_id: int, reading_data: models.TurbineReadingCreate) -> dict:
+    if not turbines.registry.exists(db, turbine_id):
         raise HTTPException(status_code=404, detail=f"Turbine with ID {turbine_id} not found.")
 
-    
-    pressure_ratio = reading_data.p2 / reading_data.p1 if reading_data.p1 != 0 else 0
+    cursor = db.cursor()
     timestamp_str = reading_data.timestamp.isoformat()
-    
-    if reading_data.t48 > 950:
-        desc = f"Critical Turbine Exit Temperature: {reading_data.t48:.2f} °C"
-        cursor.execute(
-            "INSERT INTO alerts (turbine_id, timestamp, metric, alert_type, severity, actual_value, threshold_value, description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (turbine_id, timestamp_str, "t48", "Overheat", "High", reading_data.t48, 950.0, desc)
-        )
-
-    if reading_data.decay_coeff_turbine < 0.96:
-        desc = f"Medium Turbine Decay Detected: {reading_data.decay_coeff_turbine:.4f}"
-        cursor.execute(
-            "INSERT INTO alerts (turbine_id, timestamp, metric, alert_type, severity, actual_value, threshold_value, description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (turbine_id, timestamp_str, "decay_coeff_turbine", "Component Decay", "Medium", reading_data.decay_coeff_turbine, 0.96, desc)
-        )
-
-    if reading_data.decay_coeff_comp < 0.96:
-        desc = f"Medium Compressor Decay Detected: {reading_data.decay_coeff_comp:.4f}"
-        cursor.execute(
-            "INSERT INTO alerts (turbine_id, timestamp, metric, alert_type, severity, actual_value, threshold_value, description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (turbine_id, timestamp_str, "decay_coeff_comp", "Component Decay", "Medium", reading_data.decay_coeff_comp, 0.96, desc)
-        )
-        
-    if pressure_ratio < 9.0 and reading_data.gtn > 1500: 
-        desc = f"Low Pressure Ratio at Speed: {pressure_ratio:.2f}"
-        cursor.execute(
-            "INSERT INTO alerts (turbine_id, timestamp, metric, alert_type, severity, actual_value, threshold_value, description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (turbine_id, timestamp_str, "pressure_ratio", "Pressure Anomaly", "Low", pressure_ratio, 9.0, desc)
-        )
+    reading_columns = {name: np.array([value]) for name, value in reading_data.model_dump(exclude={"timestamp"}).items()}
+    writes = cache.WriteSet()
+    alerts.insert_alerts(db, etl.check_readings(db, reading_columns, np.array([timestamp_str]), turbine_id, writes), writes)
 
     columns = [
         'timestamp', 'lp', 'v', 'gtt', 'gtn', 'ggn', 'ts', 'tp', 't48', 't1', 't2',
@@ -438,8 +538,14 @@ def log_single_reading(turbine_id: int, reading_data: models.TurbineReadingCreat
     try:
         query = f"INSERT INTO sensor_readings ({', '.join(columns)}) VALUES ({placeholders})"
         cursor.execute(query, data_to_insert)
+        new_turbine = not rollups.has_turbine(db, turbine_id)
+        rollups.record(db, reading_columns, turbine_id)
+        etl.advance_smoothers(db, reading_columns, turbine_id)
+        writes.add(turbine_id, buckets.record(db, reading_columns, [timestamp_str], turbine_id), new_turbine)
+        colstore.store.stage(writes, turbine_id, [timestamp_str], reading_columns)
         
         db.commit()
+        etl.after_commit(writes)
         
         new_record_id = cursor.lastrowid
         cursor.execute("SELECT * FROM sensor_readings WHERE id = ?", (new_record_id,))
@@ -450,3 +556,77 @@ def log_single_reading(turbine_id: int, reading_data: models.TurbineReadingCreat
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Database error: {e}")
 
+
+@router.websocket("/stream/{turbine_id}")
+async def ingest_stream(websocket: WebSocket, turbine_id: int):
+    """
+    Persistent ingest connection for a gateway: binary frames of packed telemetry.RECORD
+    records or NDJSON text frames, committed in batches and acknowledged as they commit.
+    """
+    if await _unknown_turbines([turbine_id]):
+        await websocket.close(code=1008, reason=f"Turbine with ID {turbine_id} not found.")
+        return
+    await websocket.accept()
+    await telemetry.serve(websocket, turbine_id)
+
+@router.get("/stream/{turbine_id}/state", summary="Get a Turbine's Live Telemetry State")
+async def get_stream_state(turbine_id: int):
+    """Last, smoothed and running figures of the readings streamed for a turbine since the server started."""
+    state = telemetry.hub.states.get(turbine_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"No telemetry has been streamed for turbine {turbine_id}.")
+    return state.snapshot()
+
+@router.get("/drift/{turbine_id}", summary="Get a Turbine's Drift Detector Baselines")
+async def get_drift_state(turbine_id: int):
+    """EWMA baseline, z-score spread and CUSUM statistics per drift metric, as of the last committed reading."""
+    if await _unknown_turbines([turbine_id]):
+        raise HTTPException(status_code=404, detail=f"Turbine with ID {turbine_id} not found.")
+    state = drift.monitor.state(turbine_id)
+    if state is None:
+        # Not scored since the server started: what was last saved, if anything.
+        state = await async_db.offload_read(drift.load_state, turbine_id)
+    return state.snapshot()
+
+def _enqueue_reading(turbine_id: int, reading_data: models.TurbineReadingCreate):
+    """Write-behind variant of /sensor-reading: alerts and the insert run in the writer's next group commit."""
+    try:
+        sequence = ingest_queue.writer.put(turbine_id, reading_data)
+    except ingest_queue.QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except ingest_queue.WriterStopped as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={"status": "queued", "sequence": sequence})
+
+@router.post("/sensor-readings", response_model=models.TurbineReadingBatchResult, status_code=status.HTTP_201_CREATED, summary="Append a Batch of Sensor Readings and Check for Anomalies")
+async def log_reading_batch(batch: models.TurbineReadingBatch):
+    """
+    Bulk variant of /sensor-reading for gateways: up to MAX_BATCH_READINGS readings, for one
+    or several turbines, checked with one metadata query, evaluated against the alert rules
+    as column arrays and inserted with one executemany, all in a single transaction.
+    """
+    return await async_db.db.write(_insert_reading_batch, batch)
+
+def _insert_reading_batch(db: sqlite3.Connection, batch: models.TurbineReadingBatch) -> dict:
+    turbine_ids = [reading.turbine_id if reading.turbine_id is not None else batch.turbine_id for reading in batch.readings]
+    if None in turbine_ids:
+        raise HTTPException(status_code=400, detail="Every reading needs a turbine_id, either its own or the batch's.")
+    unknown = turbines.registry.missing(db, turbine_ids)
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Turbines not found: {unknown}")
+
+    columns, timestamps = etl.reading_arrays(batch.readings)
+    turbine_array = np.array(turbine_ids, dtype=np.int64)
+    alert_counts = np.zeros(len(turbine_ids), dtype=np.int64)
+
+    try:
+        writes = cache.WriteSet()
+        alerts_found = alerts.insert_alerts(db, etl.check_readings(db, columns, timestamps, turbine_array, writes, counts=alert_counts), writes)
+        ids = etl.insert_reading_batch(db, columns, timestamps, turbine_array, writes)
+        db.commit()
+    except sqlite3.Error as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to load data into database: {e}")
+    etl.after_commit(writes)
+
+    return {"rows_loaded": len(ids), "anomalies_logged_count": alerts_found, "ids": ids, "alert_counts": alert_counts.tolist()}
@@ -0,0 +1,43 @@
+# app/serialization.py
+
+from typing import List, Type
+import numpy as np
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # pydantic-core's encoder ships with FastAPI and is nearly as fast
+    orjson = None
+
+def dumps(value) -> bytes:
+    """
+    JSON for values the server built itself (database rows, report dicts) without validating
+    them against a model. Like Pydantic's output, NaN becomes null and integer keys become
+    strings; NumPy scalars are accepted.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return to_json(value, inf_nan_mode="null", fallback=_numpy_scalar)
+
+def _numpy_scalar(value):
+    # pydantic-core's encoder only knows np.float64, a float subclass, among NumPy scalars.
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def fields(model: Type[BaseModel]) -> List[str]:
+    """A model's field names in declaration order, which is the order Pydantic serializes them."""
+    return list(model.model_fields)
+
+class FastJSONResponse(Response):
+    """
+    Response for trusted payloads. Routes that return it keep their `response_model` for the
+    OpenAPI schema, but FastAPI sends a returned Response as is, skipping per-row validation.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
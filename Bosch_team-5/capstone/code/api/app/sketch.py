@@ -0,0 +1,130 @@
+# app/sketch.py
+
+import io
+import math
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+
+DEFAULT_K = 200
+
+class KLLSketch:
+    """
+    Mergeable streaming quantile sketch (Karnin-Lang-Liberty). Memory is O(k) regardless of how
+    many values are added; the normalized rank error of a quantile is roughly 1.7 / k (about
+    0.85% at the default k=200). Until the first compaction the sketch holds every value and
+    answers exactly, matching pandas' linear interpolation.
+    """
+
+    _C = 2 / 3
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None):
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def for_error(cls, rank_error: float, seed: Optional[int] = None) -> "KLLSketch":
+        return cls(k=max(8, math.ceil(1.7 / rank_error)), seed=seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * self._C ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                keep = items[len(items) - len(items) % 2:]
+                promoted = items[:len(items) - len(keep)][self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                # Adding a level shrinks every lower capacity, so rescan from the bottom.
+                level = 0
+                continue
+            level += 1
+
+    def update(self, values) -> "KLLSketch":
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.count += len(values)
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    @property
+    def is_exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float("nan")
+        if self.is_exact:
+            return float(np.quantile(self.levels[0], q))
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.float64) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(items[order][min(index, len(items) - 1)])
+
+    def iqr_bounds(self, factor: float = 1.5) -> Tuple[float, float]:
+        q1, q3 = self.quantile(0.25), self.quantile(0.75)
+        iqr = q3 - q1
+        return q1 - factor * iqr, q3 + factor * iqr
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez(buffer, meta=np.array([self.k, self.count], dtype=np.int64), **{f"level_{h}": items for h, items in enumerate(self.levels)})
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "KLLSketch":
+        with np.load(io.BytesIO(payload), allow_pickle=False) as data:
+            k, count = (int(v) for v in data["meta"])
+            sketch = cls(k=k)
+            sketch.count = count
+            sketch.levels = [data[f"level_{h}"] for h in range(len(data.files) - 1)]
+        return sketch
+
+def build_sketches(chunks: Iterable, columns, k: int = DEFAULT_K) -> Dict[str, KLLSketch]:
+    """Single pass over an iterable of DataFrame chunks, one sketch per column."""
+    sketches = {col: KLLSketch(k=k) for col in columns}
+    for chunk in chunks:
+        for col in columns:
+            sketches[col].update(chunk[col].to_numpy())
+    return sketches
+
+# --- Per-turbine persisted sketches (quantile_sketches table) ---
+
+def load_sketches(db: sqlite3.Connection, turbine_id: int) -> Dict[str, KLLSketch]:
+    rows = db.execute("SELECT column_name, sketch FROM quantile_sketches WHERE turbine_id = ?", (turbine_id,)).fetchall()
+    return {row[0]: KLLSketch.from_bytes(row[1]) for row in rows}
+
+def save_sketches(db: sqlite3.Connection, turbine_id: int, sketches: Dict[str, KLLSketch]):
+    updated_at = datetime.now().isoformat()
+    db.executemany(
+        """
+        INSERT INTO quantile_sketches (turbine_id, column_name, sketch, value_count, updated_at) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (turbine_id, column_name) DO UPDATE SET sketch = excluded.sketch, value_count = excluded.value_count, updated_at = excluded.updated_at
+        """,
+        [(turbine_id, col, sketch.to_bytes(), sketch.count, updated_at) for col, sketch in sketches.items()]
+    )
@@ -0,0 +1,111 @@
+# app/smoothing.py
+
+import sqlite3
+from datetime import datetime
+from typing import Optional, Sequence
+import numpy as np
+import pandas as pd
+
+KINDS = ("sma", "ema")
+
+class Smoother:
+    """
+    Rolling smoothing of a stream of rows, one column per sensor, that carries its state
+    from one call to the next, so readings smoothed in several calls (single readings,
+    upload chunks, stream frames, successive uploads) come out as if smoothed in one go.
+
+    - "sma": mean of the last `window` values, like pandas' rolling(window, min_periods=1)
+      .mean(). Only the last `window - 1` values are kept; each call takes running sums over
+      them and its rows, so a row costs O(1) whatever the batch size.
+    - "ema": exponential moving average with alpha = 2 / (window + 1), like pandas'
+      ewm(span=window, adjust=False, ignore_na=True).mean(). Only the current level is kept.
+
+    NaN values are skipped, as pandas does.
+    """
+
+    def __init__(self, columns: int, kind: str = "sma", window: int = 3):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown smoothing kind {kind!r}; expected one of {KINDS}")
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.kind = kind
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self.tail = np.empty((0, columns))
+        self.level = np.full(columns, np.nan)
+        self.latest = np.full(columns, np.nan)
+        self.count = 0
+
+    def apply(self, matrix: np.ndarray) -> np.ndarray:
+        """Smoothed copy of a rows x columns matrix that follows the rows seen before."""
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if not len(matrix):
+            return matrix.copy()
+        self.count += len(matrix)
+        smoothed = self._ema(matrix) if self.kind == "ema" else self._sma(matrix)
+        self.latest = smoothed[-1].copy()
+        return smoothed
+
+    def _sma(self, matrix: np.ndarray) -> np.ndarray:
+        values = np.concatenate([self.tail, matrix])
+        carried, size = len(self.tail), len(values)
+
+        def window_totals(series: np.ndarray) -> np.ndarray:
+            # Running sums behind `window` zero rows: row r's window is sums[window + r] - sums[r].
+            sums = np.zeros((size + self.window, values.shape[1]))
+            np.cumsum(series, axis=0, out=sums[self.window:])
+            return sums[self.window + carried:] - sums[carried:size]
+
+        present = ~np.isnan(values)
+        if present.all():
+            counts = np.minimum(np.arange(carried, size) + 1, self.window)[:, None]
+            totals = window_totals(values)
+        else:
+            counts = window_totals(present)
+            totals = window_totals(np.where(present, values, 0.0))
+        with np.errstate(invalid="ignore"):
+            smoothed = totals / counts
+        self.tail = values[size - min(size, self.window - 1):]
+        return smoothed
+
+    def _ema(self, matrix: np.ndarray) -> np.ndarray:
+        frame = pd.DataFrame(np.vstack([self.level, matrix]))
+        smoothed = frame.ewm(alpha=self.alpha, adjust=False, ignore_na=True).mean().to_numpy()[1:]
+        self.level = smoothed[-1].copy()
+        return smoothed
+
+# --- Per-turbine persisted state (smoothing_state table) ---
+
+def load_smoother(db: sqlite3.Connection, turbine_id: int, columns: Sequence[str], kind: Optional[str], window: int) -> Smoother:
+    """
+    The turbine's smoother for `columns`, resumed from its persisted state. State saved with
+    another kind or window does not apply and the smoother starts fresh; with kind=None the
+    saved kind is resumed (the first of KINDS if nothing was saved).
+    """
+    rows = db.execute("SELECT column_name, kind, window_size, state, value_count FROM smoothing_state WHERE turbine_id = ?", (turbine_id,)).fetchall()
+    if kind is None:
+        kind = rows[0][1] if rows else KINDS[0]
+    smoother = Smoother(len(columns), kind, window)
+    saved = {row[0]: row[1:] for row in rows if row[1] == kind and row[2] == window}
+    if not columns or any(col not in saved for col in columns):
+        return smoother
+    states = [np.frombuffer(saved[col][2], dtype="<f8") for col in columns]
+    if kind == "ema":
+        smoother.level = np.array([state[0] for state in states])
+    else:
+        smoother.tail = np.column_stack(states).reshape(len(states[0]), len(columns))
+    smoother.count = min(saved[col][3] for col in columns)
+    return smoother
+
+def save_smoother(db: sqlite3.Connection, turbine_id: int, columns: Sequence[str], smoother: Smoother):
+    """Persists the smoother's state (in the caller's transaction)."""
+    updated_at = datetime.now().isoformat()
+    state = smoother.level[None, :] if smoother.kind == "ema" else smoother.tail
+    db.executemany(
+        """
+        INSERT INTO smoothing_state (turbine_id, column_name, kind, window_size, state, value_count, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (turbine_id, column_name) DO UPDATE SET kind = excluded.kind, window_size = excluded.window_size, state = excluded.state,
+            value_count = excluded.value_count, updated_at = excluded.updated_at
+        """,
+        [(turbine_id, col, smoother.kind, smoother.window, state[:, i].astype("<f8").tobytes(), smoother.count, updated_at) for i, col in enumerate(columns)]
+    )
@@ -0,0 +1,251 @@
+# app/telemetry.py
+
+import asyncio
+import json
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from fastapi import WebSocket, WebSocketDisconnect
+from app import alerts, async_db, cache, etl, smoothing
+
+try:
+    import orjson
+except ImportError:  # the standard library parser is fine, only slower on large NDJSON frames
+    orjson = None
+
+FIELDS = etl.REQUIRED_COLUMNS
+# A binary frame is a whole number of these little-endian records: the reading time as
+# seconds since the Unix epoch (UTC; NaN means "now"), then every field of FIELDS.
+RECORD = np.dtype([("timestamp", "<f8")] + [(name, "<f8") for name in FIELDS])
+FLUSH_ROWS = 5_000
+FLUSH_INTERVAL_SECONDS = 0.25
+
+class FrameError(ValueError):
+    pass
+
+def iso_timestamps(epoch_seconds: np.ndarray) -> np.ndarray:
+    """Naive UTC ISO strings for epoch seconds; NaN becomes the current time."""
+    seconds = np.where(np.isnan(epoch_seconds), time.time(), epoch_seconds)
+    return np.datetime_as_string((seconds * 1e6).astype("datetime64[us]"), unit="us")
+
+def decode_binary(frame: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows x FIELDS matrix and ISO timestamps of a packed binary frame."""
+    if len(frame) % RECORD.itemsize:
+        raise FrameError(f"Binary frames must hold whole {RECORD.itemsize}-byte records; got {len(frame)} bytes.")
+    # Every field is a float64, so a record is a row of 1 + len(FIELDS) doubles.
+    values = np.frombuffer(frame, dtype="<f8").reshape(-1, 1 + len(FIELDS))
+    return np.ascontiguousarray(values[:, 1:], dtype=np.float64), iso_timestamps(values[:, 0])
+
+def decode_ndjson(frame: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rows x FIELDS matrix and timestamps of a text frame with one JSON reading per line. A
+    timestamp may be an ISO string (stored as given), epoch seconds or absent (now).
+    """
+    lines = [line for line in frame.splitlines() if line.strip()]
+    document = "[" + ",".join(lines) + "]"
+    try:
+        readings = orjson.loads(document) if orjson is not None else json.loads(document)
+        matrix = np.array([[reading[name] for name in FIELDS] for reading in readings], dtype=np.float64).reshape(len(readings), len(FIELDS))
+    except KeyError as e:
+        raise FrameError(f"Every reading needs the fields {FIELDS}; missing {e}.")
+    except (ValueError, TypeError) as e:
+        raise FrameError(f"Invalid NDJSON frame: {e}")
+    stamps = [reading.get("timestamp") for reading in readings]
+    epochs = np.array([np.nan if stamp is None else stamp for stamp in stamps], dtype=object)
+    numeric = np.array([stamp is None or isinstance(stamp, (int, float)) for stamp in stamps], dtype=bool)
+    timestamps = np.array([str(stamp) for stamp in stamps], dtype=object)
+    if numeric.any():
+        timestamps[numeric] = iso_timestamps(epochs[numeric].astype(np.float64))
+    return matrix, timestamps.astype(str)
+
+class TurbineState:
+    """
+    What the server knows about a turbine's live stream, kept across reconnects: the last
+    reading, its smoothed value (continuing the turbine's persisted smoothing state, which
+    every write path advances), and running count, mean, min and max of every field since
+    the state was created.
+    """
+
+    def __init__(self, kind: str = etl.SMOOTHING_KIND, window: int = etl.SMOOTHING_WINDOW):
+        self.smoother = smoothing.Smoother(len(FIELDS), kind, window)
+        self.last = np.full(len(FIELDS), np.nan)
+        self.count = 0
+        self.sums = np.zeros(len(FIELDS))
+        self.mins = np.full(len(FIELDS), np.inf)
+        self.maxs = np.full(len(FIELDS), -np.inf)
+        self.last_timestamp: Optional[str] = None
+        self.connections = 0
+
+    def update(self, matrix: np.ndarray, timestamps: np.ndarray) -> None:
+        if not len(matrix):
+            return
+        self.smoother.apply(matrix)
+        self.last = matrix[-1].copy()
+        self.count += len(matrix)
+        self.sums += np.nansum(matrix, axis=0)
+        self.mins = np.fmin(self.mins, np.nanmin(matrix, axis=0))
+        self.maxs = np.fmax(self.maxs, np.nanmax(matrix, axis=0))
+        self.last_timestamp = str(timestamps[-1])
+
+    def snapshot(self) -> dict:
+        def by_field(values: np.ndarray) -> Dict[str, Optional[float]]:
+            return {name: (None if not np.isfinite(value) else float(value)) for name, value in zip(FIELDS, values)}
+
+        has_data = self.count > 0
+        return {
+            "connections": self.connections,
+            "count": self.count,
+            "last_timestamp": self.last_timestamp,
+            "last": by_field(self.last) if has_data else None,
+            "smoothed": by_field(self.smoother.latest) if has_data else None,
+            "mean": by_field(self.sums / self.count) if has_data else None,
+            "min": by_field(self.mins) if has_data else None,
+            "max": by_field(self.maxs) if has_data else None,
+        }
+
+class TelemetryHub:
+    """
+    Per-turbine live state and ingest counters of every WebSocket stream in this process.
+    Streams commit once `flush_rows` readings are pending, or `flush_interval` seconds after
+    the oldest pending one arrived.
+    """
+
+    def __init__(self, flush_rows: int = FLUSH_ROWS, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.states: Dict[int, TurbineState] = {}
+        self.frames = self.readings = self.flushed = self.flushes = self.frame_errors = 0
+
+    def state(self, turbine_id: int) -> TurbineState:
+        if turbine_id not in self.states:
+            self.states[turbine_id] = TurbineState()
+        return self.states[turbine_id]
+
+    def stats(self) -> dict:
+        return {
+            "flush_rows": self.flush_rows,
+            "flush_interval_seconds": self.flush_interval,
+            "turbines": len(self.states),
+            "connections": sum(state.connections for state in self.states.values()),
+            "frames": self.frames,
+            "frame_errors": self.frame_errors,
+            "readings": self.readings,
+            "flushed_rows": self.flushed,
+            "flushes": self.flushes,
+            "avg_flush_rows": self.flushed / self.flushes if self.flushes else 0.0,
+        }
+
+hub = TelemetryHub()
+
+def flush(db: sqlite3.Connection, turbine_id: int, matrix: np.ndarray, timestamps: np.ndarray) -> Tuple[int, int]:
+    """Runs on the writer connection: checks and inserts a batch in one transaction. Returns (rows, alerts)."""
+    columns = {name: matrix[:, i] for i, name in enumerate(FIELDS)}
+    turbine_ids = np.full(len(matrix), turbine_id, dtype=np.int64)
+    writes = cache.WriteSet()
+    alerts_found = alerts.insert_alerts(db, etl.check_readings(db, columns, timestamps, turbine_ids, writes), writes)
+    etl.insert_reading_batch(db, columns, timestamps, turbine_ids, writes)
+    db.commit()
+    etl.after_commit(writes)
+    # Counted here rather than by the stream, which may be cancelled while its last batch is written.
+    hub.flushed += len(matrix)
+    hub.flushes += 1
+    return len(matrix), alerts_found
+
+class _Pending:
+    def __init__(self):
+        self.matrices: List[np.ndarray] = []
+        self.timestamps: List[np.ndarray] = []
+        self.rows = 0
+        self.since = 0.0
+
+    def add(self, matrix: np.ndarray, timestamps: np.ndarray) -> None:
+        if not self.rows:
+            self.since = time.monotonic()
+        self.matrices.append(matrix)
+        self.timestamps.append(timestamps)
+        self.rows += len(matrix)
+
+    def take(self) -> Tuple[np.ndarray, np.ndarray]:
+        batch = (np.concatenate(self.matrices), np.concatenate(self.timestamps))
+        self.matrices, self.timestamps, self.rows = [], [], 0
+        return batch
+
+async def serve(websocket: WebSocket, turbine_id: int) -> None:
+    """
+    Ingests an accepted WebSocket until the client disconnects. Binary frames are decoded
+    with decode_binary, text frames with decode_ndjson; a bad frame is answered with
+    {"error", "frame"} and skipped. Decoded readings update the turbine's live state at once
+    and are committed in batches, as the hub's flush settings say, on the async writer
+    connection. One batch is written while the next one is collected; each
+    commit is acknowledged with {"flushed", "alerts", "committed"}. Whatever is pending when
+    the client disconnects is still committed.
+    """
+    state = hub.state(turbine_id)
+    flush_rows, flush_interval = hub.flush_rows, hub.flush_interval
+    if not state.connections:
+        # Other writes may have advanced the persisted state since this turbine last streamed.
+        state.smoother = await async_db.db.offload_read(etl.load_smoother, turbine_id, None)
+    state.connections += 1
+    pending, frame, committed = _Pending(), 0, 0
+    receiving: Optional[asyncio.Future] = None
+    writing: Optional[asyncio.Future] = None
+    connected = True
+
+    async def acknowledge(task: asyncio.Future) -> None:
+        nonlocal committed
+        rows, alerts_found = await task
+        committed += rows
+        if connected:
+            await websocket.send_json({"flushed": rows, "alerts": alerts_found, "committed": committed})
+
+    def start_flush() -> asyncio.Future:
+        return async_db.db.write(flush, turbine_id, *pending.take())
+
+    try:
+        while True:
+            if receiving is None:
+                receiving = asyncio.ensure_future(websocket.receive())
+            timeout = max(0.0, pending.since + flush_interval - time.monotonic()) if pending.rows else None
+            done, _ = await asyncio.wait([task for task in (receiving, writing) if task is not None], timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if writing in done:
+                task, writing = writing, None
+                await acknowledge(task)
+            if receiving in done:
+                message, receiving = receiving.result(), None
+                if message["type"] == "websocket.disconnect":
+                    break
+                frame += 1
+                hub.frames += 1
+                try:
+                    if message.get("bytes") is not None:
+                        matrix, timestamps = decode_binary(message["bytes"])
+                    else:
+                        matrix, timestamps = decode_ndjson(message.get("text") or "")
+                except FrameError as e:
+                    hub.frame_errors += 1
+                    await websocket.send_json({"error": str(e), "frame": frame})
+                    continue
+                hub.readings += len(matrix)
+                state.update(matrix, timestamps)
+                if len(matrix):
+                    pending.add(matrix, timestamps)
+
+            if pending.rows >= flush_rows or (pending.rows and time.monotonic() - pending.since >= flush_interval):
+                if writing is not None:
+                    task, writing = writing, None
+                    await acknowledge(task)
+                writing = start_flush()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        state.connections -= 1
+        connected = False
+        if receiving is not None:
+            receiving.cancel()
+        # Queue the last batch before awaiting anything: a server that cancels the handler
+        # on disconnect must not cancel the writes with it.
+        final = [task for task in (writing, start_flush() if pending.rows else None) if task is not None]
+        for task in final:
+            await asyncio.shield(task)
@@ -0,0 +1,92 @@
+# app/turbines.py
+
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+NEGATIVE_TTL_SECONDS = 5.0
+
+class TurbineRegistry:
+    """
+    In-memory set of the ids in turbine_metadata, so write paths validate a turbine with a
+    set lookup. Ids found missing are remembered for `negative_ttl` seconds.
+    """
+
+    def __init__(self, negative_ttl: float = NEGATIVE_TTL_SECONDS):
+        self.negative_ttl = negative_ttl
+        self._known: Optional[Set[int]] = None
+        self._unknown: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.hits = self.negative_hits = self.lookups = 0
+
+    def load(self, db: sqlite3.Connection) -> int:
+        ids = {row[0] for row in db.execute("SELECT turbine_id FROM turbine_metadata")}
+        with self._lock:
+            self._known, self._unknown = ids, {}
+        return len(ids)
+
+    def exists(self, db: sqlite3.Connection, turbine_id: int) -> bool:
+        return not self.missing(db, [turbine_id])
+
+    def missing(self, db: sqlite3.Connection, turbine_ids: Iterable[int]) -> List[int]:
+        """The given ids that are not registered turbines, in sorted order."""
+        with self._lock:
+            known = self._known
+        if known is None:
+            ids = {row[0] for row in db.execute("SELECT turbine_id FROM turbine_metadata")}
+            with self._lock:
+                if self._known is None:
+                    self._known, self._unknown = ids, {}
+                known = self._known
+        now = time.monotonic()
+        with self._lock:
+            unresolved, unknown = [], []
+            for turbine_id in sorted(set(turbine_ids)):
+                if turbine_id in known:
+                    self.hits += 1
+                elif self._unknown.get(turbine_id, 0.0) > now:
+                    self.negative_hits += 1
+                    unknown.append(turbine_id)
+                else:
+                    unresolved.append(turbine_id)
+        if not unresolved:
+            return unknown
+
+        placeholders = ','.join('?' for _ in unresolved)
+        found = {row[0] for row in db.execute(f"SELECT turbine_id FROM turbine_metadata WHERE turbine_id IN ({placeholders})", unresolved)}
+        with self._lock:
+            self.lookups += 1
+            # A reset while we queried leaves the next caller to reload; only merge into the set we read.
+            merge = self._known is known
+            if merge:
+                known |= found
+            for turbine_id in unresolved:
+                if turbine_id not in found:
+                    if merge:
+                        self._unknown[turbine_id] = now + self.negative_ttl
+                    unknown.append(turbine_id)
+                elif merge:
+                    self._unknown.pop(turbine_id, None)
+        return sorted(unknown)
+
+    def add(self, turbine_id: int) -> None:
+        with self._lock:
+            if self._known is not None:
+                self._known.add(turbine_id)
+            self._unknown.pop(turbine_id, None)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._known, self._unknown = None, {}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self._known is not None,
+                "turbines": len(self._known) if self._known is not None else 0,
+                "negative_entries": len(self._unknown),
+                "hits": self.hits, "negative_hits": self.negative_hits, "db_lookups": self.lookups,
+            }
+
+registry = TurbineRegistry()
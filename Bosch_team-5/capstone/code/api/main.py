@@ -1,13 +1,31 @@
 # app/main.py
 
+import asyncio
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from app.routers import management, turbine
+from app.routers import management, metrics, rules, turbine
+from app import archive, async_db, database, drift, ingest_queue, parallel, turbines
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Database has been initialized.")
+    version = database.init_db()
+    print(f"Database has been initialized (schema version {version}).")
+    conn = database.pool.acquire()
+    try:
+        print(f"Loaded {turbines.registry.load(conn)} turbines into the registry.")
+    finally:
+        database.pool.release(conn)
+    ingest_queue.writer.start()
+    archive.scheduler.start(database.DATABASE_PATH)
     yield
+    archive.scheduler.stop()
+    parallel.pool.stop()
+    # Commits every reading accepted in write-behind mode before the process exits, off the event loop.
+    if not await asyncio.get_running_loop().run_in_executor(None, ingest_queue.writer.stop, ingest_queue.STOP_TIMEOUT_SECONDS):
+        print(f"Write-behind queue did not drain; {ingest_queue.writer.stats()['queue_depth']} readings were not written.")
+    await async_db.db.write(drift.monitor.save)
+    await async_db.db.close()
+    database.pool.close()
     print("Application is shutting down.")
 
 app = FastAPI(
@@ -19,6 +37,8 @@ app = FastAPI(
 
 app.include_router(turbine.router, prefix="/data", tags=["Data & Analytics"])
 app.include_router(management.router, prefix="/turbines", tags=["Management"])
+app.include_router(rules.router, prefix="/alert-rules", tags=["Alert Rules"])
+app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
 
 @app.get("/", tags=["Root"])
 def read_root():
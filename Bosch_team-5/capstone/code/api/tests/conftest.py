@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import sqlite3
 import sys
@@ -8,8 +9,8 @@ from sqlalchemy import create_engine
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from main import app
-from app import database
-from app.database import get_db
+from app import alert_stream, alerts, archive, async_db, cache, colstore, database, drift, ingest_queue, parallel, telemetry, turbines
+from app.migrations import run_migrations
 
 @pytest.fixture(scope="function")
 def client(tmp_path, monkeypatch):
@@ -21,10 +22,8 @@ def client(tmp_path, monkeypatch):
 
     conn = sqlite3.connect(TEST_DB_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    run_migrations(conn)
     cursor = conn.cursor()
-    cursor.execute("CREATE TABLE turbine_metadata (turbine_id INTEGER PRIMARY KEY, location TEXT, model TEXT, manufacturer TEXT);")
-    cursor.execute("CREATE TABLE sensor_readings (id INTEGER PRIMARY KEY, turbine_id INTEGER, timestamp TEXT, t48 REAL, mf REAL, ts REAL, tp REAL, gtn REAL, p1 REAL, p2 REAL, decay_coeff_comp REAL, decay_coeff_turbine REAL, lp REAL, v REAL, gtt REAL, ggn REAL, t1 REAL, t2 REAL, p48 REAL, pexh REAL, tic REAL);")
-    cursor.execute("CREATE TABLE alerts (alert_id INTEGER PRIMARY KEY, turbine_id INTEGER, timestamp TEXT, metric TEXT, alert_type TEXT, severity TEXT, actual_value REAL, threshold_value REAL, description TEXT);")
     cursor.execute("INSERT INTO turbine_metadata (turbine_id, location, manufacturer, model) VALUES (1, 'North Sea', 'Siemens', 'V90');")
     cursor.execute("INSERT INTO turbine_metadata (turbine_id, location, manufacturer, model) VALUES (2, 'Baltic Sea', 'Vestas', 'V112');")
     conn.commit()
@@ -35,16 +34,24 @@ def client(tmp_path, monkeypatch):
     monkeypatch.setattr(database, "DATABASE_PATH", TEST_DB_PATH)
     monkeypatch.setattr(database, "engine", test_engine)
 
-    def override_get_db():
-        db_conn = sqlite3.connect(TEST_DB_PATH, check_same_thread=False)
-        db_conn.row_factory = sqlite3.Row
-        try:
-            yield db_conn
-        finally:
-            db_conn.close()
-
-    app.dependency_overrides[get_db] = override_get_db
+    test_pool = database.ConnectionPool(TEST_DB_PATH)
+    monkeypatch.setattr(database, "pool", test_pool)
+    test_async_db = async_db.AsyncDatabase(TEST_DB_PATH)
+    monkeypatch.setattr(async_db, "db", test_async_db)
+    monkeypatch.setattr(alerts, "registry", alerts.RuleRegistry())
+    monkeypatch.setattr(alert_stream, "hub", alert_stream.AlertHub())
+    monkeypatch.setattr(cache, "response_cache", cache.ResponseCache())
+    monkeypatch.setattr(ingest_queue, "writer", ingest_queue.WriteBehindQueue())
+    monkeypatch.setattr(turbines, "registry", turbines.TurbineRegistry())
+    monkeypatch.setattr(telemetry, "hub", telemetry.TelemetryHub())
+    monkeypatch.setattr(drift, "monitor", drift.DriftMonitor())
+    monkeypatch.setattr(archive, "ARCHIVE_ROOT", tmp_path / "archive")
+    monkeypatch.setattr(colstore, "store", colstore.ColumnStore(tmp_path / "colstore"))
+    monkeypatch.setattr(parallel, "pool", parallel.AnalyticsPool())
 
     yield TestClient(app)
 
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+    asyncio.run(test_async_db.close())
+    test_pool.close()
+    parallel.pool.stop()
\ No newline at end of file
@@ -0,0 +1,22 @@
+from fastapi.testclient import TestClient
+
+READING = {"timestamp": "2025-09-23T16:57:08", "lp": 1, "v": 1, "gtt": 1, "gtn": 1, "ggn": 1, "ts": 1, "tp": 1, "t48": 700, "t1": 1, "t2": 1, "p48": 1, "p1": 1, "p2": 12, "pexh": 1, "tic": 1, "mf": 0.1, "decay_coeff_comp": 1, "decay_coeff_turbine": 1}
+
+def test_new_rule_applies_to_next_reading(client: TestClient):
+    rule = {"name": "t48_warm", "metric": "t48", "op": ">", "threshold": 650, "alert_type": "Warm", "severity": "Low", "description": "T48 warm at {value:.1f}"}
+    created = client.post("/alert-rules/", json=rule)
+    assert created.status_code == 201
+
+    client.post("/data/sensor-reading/1", json=READING)
+    alerts = client.get("/data/alerts?turbine_id=1").json()["data"]
+    assert [a["description"] for a in alerts] == ["T48 warm at 700.0"]
+
+    stats = {row["name"]: row for row in client.get("/metrics/alert-rules").json()}
+    assert stats["t48_warm"]["hits"] == 1 and stats["t48_overheat"]["hits"] == 0
+
+def test_rule_validation(client: TestClient):
+    bad_metric = {"name": "x", "metric": "nope", "op": ">", "threshold": 1, "alert_type": "a", "severity": "s", "description": "{value}"}
+    assert client.post("/alert-rules/", json=bad_metric).status_code == 400
+    bad_template = dict(bad_metric, metric="t48", description="no placeholder")
+    assert client.post("/alert-rules/", json=bad_template).status_code == 400
+    assert client.put("/alert-rules/999", json=dict(bad_metric, metric="t48")).status_code == 404
@@ -1,5 +1,14 @@
+import asyncio
 import io
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
 from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from app import archive, async_db, cache, colstore, database, derived, drift, etl, ingest_queue, rollups, telemetry
+from app.routers.turbine import HEALTH_SUMMARY_AVERAGES, calculate_analytics, export_readings, stream_alerts
 
 def test_upload_csv_success_with_normal_data(client: TestClient):
     """
@@ -65,4 +74,538 @@ def test_get_sensor_metrics_pagination(client: TestClient):
     assert response.status_code == 200
     data = response.json()
     assert data["metadata"]["current_page"] == 1
-    assert len(data["data"]) == 1
\ No newline at end of file
+    assert len(data["data"]) == 1
+
+def _reading(timestamp: str, t48: float) -> dict:
+    return {"timestamp": timestamp, "lp": 1, "v": 1, "gtt": 1, "gtn": 1, "ggn": 1, "ts": 1, "tp": 1, "t48": t48, "t1": 1, "t2": 1, "p48": 1, "p1": 1, "p2": 1, "pexh": 1, "tic": 1, "mf": 1, "decay_coeff_comp": 1, "decay_coeff_turbine": 1}
+
+def test_get_sensor_metrics_cursor_walks_all_rows_without_total(client: TestClient):
+    # Two readings share a timestamp so the id tie-breaker is exercised.
+    timestamps = ["2025-09-23T10:00:00", "2025-09-23T11:00:00", "2025-09-23T11:00:00", "2025-09-23T12:00:00", "2025-09-23T13:00:00"]
+    for i, ts in enumerate(timestamps):
+        client.post("/data/sensor-reading/1", json=_reading(ts, 100 + i))
+
+    seen = []
+    response = client.get("/data/sensor-metrics/1?page_size=2&include_total=false")
+    while True:
+        assert response.status_code == 200
+        body = response.json()
+        assert body["metadata"]["total_items"] is None
+        seen.extend(row["t48"] for row in body["data"])
+        if body["metadata"]["next_cursor"] is None:
+            break
+        response = client.get(f"/data/sensor-metrics/1?page_size=2&include_total=false&cursor={body['metadata']['next_cursor']}")
+
+    assert seen == [104, 103, 102, 101, 100]
+
+def test_get_alerts_cursor_matches_offset_pages(client: TestClient):
+    for i in range(5):
+        client.post("/data/alerts", json={"turbine_id": 1, "timestamp": f"2025-09-23T1{i}:00:00", "metric": "t48", "alert_type": "Overheat", "severity": "High", "actual_value": 960 + i, "threshold_value": 950, "description": "test"})
+
+    first = client.get("/data/alerts?turbine_id=1&page_size=3").json()
+    assert first["metadata"]["total_items"] == 5
+    second_by_cursor = client.get(f"/data/alerts?turbine_id=1&page_size=3&cursor={first['metadata']['next_cursor']}").json()
+    second_by_offset = client.get("/data/alerts?turbine_id=1&page_size=3&page=2").json()
+
+    assert second_by_cursor["data"] == second_by_offset["data"]
+    assert second_by_cursor["metadata"]["next_cursor"] is None
+
+def test_invalid_cursor_is_rejected(client: TestClient):
+    response = client.get("/data/alerts?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+CSV_HEADER = "Lever position (lp),Ship speed (v) [knots],Gas Turbine shaft torque (gtt) [kn/m],Gas Turbine revolutions (gtn) [rpm],Gas Generator revolutions (ggn) [rpm],Starboard Propeller Torque (ts) [kn/m],Port Propeller Torque (tp) [kn/m],HP Turbine exit temperature (t48) [°c],Compressor inlet air temperature (t1) [°c],Compressor outlet air temperature (t2) [°c],HP Turbine exit pressure (p48) [bar],Compressor inlet air pressure (p1) [bar],Compressor outlet air pressure (p2) [bar],Exhaust gas pressure [bar],Turbine Injection Control (tic) [%],Fuel flow (mf) [kg/s],Compressor decay coefficient,Turbine decay coefficient\n"
+
+def _all_readings(client: TestClient, turbine_id: int) -> list:
+    rows, url = [], f"/data/sensor-metrics/{turbine_id}?page_size=100&include_total=false"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        rows.extend(body["data"])
+        next_cursor = body["metadata"]["next_cursor"]
+        url = f"/data/sensor-metrics/{turbine_id}?page_size=100&include_total=false&cursor={next_cursor}" if next_cursor else None
+    return rows
+
+def test_streaming_upload_matches_single_pass_across_chunks(client: TestClient):
+    # Cyclic values keep every chunk within the first chunk's IQR bounds, so the only state
+    # that matters at chunk boundaries is the rolling-window tail.
+    rows = [
+        f"{i % 10},{i % 7},{i % 11},{i % 13},{i % 10},{i % 7},{i % 11},{i % 13},{i % 10},{i % 7},{i % 11},1,{i % 13},{i % 10},{i % 7},0.1,0.99,0.99\n"
+        for i in range(250)
+    ]
+    csv_bytes = (CSV_HEADER + "".join(rows)).encode("utf-8")
+
+    streamed = client.post("/data/upload-data/1?streaming=true&chunk_size=100", files={"file": ("s.csv", io.BytesIO(csv_bytes), "text/csv")})
+    single = client.post("/data/upload-data/2", files={"file": ("s.csv", io.BytesIO(csv_bytes), "text/csv")})
+    assert streamed.status_code == 201 and single.status_code == 201
+    assert streamed.json()["chunks_processed"] == 3
+
+    def strip(readings):
+        return [{k: v for k, v in row.items() if k != "turbine_id"} for row in readings]
+
+    assert strip(_all_readings(client, 1)) == strip(_all_readings(client, 2))
+
+def test_smoothing_continues_from_the_previous_upload(client: TestClient):
+    rows = [
+        f"{i % 10},{i % 7},{i % 11},{i % 13},{i % 10},{i % 7},{i % 11},{i % 13},{i % 10},{i % 7},{i % 11},1,{i % 13},{i % 10},{i % 7},0.1,0.99,0.99\n"
+        for i in range(240)
+    ]
+
+    def upload(turbine_id, part, query=""):
+        csv_bytes = (CSV_HEADER + "".join(part)).encode("utf-8")
+        response = client.post(f"/data/upload-data/{turbine_id}{query}", files={"file": ("s.csv", io.BytesIO(csv_bytes), "text/csv")})
+        assert response.status_code == 201, response.text
+
+    def values(turbine_id):
+        return [[row[col] for col in etl.REQUIRED_COLUMNS] for row in reversed(_all_readings(client, turbine_id))]
+
+    # The second upload's first rows are smoothed against the end of the first one.
+    upload(1, rows[:100])
+    upload(1, rows[100:], "?streaming=true&chunk_size=100")
+    upload(2, rows)
+    assert values(1) == values(2)
+
+    upload(1, rows[:100], "?smoothing=ema")
+    upload(2, rows[:50], "?smoothing=ema")
+    upload(2, rows[50:100], "?streaming=true&smoothing=ema")
+    assert values(1)[240:] == values(2)[240:]
+    assert client.post("/data/upload-data/1?smoothing=median", files={"file": ("s.csv", io.BytesIO(b""), "text/csv")}).status_code == 422
+
+def test_smoothing_state_advances_on_every_write_path(client: TestClient):
+    rows = [
+        f"{i % 10},{i % 7},{i % 11},{i % 13},{i % 10},{i % 7},{i % 11},{i % 13},{i % 10},{i % 7},{i % 11},1,{i % 13},{i % 10},{i % 7},0.1,0.99,0.99\n"
+        for i in range(130)
+    ]
+
+    def upload(turbine_id, part, query=""):
+        csv_bytes = (CSV_HEADER + "".join(part)).encode("utf-8")
+        assert client.post(f"/data/upload-data/{turbine_id}{query}", files={"file": ("s.csv", io.BytesIO(csv_bytes), "text/csv")}).status_code == 201
+
+    def as_reading(i, line):
+        return {"timestamp": f"2025-09-23T10:00:{i % 60:02d}", **dict(zip(etl.REQUIRED_COLUMNS, map(float, line.split(","))))}
+
+    # Readings sent over REST are stored as sent, but the next upload smooths against them.
+    upload(1, rows[:100])
+    assert client.post("/data/sensor-readings", json={"turbine_id": 1, "readings": [as_reading(i, line) for i, line in enumerate(rows[100:108])]}).status_code == 201
+    assert client.post("/data/sensor-reading/1", json=as_reading(108, rows[108])).status_code == 201
+    upload(1, rows[109:], "?streaming=true")
+    upload(2, rows[:100])
+    upload(2, rows[100:109])
+    upload(2, rows[109:], "?streaming=true")
+
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    stored = {turbine_id: conn.execute(f"SELECT {', '.join(etl.REQUIRED_COLUMNS)} FROM sensor_readings WHERE turbine_id = ? ORDER BY id", (turbine_id,)).fetchall() for turbine_id in (1, 2)}
+    conn.close()
+    assert stored[1][109:] == stored[2][109:]
+
+def test_drift_detectors_flag_a_slow_decay_across_write_paths(client: TestClient, monkeypatch):
+    monkeypatch.setattr(drift, "monitor", drift.DriftMonitor(persist_interval=0))
+    rng = np.random.default_rng(5)
+    decay = 0.99 + rng.normal(0, 0.002, 400)
+    decay[250:] -= np.linspace(0, 0.02, 150)
+    p2 = 10 + rng.normal(0, 0.05, 400)
+    rows = "".join(f"5,15,5000,3500,9000,55,56,600,20,500,1.2,1,{pressure:.4f},1.01,80,0.25,0.99,{value:.4f}\n" for pressure, value in zip(p2, decay))
+    response = client.post("/data/upload-data/1", files={"file": ("d.csv", io.BytesIO((CSV_HEADER + rows).encode()), "text/csv")})
+    assert response.status_code == 201 and response.json()["anomalies_logged_count"] >= 1
+
+    assert client.get("/data/drift/2").json()["pressure_ratio"] == {"count": 0, "mean": None, "std": None, "cusum_high": 0.0, "cusum_low": 0.0, "outlier_open": False, "drift_open": False}
+
+    # Scoring the upload as one batch finds what scoring its readings one by one finds.
+    for i, (pressure, value) in enumerate(zip(p2, decay)):
+        values = [5, 15, 5000, 3500, 9000, 55, 56, 600, 20, 500, 1.2, 1, round(pressure, 4), 1.01, 80, 0.25, 0.99, round(value, 4)]
+        reading = {"timestamp": f"2025-09-23T{i // 60:02d}:{i % 60:02d}:00", **dict(zip(etl.REQUIRED_COLUMNS, values))}
+        assert client.post("/data/sensor-reading/2", json=reading).status_code == 201
+
+    def drift_alerts(turbine_id):
+        found = client.get(f"/data/alerts?turbine_id={turbine_id}&page_size=100").json()["data"]
+        return [(alert["metric"], alert["alert_type"], alert["severity"], alert["description"]) for alert in found]
+
+    assert [alert[:3] for alert in drift_alerts(1)] == [("decay_coeff_turbine", "Downward Drift", "High")]
+    assert drift_alerts(1) == drift_alerts(2)
+    state = client.get("/data/drift/1").json()
+    assert state["decay_coeff_turbine"]["count"] == 400 and state["decay_coeff_turbine"]["mean"] < 0.99
+
+    # Single readings continue the same baseline, and saved states survive a restart.
+    reading = {**_reading("2025-09-23T10:00:00", 600.0), "p1": 1, "p2": 10, "decay_coeff_comp": 0.99, "decay_coeff_turbine": 0.95}
+    assert client.post("/data/sensor-reading/1", json=reading).status_code == 201
+    assert client.get("/data/drift/1").json()["decay_coeff_turbine"]["count"] == 401
+    monkeypatch.setattr(drift, "monitor", drift.DriftMonitor())
+    assert client.get("/data/drift/1").json()["decay_coeff_turbine"]["count"] == 401
+    assert client.get("/data/drift/999").status_code == 404
+    assert client.get("/metrics/drift").json()["readings_scored"] == 0
+
+def test_streaming_upload_rejects_missing_columns(client: TestClient):
+    csv_bytes = io.BytesIO(b"Lever position (lp),Ship speed (v) [knots]\n1,2\n")
+    response = client.post("/data/upload-data/1?streaming=true", files={"file": ("bad.csv", csv_bytes, "text/csv")})
+    assert response.status_code == 400
+    assert "missing required columns" in response.json()["detail"]
+
+def test_streaming_upload_holds_the_writer_one_chunk_at_a_time(client: TestClient):
+    rows = [f"5,15,5000,3500,9000,55,56,{600 + i % 9},20,500,1.2,1,10,1.01,80,0.25,0.99,0.99\n" for i in range(250)]
+    writes = async_db.db.stats()["writes"]
+    response = client.post("/data/upload-data/1?streaming=true&chunk_size=100", files={"file": ("s.csv", io.BytesIO((CSV_HEADER + "".join(rows)).encode()), "text/csv")})
+    assert response.status_code == 201 and response.json()["chunks_processed"] == 3
+    # One write reads the rules and state, then one commits each chunk.
+    assert async_db.db.stats()["writes"] - writes == 4
+
+    # A bad value in a later chunk is found before anything is written.
+    rows[180] = rows[180].replace("600", "hot", 1)
+    response = client.post("/data/upload-data/2?streaming=true&chunk_size=100", files={"file": ("s.csv", io.BytesIO((CSV_HEADER + "".join(rows)).encode()), "text/csv")})
+    assert response.status_code == 400
+    assert client.get("/data/sensor-metrics/2").json()["metadata"]["total_items"] == 0
+
+def test_history_clip_reference_uses_persisted_sketches(client: TestClient):
+    # Build up a history where t48 sits between 500 and 520.
+    history_rows = "".join(f"5,15,5000,3500,9000,55,56,{500 + i % 21},20,500,1.2,1,10,1.01,80,0.25,0.99,0.99\n" for i in range(300))
+    client.post("/data/upload-data/1?streaming=true", files={"file": ("h.csv", io.BytesIO((CSV_HEADER + history_rows).encode()), "text/csv")})
+
+    # A small upload that runs hot throughout: on its own, its IQR leaves the values alone.
+    hot_rows = "".join(f"5,15,5000,3500,9000,55,56,{700 + i},20,500,1.2,1,10,1.01,80,0.25,0.99,0.99\n" for i in range(3))
+    client.post("/data/upload-data/2?streaming=true", files={"file": ("u.csv", io.BytesIO((CSV_HEADER + hot_rows).encode()), "text/csv")})
+    client.post("/data/upload-data/1?streaming=true&clip_reference=history", files={"file": ("u.csv", io.BytesIO((CSV_HEADER + hot_rows).encode()), "text/csv")})
+
+    upload_only = client.get("/data/sensor-metrics/2?page_size=3").json()["data"]
+    against_history = client.get("/data/sensor-metrics/1?page_size=3").json()["data"]
+    assert min(row["t48"] for row in upload_only) > 690
+    assert max(row["t48"] for row in against_history) < 560
+
+def test_health_summary_reads_rollups_kept_by_every_write_path(client: TestClient):
+    rows = "".join(f"5,15,{5000 + i * 7},3500,9000,55,{56 + i % 3},{640 + i % 9},20,500,1.2,1,{10 + i % 4},1.01,80,0.25,0.99,0.98\n" for i in range(120))
+    csv_bytes = (CSV_HEADER + rows).encode("utf-8")
+    assert client.post("/data/upload-data/1", files={"file": ("a.csv", io.BytesIO(csv_bytes), "text/csv")}).status_code == 201
+    assert client.post("/data/upload-data/2?streaming=true&chunk_size=100", files={"file": ("b.csv", io.BytesIO(csv_bytes), "text/csv")}).status_code == 201
+    assert client.post("/data/sensor-reading/2", json=_reading("2025-09-23T10:00:00", 700.0)).status_code == 201
+
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    conn.row_factory = sqlite3.Row
+    raw = derived.add_derived_columns(pd.read_sql_query("SELECT * FROM sensor_readings", conn))
+    expected = raw.groupby("turbine_id").agg(
+        record_count=("mf", "count"), total_fuel_usage=("mf", "sum"),
+        **{field: (metric, "mean") for field, metric in HEALTH_SUMMARY_AVERAGES.items()}
+    )
+
+    summary = client.get("/data/health-summary").json()
+    assert summary["metadata"]["total_items"] == 2
+    for row in summary["data"]:
+        for field, value in expected.loc[row["turbine_id"]].items():
+            assert row[field] == pytest.approx(value, rel=1e-9), field
+
+    # A rebuild from raw readings reproduces what the write paths accumulated.
+    incremental = conn.execute("SELECT * FROM turbine_rollups ORDER BY turbine_id, metric").fetchall()
+    rollups.rebuild(conn, etl.REQUIRED_COLUMNS, chunk_size=50)
+    rebuilt = conn.execute("SELECT * FROM turbine_rollups ORDER BY turbine_id, metric").fetchall()
+    conn.rollback()
+    conn.close()
+    assert len(rebuilt) == len(incremental)
+    for before, after in zip(incremental, rebuilt):
+        assert tuple(before)[:3] == tuple(after)[:3]
+        assert tuple(before)[3:] == pytest.approx(tuple(after)[3:], rel=1e-9)
+
+def _expected_reports(turbine_ids, start=None, end=None) -> dict:
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    raw = pd.read_sql_query("SELECT * FROM sensor_readings", conn)
+    conn.close()
+    if start is not None:
+        instants = pd.to_datetime(raw["timestamp"], format="ISO8601", utc=True).dt.tz_localize(None)
+        raw = raw[(instants >= pd.Timestamp(start)) & (instants <= pd.Timestamp(end))]
+    raw = raw[raw["turbine_id"].isin(turbine_ids)]
+    return {str(turbine_id): calculate_analytics(group.copy()).model_dump() for turbine_id, group in raw.groupby("turbine_id")}
+
+def _assert_reports_match(actual, expected):
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys()
+        for key in expected:
+            _assert_reports_match(actual[key], expected[key])
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-9, abs=1e-9)
+    else:
+        assert actual == expected
+
+def test_analytics_report_composed_from_buckets_matches_raw_rows(client: TestClient):
+    # Three days of readings every 7 minutes, so every window has ragged hour and day edges.
+    start = pd.Timestamp("2025-01-01 00:03:00")
+    rows = "".join(
+        f"{start + pd.Timedelta(minutes=7 * i)},5,15,{5000 + i % 97},3500,9000,55,{56 + i % 5},{600 + i % 89},20,500,1.2,1,{10 + i % 4},1.01,80,0.25,0.99,0.98\n"
+        for i in range(620)
+    )
+    csv_bytes = ("Timestamp," + CSV_HEADER + rows).encode("utf-8")
+    assert client.post("/data/upload-data/1", files={"file": ("a.csv", io.BytesIO(csv_bytes), "text/csv")}).status_code == 201
+    assert client.post("/data/upload-data/2?streaming=true&chunk_size=100", files={"file": ("b.csv", io.BytesIO(csv_bytes), "text/csv")}).status_code == 201
+    assert client.post("/data/sensor-reading/2", json=_reading("2025-01-02T10:30:15.250000", 990.0)).status_code == 201
+
+    windows = [
+        ({}, None, None),
+        ({"start_date": "2025-01-02", "end_date": "2025-01-02"}, "2025-01-02 00:00:00", "2025-01-02 23:59:59.999"),
+        ({"start_time": "2025-01-01T10:30:00", "end_time": "2025-01-03T05:15:30"}, "2025-01-01 10:30:00", "2025-01-03 05:15:30"),
+        ({"start_time": "2025-01-02T10:20:00", "end_time": "2025-01-02T10:40:00"}, "2025-01-02 10:20:00", "2025-01-02 10:40:00"),
+    ]
+    for extra, lo, hi in windows:
+        response = client.post("/data/analytics-report", json={"turbine_ids": [1, 2], **extra})
+        assert response.status_code == 200, response.text
+        _assert_reports_match(response.json(), _expected_reports([1, 2], lo, hi))
+
+def test_reports_are_cached_until_an_overlapping_write(client: TestClient):
+    rows = "".join(f"2025-01-01 {h:02d}:15:00,5,15,5000,3500,9000,55,56,{600 + h},20,500,1.2,1,10,1.01,80,0.25,0.99,0.98\n" for h in range(24))
+    csv_bytes = ("Timestamp," + CSV_HEADER + rows).encode("utf-8")
+    assert client.post("/data/upload-data/1", files={"file": ("a.csv", io.BytesIO(csv_bytes), "text/csv")}).status_code == 201
+
+    january_1 = {"turbine_ids": [1], "start_date": "2025-01-01", "end_date": "2025-01-01"}
+    first = client.post("/data/analytics-report", json=january_1).json()
+    assert client.post("/data/analytics-report", json={**january_1, "turbine_ids": [1, 1]}).json() == first
+    summary = client.get("/data/health-summary").json()
+    assert client.get("/data/health-summary").json() == summary
+    stats = client.get("/metrics/response-cache").json()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+
+    # A reading on another day leaves the January 1 report cached but not the health summary.
+    assert client.post("/data/sensor-reading/1", json=_reading("2025-01-05T10:00:00", 700.0)).status_code == 201
+    assert client.post("/data/analytics-report", json=january_1).json() == first
+    assert client.get("/data/health-summary").json()["data"][0]["record_count"] == 25
+
+    assert client.post("/data/sensor-reading/1", json=_reading("2025-01-01T23:30:00", 990.0)).status_code == 201
+    assert client.post("/data/analytics-report", json=january_1).json()["1"]["record_count"] == 25
+    stats = client.get("/metrics/response-cache").json()
+    assert (stats["hits"], stats["invalidations"]) == (3, 3)
+
+def test_reading_batch_matches_single_reading_path(client: TestClient):
+    readings = [_reading(f"2025-03-01T10:{i:02d}:00", 700.0 + 60 * i) for i in range(6)]
+    alerts_per_row = []
+    for reading in readings:
+        before = client.get("/data/alerts?turbine_id=1").json()["metadata"]["total_items"]
+        assert client.post("/data/sensor-reading/1", json=reading).status_code == 201
+        alerts_per_row.append(client.get("/data/alerts?turbine_id=1").json()["metadata"]["total_items"] - before)
+
+    batch = {"turbine_id": 2, "readings": readings[:3] + [{**reading, "turbine_id": 1} for reading in readings[3:]]}
+    response = client.post("/data/sensor-readings", json=batch)
+    assert response.status_code == 201, response.text
+    result = response.json()
+    assert result["rows_loaded"] == 6
+    assert result["alert_counts"] == alerts_per_row
+    assert result["anomalies_logged_count"] == sum(alerts_per_row)
+
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    conn.row_factory = sqlite3.Row
+    stored = [dict(conn.execute("SELECT * FROM sensor_readings WHERE id = ?", (row_id,)).fetchone()) for row_id in result["ids"]]
+    singles = [dict(row) for row in conn.execute("SELECT * FROM sensor_readings WHERE id <= 6 ORDER BY id")]
+    conn.close()
+    assert [row["turbine_id"] for row in stored] == [2, 2, 2, 1, 1, 1]
+    for batched, single in zip(stored, singles):
+        assert {k: v for k, v in batched.items() if k not in ("id", "turbine_id")} == {k: v for k, v in single.items() if k not in ("id", "turbine_id")}
+
+    summary = {row["turbine_id"]: row["record_count"] for row in client.get("/data/health-summary").json()["data"]}
+    assert summary == {1: 9, 2: 3}
+
+def test_reading_batch_rejects_unknown_or_missing_turbines(client: TestClient):
+    reading = _reading("2025-03-01T10:00:00", 700.0)
+    assert client.post("/data/sensor-readings", json={"readings": [reading]}).status_code == 400
+    response = client.post("/data/sensor-readings", json={"turbine_id": 1, "readings": [reading, {**reading, "turbine_id": 99}]})
+    assert response.status_code == 404
+    assert "99" in response.json()["detail"]
+    assert client.get("/data/sensor-metrics/1").json()["metadata"]["total_items"] == 0
+
+def test_write_behind_readings_are_acknowledged_then_group_committed(client: TestClient, monkeypatch):
+    assert client.post("/data/sensor-reading/1?write_behind=true", json=_reading("2025-03-01T10:00:00", 700.0)).status_code == 503
+
+    writer = ingest_queue.WriteBehindQueue(max_depth=3, batch_rows=100, flush_interval_ms=60_000)
+    monkeypatch.setattr(ingest_queue, "writer", writer)
+    writer.start()
+    try:
+        for minute in range(3):
+            response = client.post("/data/sensor-reading/1?write_behind=true", json=_reading(f"2025-03-01T10:{minute:02d}:00", 990.0))
+            assert response.status_code == 202
+        response = client.post("/data/sensor-reading/1?write_behind=true", json=_reading("2025-03-01T10:03:00", 990.0))
+        assert response.status_code == 429
+        assert client.get("/metrics/ingest-queue").json()["queue_depth"] == 3
+        assert client.get("/data/sensor-metrics/1").json()["metadata"]["total_items"] == 0
+
+        assert writer.flush(timeout=5)
+        assert client.get("/data/sensor-metrics/1").json()["metadata"]["total_items"] == 3
+        assert client.get("/data/alerts?turbine_id=1").json()["metadata"]["total_items"] > 0
+        stats = client.get("/metrics/ingest-queue").json()
+        assert (stats["commits"], stats["committed_rows"], stats["rejected"]) == (1, 3, 1)
+    finally:
+        writer.stop()
+
+def test_reports_union_archived_and_hot_readings(client: TestClient):
+    start = pd.Timestamp("2025-01-30 00:03:00")
+    rows = "".join(
+        f"{start + pd.Timedelta(minutes=7 * i)},5,15,{5000 + i % 97},3500,9000,55,{56 + i % 5},{600 + i % 89},20,500,1.2,1,{10 + i % 4},1.01,80,0.25,0.99,0.98\n"
+        for i in range(620)
+    )
+    csv_bytes = ("Timestamp," + CSV_HEADER + rows).encode("utf-8")
+    assert client.post("/data/upload-data/1", files={"file": ("a.csv", io.BytesIO(csv_bytes), "text/csv")}).status_code == 201
+    windows = [
+        {},
+        {"start_date": "2025-01-31", "end_date": "2025-02-01"},
+        {"start_time": "2025-01-30T10:30:00", "end_time": "2025-02-01T05:15:30"},
+        {"start_time": "2025-01-31T23:20:00", "end_time": "2025-02-01T00:40:00"},
+    ]
+    reports = [client.post("/data/analytics-report", json={"turbine_ids": [1], **extra}).json() for extra in windows]
+    summary = client.get("/data/health-summary").json()
+
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    moved = archive.archive_readings(conn, pd.Timedelta(days=1).to_pytimedelta(), now=pd.Timestamp("2025-02-02").to_pydatetime())
+    assert moved == conn.execute("SELECT SUM(row_count) FROM archive_files").fetchone()[0] > 0
+    assert conn.execute("SELECT MIN(reading_date) FROM sensor_readings").fetchone()[0] == "2025-02-01"
+    cache.response_cache.clear()
+
+    for extra, before in zip(windows, reports):
+        _assert_reports_match(client.post("/data/analytics-report", json={"turbine_ids": [1], **extra}).json(), before)
+    assert client.get("/data/health-summary").json() == summary
+
+    # Rebuilding the rollups from hot rows plus the archive reproduces them.
+    incremental = conn.execute("SELECT * FROM turbine_rollups ORDER BY turbine_id, metric").fetchall()
+    assert rollups.rebuild(conn, etl.REQUIRED_COLUMNS) == 620
+    rebuilt = conn.execute("SELECT * FROM turbine_rollups ORDER BY turbine_id, metric").fetchall()
+    conn.rollback()
+    conn.close()
+    for before, after in zip(incremental, rebuilt):
+        assert before[:3] == after[:3]
+        assert before[3:] == pytest.approx(after[3:], rel=1e-9)
+    assert client.get("/metrics/archive").json()["rows"] == moved
+
+def test_every_write_path_feeds_the_column_store(client: TestClient):
+    assert client.post("/data/sensor-reading/1", json=_reading("2025-03-01T10:00:00", 700.0)).status_code == 201
+    batch = {"turbine_id": 2, "readings": [_reading(f"2025-03-01T11:{i:02d}:00", 710.0 + i) for i in range(3)]}
+    assert client.post("/data/sensor-readings", json=batch).status_code == 201
+    rows = "".join(f"2025-03-02 0{i}:00:00,5,15,5000,3500,9000,55,56,650,20,500,1.2,1,10,1.01,80,0.25,0.99,0.98\n" for i in range(4))
+    csv_bytes = ("Timestamp," + CSV_HEADER + rows).encode("utf-8")
+    assert client.post("/data/upload-data/1", files={"file": ("a.csv", io.BytesIO(csv_bytes), "text/csv")}).status_code == 201
+    assert client.post("/data/sensor-readings", json={"turbine_id": 1, "readings": [_reading("2025-03-03T00:00:00", 700.0), {**_reading("2025-03-03T01:00:00", 700.0), "turbine_id": 99}]}).status_code == 404
+
+    store = colstore.store
+    assert store.turbines() == [1, 2]
+    assert store.open(1).count == 5 and store.open(2).count == 3
+    assert store.open(2).column("t48").tolist() == [710.0, 711.0, 712.0]
+    stats = client.get("/metrics/column-store").json()
+    assert (stats["turbines"], stats["rows"], stats["pending_turbines"]) == (2, 8, 0)
+
+def test_export_streams_every_format_with_projection_window_and_compression(client: TestClient):
+    pa = pytest.importorskip("pyarrow")
+    start = pd.Timestamp("2025-01-31 22:00:00")
+    rows = "".join(f"{start + pd.Timedelta(minutes=10 * i)},5,15,5000,3500,9000,55,56,{600 + i},20,500,1.2,1,10,1.01,80,0.25,0.99,0.98\n" for i in range(30))
+    csv_bytes = ("Timestamp," + CSV_HEADER + rows).encode("utf-8")
+    assert client.post("/data/upload-data/1", files={"file": ("a.csv", io.BytesIO(csv_bytes), "text/csv")}).status_code == 201
+    assert client.post("/data/sensor-reading/2", json=_reading("2025-02-01T01:00:00", 650.0)).status_code == 201
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    expected = pd.read_sql_query("SELECT id, timestamp, t48 FROM sensor_readings WHERE turbine_id = 1 ORDER BY id", conn)
+    in_window = conn.execute(
+        "SELECT turbine_id, t48 FROM sensor_readings WHERE datetime(timestamp) >= '2025-01-31 23:55:00' AND datetime(timestamp) < '2025-02-01 01:00:01' ORDER BY id"
+    ).fetchall()
+    assert archive.archive_readings(conn, pd.Timedelta(days=1).to_pytimedelta(), now=pd.Timestamp("2025-02-02").to_pydatetime()) == 12
+    conn.close()
+
+    params = {"turbine_id": 1, "columns": "t48,timestamp,id", "chunk_size": 7}
+    ndjson = client.get("/data/export", params=params)
+    assert ndjson.status_code == 200
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    exported = pd.read_json(io.StringIO(ndjson.text), lines=True, dtype={"timestamp": str})
+    assert exported.columns.tolist() == ["id", "timestamp", "t48"]
+    pd.testing.assert_frame_equal(exported, expected, check_dtype=False)
+
+    csv_body = client.get("/data/export", params={**params, "format": "csv", "compression": "gzip"})
+    assert csv_body.headers["content-disposition"] == 'attachment; filename="readings.csv.gz"'
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(csv_body.content), compression="gzip", dtype={"timestamp": str}), exported)
+
+    arrow_body = client.get("/data/export", params={**params, "format": "arrow", "compression": "zstd"})
+    table = pa.ipc.open_stream(pa.CompressedInputStream(pa.BufferReader(arrow_body.content), "zstd")).read_all()
+    assert table.schema.types == [pa.int64(), pa.string(), pa.float64()]
+    pd.testing.assert_frame_equal(table.to_pandas(), exported, check_dtype=False)
+
+    window = client.get("/data/export", params={"columns": "turbine_id,t48", "start_time": "2025-01-31T23:55:00", "end_time": "2025-02-01T01:00:01"})
+    assert [(row["turbine_id"], row["t48"]) for row in map(json.loads, window.text.splitlines())] == in_window
+    assert len(in_window) == 8
+    # One bound with an offset and one without: both are compared and applied as UTC.
+    mixed = client.get("/data/export", params={"columns": "turbine_id,t48", "start_time": "2025-02-01T01:55:00+02:00", "end_time": "2025-02-01T01:00:01"})
+    assert mixed.status_code == 200 and mixed.text == window.text
+    assert client.get("/data/export", params={"start_time": "2025-02-01T02:00:00+02:00", "end_time": "2025-02-01T00:00:00"}).status_code == 400
+
+    assert client.get("/data/export", params={"columns": "t48,bogus"}).status_code == 400
+    assert client.get("/data/export", params={"start_time": "2025-01-31T00:00:00"}).status_code == 400
+
+def test_export_returns_its_connection_when_the_client_disconnects(client: TestClient):
+    for second in range(5):
+        assert client.post("/data/sensor-reading/1", json=_reading(f"2025-02-01T00:00:0{second}", 650.0)).status_code == 201
+    in_use = database.pool.stats()["in_use"]
+
+    async def scenario():
+        response = await export_readings(turbine_id=None, fmt="ndjson", columns="id", start_time=None, end_time=None, compression="none", chunk_size=2)
+        first = await anext(response.body_iterator)
+        assert database.pool.stats()["in_use"] == in_use + 1
+        # What Starlette runs after the stream task is cancelled by a disconnect.
+        await response.background()
+        return first
+
+    assert asyncio.run(scenario()).count(b"\n") == 2
+    assert database.pool.stats()["in_use"] == in_use
+
+def test_alert_stream_replays_after_an_id_then_pushes_matching_alerts(client: TestClient):
+    alert = {"metric": "t48", "alert_type": "Overheat", "severity": "High", "actual_value": 960.0, "threshold_value": 950.0, "description": "hot"}
+    first = client.post("/data/alerts", json={**alert, "turbine_id": 1}).json()
+    client.post("/data/alerts", json={**alert, "turbine_id": 2})
+    reading = {name: 1.0 for name in etl.REQUIRED_COLUMNS} | {"t48": 990.0, "decay_coeff_comp": 0.99, "decay_coeff_turbine": 0.99, "p2": 10.0, "gtn": 0.0}
+
+    def events(chunk: bytes):
+        return [json.loads(line[6:]) for line in chunk.decode().splitlines() if line.startswith("data: ")]
+
+    async def scenario():
+        response = await stream_alerts(turbine_id=[1], severity=["High", "Warning"], last_event_id=first["alert_id"] - 1, last_event_id_header=None)
+        assert response.media_type == "text/event-stream"
+        body = response.body_iterator
+        received = [await anext(body)]
+        assert await anext(body) == b": connected\n\n"
+        await asyncio.to_thread(client.post, "/data/alerts", json={**alert, "turbine_id": 2})
+        await asyncio.to_thread(client.post, "/data/alerts", json={**alert, "turbine_id": 1, "severity": "Low"})
+        await asyncio.to_thread(client.post, "/data/sensor-reading/1", json=reading)
+        await asyncio.to_thread(client.post, "/data/sensor-reading/1", json={**reading, "t48": 900.0})
+        received.append(await anext(body) + await anext(body))
+        await body.aclose()
+        return received
+
+    replayed, pushed = asyncio.run(scenario())
+    assert replayed.startswith(f"id: {first['alert_id']}\nevent: alert\n".encode())
+    assert events(replayed) == [first]
+    assert sorted((event["alert_type"], event["severity"]) for event in events(pushed)) == [("High Exit Temperature", "Warning"), ("Overheat", "High")]
+    assert all(event["turbine_id"] == 1 and event["alert_id"] > first["alert_id"] + 3 for event in events(pushed))
+    assert client.get("/metrics/alert-stream").json()["subscribers"] == 0
+
+def test_websocket_stream_ingests_binary_and_ndjson_frames_in_batches(client: TestClient, monkeypatch):
+    monkeypatch.setattr(telemetry, "hub", telemetry.TelemetryHub(flush_rows=100))
+    records = np.zeros(250, dtype=telemetry.RECORD)
+    records["timestamp"] = 1_735_689_600.0 + np.arange(250)
+    for name in telemetry.FIELDS:
+        records[name] = 0.2 if name == "mf" else 1.0
+    records["t48"][-1] = 990.0
+    reading = {name: 0.2 if name == "mf" else 2.0 for name in telemetry.FIELDS}
+
+    with client.websocket_connect("/data/stream/1") as ws:
+        ws.send_bytes(records[:150].tobytes())
+        first = ws.receive_json()
+        ws.send_bytes(b"\x00" * 7)
+        error = ws.receive_json()
+        ws.send_bytes(records[150:].tobytes())
+        second = ws.receive_json()
+        ws.send_text("\n".join(json.dumps({**reading, "timestamp": "2025-01-02T00:00:00"}) for _ in range(3)))
+        assert client.get("/data/stream/1/state").json()["connections"] == 1
+    # The three NDJSON readings were still pending and are committed on disconnect; the
+    # writer runs writes in order, so an empty one waits for that batch.
+    async def drain():
+        await async_db.db.write(lambda conn: None)
+
+    asyncio.run(drain())
+
+    assert first == {"flushed": 150, "alerts": 0, "committed": 150}
+    assert error["frame"] == 2 and "152-byte records" in error["error"]
+    assert second == {"flushed": 100, "alerts": 1, "committed": 250}
+    state = client.get("/data/stream/1/state").json()
+    assert (state["connections"], state["count"], state["last"]["lp"], state["last_timestamp"]) == (0, 253, 2.0, "2025-01-02T00:00:00")
+    assert client.get("/data/sensor-metrics/1?page_size=1").json()["metadata"]["total_items"] == 253
+    assert client.get("/metrics/telemetry").json()["flushes"] == 3
+    assert client.get("/data/stream/2/state").status_code == 404
+
+def test_websocket_stream_rejects_unknown_turbines(client: TestClient):
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/data/stream/999"):
+            pass
+    assert closed.value.code == 1008
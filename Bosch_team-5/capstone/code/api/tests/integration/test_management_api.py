@@ -29,4 +29,33 @@ def test_update_turbine(client: TestClient):
     response = client.put("/turbines/1", json={"location": "North Sea Updated", "manufacturer": "Siemens", "model": "V90"})
     assert response.status_code == 200
     data = response.json()
-    assert data["location"] == "North Sea Updated"
\ No newline at end of file
+    assert data["location"] == "North Sea Updated"
+
+def test_db_pool_stats_reflect_requests(client: TestClient):
+    client.get("/alert-rules/")
+    client.get("/alert-rules/")
+    stats = client.get("/metrics/db-pool").json()
+    assert stats["acquisitions"] >= 2
+    assert stats["connections"] <= stats["max_size"]
+    assert stats["in_use"] == 0
+
+def test_turbine_routes_use_the_async_data_layer(client: TestClient):
+    client.get("/turbines/1")
+    client.get("/turbines/")
+    client.put("/turbines/2", json={"location": "Baltic Sea", "manufacturer": "Vestas", "model": "V112"})
+    stats = client.get("/metrics/async-db").json()
+    assert (stats["reads"], stats["writes"], stats["pending_offloads"]) == (2, 1, 0)
+    assert stats["writer_open"] and 1 <= stats["open_readers"] <= stats["reader_connections"]
+    assert client.get("/metrics/db-pool").json()["acquisitions"] == 0
+
+def test_registry_validates_writes_without_querying_metadata(client: TestClient):
+    created = client.post("/turbines/", json={"location": "Irish Sea"}).json()
+    reading = {name: 1.0 for name in ("lp", "v", "gtt", "gtn", "ggn", "ts", "tp", "t48", "t1", "t2", "p48", "p1", "p2", "pexh", "tic", "mf", "decay_coeff_comp", "decay_coeff_turbine")}
+    assert client.post(f"/data/sensor-reading/{created['turbine_id']}", json=reading).status_code == 201
+    assert client.post("/data/sensor-reading/999", json=reading).status_code == 404
+    assert client.post("/data/sensor-reading/999", json=reading).status_code == 404
+    assert client.put("/turbines/999", json={"location": "Nowhere"}).status_code == 404
+    assert client.put(f"/turbines/{created['turbine_id']}", json={"location": "Celtic Sea"}).json() == {**created, "location": "Celtic Sea"}
+
+    stats = client.get("/metrics/turbine-registry").json()
+    assert (stats["turbines"], stats["db_lookups"], stats["negative_hits"]) == (3, 1, 2)
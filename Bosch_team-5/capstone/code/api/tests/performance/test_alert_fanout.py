@@ -0,0 +1,23 @@
+import asyncio
+import pytest
+from app import alert_stream
+
+pytestmark = pytest.mark.performance
+
+CONSOLES = 50
+BATCH = [(alert_id, 1 + alert_id % 20, "2025-01-01T00:00:00", "t48", "Overheat", ("High", "Warning")[alert_id % 2], 960.0, 950.0, "hot") for alert_id in range(1, 501)]
+
+def test_publish_to_many_consoles(benchmark):
+    """One committed batch of 500 alerts fanned out to 50 filtered subscribers."""
+    async def subscribe():
+        hub = alert_stream.AlertHub()
+        return hub, [hub.subscribe([1 + i % 20], ["High"] if i % 2 else None) for i in range(CONSOLES)]
+
+    loop = asyncio.new_event_loop()
+    try:
+        hub, subscriptions = loop.run_until_complete(subscribe())
+        benchmark(hub.publish, BATCH)
+        rows, _ = loop.run_until_complete(subscriptions[0].next(0))
+    finally:
+        loop.close()
+    assert rows and all(row[1] == 1 for row in rows)
@@ -0,0 +1,65 @@
+import pytest
+import sqlite3
+import pandas as pd
+from pathlib import Path
+from app import alerts, etl
+from app.migrations import run_migrations
+
+pytestmark = pytest.mark.performance
+
+DATA_CSV = Path(__file__).resolve().parents[3] / "data" / "turbine_data.csv"
+
+@pytest.fixture(scope="module")
+def turbine_df() -> pd.DataFrame:
+    df = pd.read_csv(DATA_CSV)
+    df.rename(columns=etl.normalize_column_name, inplace=True)
+    df["timestamp"] = "2025-01-01 00:00:00"
+    return df
+
+def _legacy_detect_alerts(df: pd.DataFrame, turbine_id: int) -> pd.DataFrame:
+    """The per-row DataFrame.apply implementation the rule engine replaced, kept for comparison."""
+    alerts_to_log = []
+    t48_alerts = df[df['t48'] > 600].copy()
+    if not t48_alerts.empty:
+        t48_alerts['metric'], t48_alerts['alert_type'], t48_alerts['severity'] = 't48', 'Overheat', 'Critical'
+        t48_alerts['actual_value'], t48_alerts['threshold_value'] = t48_alerts['t48'], 900.0
+        t48_alerts['description'] = t48_alerts.apply(lambda row: f"T48={row['t48']:.2f}°C exceeds threshold", axis=1)
+        alerts_to_log.append(t48_alerts)
+    mf_alerts = df[df['mf'] > 0.3].copy()
+    if not mf_alerts.empty:
+        mf_alerts['metric'], mf_alerts['alert_type'], mf_alerts['severity'] = 'mf', 'High Fuel Flow', 'Critical'
+        mf_alerts['actual_value'], mf_alerts['threshold_value'] = mf_alerts['mf'], 0.3
+        mf_alerts['description'] = mf_alerts.apply(lambda row: f"mf={row['mf']:.2f} kg/s exceeds threshold", axis=1)
+        alerts_to_log.append(mf_alerts)
+    all_alerts_df = pd.concat(alerts_to_log, ignore_index=True)
+    all_alerts_df['turbine_id'] = turbine_id
+    return all_alerts_df[alerts.ALERT_COLUMNS]
+
+# The legacy thresholds expressed as rules, to compare like for like.
+LEGACY_RULES = alerts.RuleSet([
+    alerts.ThresholdRule("t48", ">", 600, "Overheat", "Critical", "T48={value:.2f}°C exceeds threshold", reported_threshold=900.0),
+    alerts.ThresholdRule("mf", ">", 0.3, "High Fuel Flow", "Critical", "mf={value:.2f} kg/s exceeds threshold"),
+])
+
+@pytest.fixture(scope="module")
+def registry_rules() -> alerts.RuleSet:
+    conn = sqlite3.connect(":memory:")
+    run_migrations(conn)
+    return alerts.load_rules(conn)
+
+def test_vectorized_rules_match_legacy_output(turbine_df):
+    legacy = list(_legacy_detect_alerts(turbine_df, 1).itertuples(index=False, name=None))
+    assert etl.detect_alerts(turbine_df, 1, LEGACY_RULES) == legacy
+
+@pytest.mark.parametrize("engine", ["legacy_apply", "vectorized", "registry_rules"])
+def test_benchmark_alert_generation(turbine_df, registry_rules, benchmark, engine):
+    if engine == "legacy_apply":
+        detect = _legacy_detect_alerts
+    else:
+        ruleset = LEGACY_RULES if engine == "vectorized" else registry_rules
+        detect = lambda df, turbine_id: etl.detect_alerts(df, turbine_id, ruleset)
+    result = benchmark(detect, turbine_df, 1)
+    benchmark.extra_info["rows"] = len(turbine_df)
+    benchmark.extra_info["alerts"] = len(result)
+    benchmark.extra_info["alerts_per_sec"] = round(len(result) / benchmark.stats.stats.mean)
+    print(f"\n[{engine}] {len(result)} alerts from {len(turbine_df)} rows: {benchmark.extra_info['alerts_per_sec']:,} alerts/sec")
@@ -0,0 +1,50 @@
+import pytest
+import sqlite3
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from app import buckets, etl
+from app.migrations import run_migrations
+from app.routers.turbine import calculate_analytics
+
+pytestmark = pytest.mark.performance
+
+WINDOW = (datetime(2025, 1, 3, 7, 20), datetime(2025, 2, 17, 16, 45))
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    """Two months of minute-level readings for two turbines, loaded through the ETL write path."""
+    conn = sqlite3.connect(tmp_path_factory.mktemp("buckets") / "buckets.db")
+    run_migrations(conn)
+    rng = np.random.default_rng(3)
+    n = 60 * 24 * 60
+    for turbine_id in (1, 2):
+        df = pd.DataFrame({col: rng.uniform(1.0, 900.0, n) for col in etl.REQUIRED_COLUMNS})
+        df["timestamp"] = (pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(n), unit="min")).strftime("%Y-%m-%d %H:%M:%S")
+        etl.insert_readings(conn, df, turbine_id)
+    conn.commit()
+    yield conn
+    conn.close()
+
+def _raw_report(conn: sqlite3.Connection):
+    start, end = (instant.strftime("%Y-%m-%d %H:%M:%S") for instant in WINDOW)
+    df = pd.read_sql_query("SELECT * FROM sensor_readings WHERE turbine_id IN (1, 2) AND timestamp >= ? AND timestamp < ?", conn, params=[start, end])
+    return {turbine_id: calculate_analytics(group) for turbine_id, group in df.groupby("turbine_id")}
+
+def test_analytics_raw_rows(benchmark, db):
+    benchmark(_raw_report, db)
+
+def test_analytics_composed_from_buckets(benchmark, db):
+    composed = benchmark(buckets.compose, db, [1, 2], WINDOW)
+    raw = _raw_report(db)
+    assert composed[1]["record_count"] == raw[1].record_count
+    assert composed[1]["t48_sum"] / composed[1]["record_count"] == pytest.approx(raw[1].turbine_stats.exit_temp_t48.avg)
+
+# A full day read as one raw piece, to compare the two ways of reducing raw rows.
+RAW_DAY = (datetime(2025, 1, 10), datetime(2025, 1, 11))
+
+@pytest.mark.parametrize("pushdown", [True, False], ids=["sql-pushdown", "numpy"])
+def test_raw_partials(benchmark, db, monkeypatch, pushdown):
+    monkeypatch.setattr(buckets, "RAW_PUSHDOWN", pushdown)
+    partials = benchmark(buckets._raw_partials, db, [1, 2], *RAW_DAY)
+    assert [row[1] for row in sorted(partials)] == [24 * 60, 24 * 60]
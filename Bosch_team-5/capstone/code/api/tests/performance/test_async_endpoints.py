@@ -0,0 +1,41 @@
+import asyncio
+import io
+import time
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+pytestmark = pytest.mark.performance
+
+HEADER = "lp,v,gtt,gtn,ggn,ts,tp,t48,t1,t2,p48,p1,p2,pexh,tic,mf,decay_coeff_comp,decay_coeff_turbine\n"
+UPLOADS = 8
+UPLOAD_ROWS = 20_000
+
+def _csv() -> bytes:
+    return (HEADER + "".join(f"5.1,15,{5000 + i % 997},3500,9000,55,56,{600 + i % 89},20,500,1.2,1,10,1.01,80,0.25,0.99,0.99\n" for i in range(UPLOAD_ROWS))).encode()
+
+def test_cheap_reads_stay_fast_while_uploads_run(client: TestClient):
+    """More concurrent uploads than the offload executor has workers must not hold up /turbines/{id}."""
+    body = _csv()
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+            started = time.perf_counter()
+            uploads = [asyncio.ensure_future(ac.post("/data/upload-data/1", files={"file": (f"u{i}.csv", io.BytesIO(body), "text/csv")})) for i in range(UPLOADS)]
+            latencies = []
+            while not all(upload.done() for upload in uploads):
+                sent = time.perf_counter()
+                assert (await ac.get("/turbines/2")).status_code == 200
+                latencies.append(time.perf_counter() - sent)
+                await asyncio.sleep(0.01)
+            responses = await asyncio.gather(*uploads)
+            return time.perf_counter() - started, latencies, responses
+
+    elapsed, latencies, responses = asyncio.run(scenario())
+    assert all(response.status_code == 201 for response in responses)
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(f"\n{UPLOADS} uploads in {elapsed:.2f}s; {len(latencies)} turbine reads meanwhile, p95 {p95 * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+    assert len(latencies) >= 5
+    assert p95 < elapsed / 5
@@ -0,0 +1,29 @@
+import pytest
+from fastapi.testclient import TestClient
+
+pytestmark = pytest.mark.performance
+
+READINGS = 500
+
+def _readings(n: int) -> list:
+    return [
+        {"timestamp": f"2025-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}", "lp": 5.1, "v": 15, "gtt": 5000 + i % 97,
+         "gtn": 3500, "ggn": 9000, "ts": 55, "tp": 56, "t48": 600 + i % 400, "t1": 20, "t2": 500, "p48": 1.2, "p1": 1,
+         "p2": 10, "pexh": 1.01, "tic": 80, "mf": 0.25 + i % 7 / 100, "decay_coeff_comp": 0.99, "decay_coeff_turbine": 0.99}
+        for i in range(n)
+    ]
+
+def test_benchmark_single_reading_path(client: TestClient, benchmark):
+    readings = _readings(READINGS)
+
+    def post_one_by_one():
+        for reading in readings:
+            client.post("/data/sensor-reading/1", json=reading)
+
+    benchmark.pedantic(post_one_by_one, rounds=3)
+
+def test_benchmark_reading_batch(client: TestClient, benchmark):
+    batch = {"turbine_id": 1, "readings": _readings(READINGS)}
+    response = benchmark(client.post, "/data/sensor-readings", json=batch)
+    assert response.status_code == 201
+    assert len(response.json()["ids"]) == READINGS
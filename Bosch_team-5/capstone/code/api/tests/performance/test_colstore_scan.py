@@ -0,0 +1,46 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from app import colstore, etl
+from app.migrations import run_migrations
+
+pytestmark = pytest.mark.performance
+
+TURBINES = 4
+ROWS_PER_TURBINE = 50_000
+
+@pytest.fixture(scope="module")
+def fleet(tmp_path_factory):
+    root = tmp_path_factory.mktemp("fleet")
+    conn = sqlite3.connect(root / "fleet.db")
+    run_migrations(conn)
+    rng = np.random.default_rng(11)
+    for turbine_id in range(1, TURBINES + 1):
+        df = pd.DataFrame({col: rng.uniform(1.0, 900.0, ROWS_PER_TURBINE) for col in etl.REQUIRED_COLUMNS})
+        df["timestamp"] = (pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(ROWS_PER_TURBINE), unit="min")).strftime("%Y-%m-%d %H:%M:%S")
+        etl.insert_readings(conn, df, turbine_id)
+    conn.commit()
+    store = colstore.ColumnStore(root / "colstore")
+    store.backfill(conn, etl.REQUIRED_COLUMNS)
+    yield conn, store
+    conn.close()
+
+def test_benchmark_fleet_scan_through_sqlite(fleet, benchmark):
+    conn, _ = fleet
+    df = benchmark(pd.read_sql_query, "SELECT * FROM sensor_readings", conn)
+    assert len(df) == TURBINES * ROWS_PER_TURBINE
+
+def test_benchmark_fleet_scan_through_column_store(fleet, benchmark):
+    _, store = fleet
+    df = benchmark(store.frame, etl.REQUIRED_COLUMNS)
+    assert len(df) == TURBINES * ROWS_PER_TURBINE
+
+def test_benchmark_time_range_slice(fleet, benchmark):
+    _, store = fleet
+
+    def one_day_per_turbine():
+        return [values["t48"].mean() for _, values in store.scan(["t48"], np.datetime64("2025-01-10"), np.datetime64("2025-01-11"))]
+
+    means = benchmark(one_day_per_turbine)
+    assert len(means) == TURBINES
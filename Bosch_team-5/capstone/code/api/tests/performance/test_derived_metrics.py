@@ -0,0 +1,39 @@
+import pytest
+import pandas as pd
+from pathlib import Path
+from app import derived, etl
+
+pytestmark = pytest.mark.performance
+
+DATA_CSV = Path(__file__).resolve().parents[3] / "data" / "turbine_data.csv"
+
+@pytest.fixture(scope="module")
+def readings() -> pd.DataFrame:
+    df = pd.read_csv(DATA_CSV)
+    df.rename(columns=etl.normalize_column_name, inplace=True)
+    return df
+
+def _legacy(df: pd.DataFrame):
+    gamma, k_to_c = 1.4, 273.15
+    pressure_ratio = df['p2'] / df['p1']
+    t1_k, t2_k = df['t1'] + k_to_c, df['t2'] + k_to_c
+    t2s_k = t1_k * (pressure_ratio**((gamma - 1) / gamma))
+    columns = {
+        'pressure_ratio': pressure_ratio,
+        'compressor_efficiency': ((t2s_k - t1_k) / (t2_k - t1_k)) * 100,
+        'thermal_efficiency': (1 - (1 / (pressure_ratio**((gamma - 1) / gamma)))) * 100,
+        'temp_ratio_t48_p48': df['t48'] / df['p48'], 'temp_ratio_t1_p1': df['t1'] / df['p1'],
+        'temp_ratio_t2_p2': df['t2'] / df['p2'], 'torque_diff': df['ts'] - df['tp'],
+        'rpm_ratio_gtn_ggn': df['gtn'] / df['ggn'], 'fuel_per_rpm': df['mf'] / df['gtn'],
+        'total_prop_torque': df['ts'] + df['tp'], 'power_proxy_kw': df['gtt'] * (df['gtn'] * (2 * 3.141592653589793 / 60)),
+        'total_decay_score': (1 - df['decay_coeff_comp']) + (1 - df['decay_coeff_turbine']),
+    }
+    return pd.DataFrame(columns).replace([float('inf'), float('-inf')], float('nan'))
+
+def test_derived_legacy_pandas(benchmark, readings):
+    benchmark(_legacy, readings)
+
+def test_derived_kernel_preallocated(benchmark, readings):
+    columns = {name: readings[name].to_numpy(dtype='float64') for name in derived.BASE_INPUTS}
+    buffers = derived.allocate(len(readings))
+    benchmark(derived.compute_derived, columns, buffers)
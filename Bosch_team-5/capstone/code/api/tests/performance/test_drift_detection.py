@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from app import drift
+
+pytestmark = pytest.mark.performance
+
+ROWS = 100_000
+VALUES = 0.99 + np.random.default_rng(9).normal(0, 0.002, size=(ROWS, len(drift.DRIFT_METRICS)))
+
+def test_benchmark_batch_scoring(benchmark):
+    """A 100,000-reading upload scored in one vectorized pass."""
+    state, result = benchmark(drift.score, drift.DriftState(), VALUES)
+    assert state.count.tolist() == [ROWS] * len(drift.DRIFT_METRICS)
+    print(f"\n{ROWS / benchmark.stats.stats.mean:,.0f} readings/s in one batch")
+
+def test_benchmark_online_scoring(benchmark):
+    """1,000 readings scored as they arrive, one call each."""
+    readings = VALUES[:1_000]
+
+    def run():
+        state = drift.DriftState()
+        for i in range(len(readings)):
+            state, _ = drift.score(state, readings[i:i + 1])
+        return state
+
+    state = benchmark(run)
+    assert state.count.tolist() == [1_000] * len(drift.DRIFT_METRICS)
+    print(f"\n{1_000 / benchmark.stats.stats.mean:,.0f} readings/s one at a time")
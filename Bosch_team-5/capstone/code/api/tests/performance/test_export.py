@@ -0,0 +1,39 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app import database, etl
+
+pytestmark = pytest.mark.performance
+
+READINGS = 10_000
+
+@pytest.fixture
+def loaded(client: TestClient):
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({col: rng.uniform(1.0, 900.0, READINGS) for col in etl.REQUIRED_COLUMNS})
+    df["timestamp"] = (pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(READINGS), unit="min")).strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    etl.insert_readings(conn, df, 1)
+    conn.commit()
+    conn.close()
+    return client
+
+def test_benchmark_paging_through_sensor_metrics(loaded: TestClient, benchmark):
+    def walk():
+        rows, url = 0, "/data/sensor-metrics/1?page_size=100&include_total=false"
+        while url:
+            page = loaded.get(url).json()
+            rows += len(page["data"])
+            cursor = page["metadata"].get("next_cursor")
+            url = f"/data/sensor-metrics/1?page_size=100&include_total=false&cursor={cursor}" if cursor else None
+        return rows
+
+    assert benchmark.pedantic(walk, rounds=3) == READINGS
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_benchmark_streaming_export(loaded: TestClient, benchmark, fmt):
+    response = benchmark(loaded.get, "/data/export", params={"turbine_id": 1, "format": fmt})
+    assert response.status_code == 200
+    assert len(response.content.splitlines()) == READINGS + (fmt == "csv")
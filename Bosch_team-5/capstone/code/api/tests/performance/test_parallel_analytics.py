@@ -0,0 +1,50 @@
+import sqlite3
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from app import buckets, etl, parallel
+from app.migrations import run_migrations
+
+pytestmark = pytest.mark.performance
+
+FLEET = list(range(1, 65))
+# Sub-hour edges on both ends, so every turbine also reduces raw rows.
+WINDOW = (datetime(2025, 1, 1, 0, 1), datetime(2025, 1, 3, 23, 59))
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    """Three days of minute-level readings for a 64-turbine fleet."""
+    path = tmp_path_factory.mktemp("fleet") / "fleet.db"
+    conn = sqlite3.connect(path)
+    run_migrations(conn)
+    rng = np.random.default_rng(20)
+    n = 3 * 24 * 60
+    for turbine_id in FLEET:
+        df = pd.DataFrame({col: rng.uniform(1.0, 900.0, n) for col in etl.REQUIRED_COLUMNS})
+        df["timestamp"] = (pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(n), unit="min")).strftime("%Y-%m-%d %H:%M:%S")
+        etl.insert_readings(conn, df, turbine_id)
+    conn.commit()
+    conn.close()
+    return path
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = parallel.AnalyticsPool(workers=4, min_turbines=8)
+    yield pool
+    pool.stop()
+
+@pytest.mark.parametrize("mode", ["inline", "process-pool"])
+def test_fleet_report(benchmark, db_path, pool, monkeypatch, mode):
+    monkeypatch.setattr(buckets, "RAW_PUSHDOWN", False)  # the NumPy reduction is the CPU-bound part
+    conn = sqlite3.connect(db_path)
+    try:
+        expected = buckets.compose(conn, FLEET, WINDOW)
+        if mode == "inline":
+            result = benchmark(buckets.compose, conn, FLEET, WINDOW)
+        else:
+            pool.compose(db_path, conn, FLEET, WINDOW)  # spawns the workers
+            result = benchmark(pool.compose, db_path, conn, FLEET, WINDOW)
+    finally:
+        conn.close()
+    assert result == expected
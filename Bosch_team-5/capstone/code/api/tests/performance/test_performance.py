@@ -15,4 +15,13 @@ def test_benchmark_upload_csv(client: TestClient, benchmark):
 
 def test_benchmark_analytics_report(client: TestClient, benchmark):
     filters = {"turbine_ids": [1]}
-    benchmark(client.post, "/data/analytics-report", json=filters)
\ No newline at end of file
+    benchmark(client.post, "/data/analytics-report", json=filters)
+
+def test_benchmark_health_summary(client: TestClient, benchmark):
+    header = "Lever position (lp),Ship speed (v) [knots],Gas Turbine shaft torque (gtt) [kn/m],Gas Turbine revolutions (gtn) [rpm],Gas Generator revolutions (ggn) [rpm],Starboard Propeller Torque (ts) [kn/m],Port Propeller Torque (tp) [kn/m],HP Turbine exit temperature (t48) [°c],Compressor inlet air temperature (t1) [°c],Compressor outlet air temperature (t2) [°c],HP Turbine exit pressure (p48) [bar],Compressor inlet air pressure (p1) [bar],Compressor outlet air pressure (p2) [bar],Exhaust gas pressure [bar],Turbine Injection Control (tic) [%],Fuel flow (mf) [kg/s],Compressor decay coefficient,Turbine decay coefficient\n"
+    rows = "".join(f"5.1,15,{5000 + i % 997},3500,9000,55,56,{600 + i % 89},20,500,1.2,1,10,1.01,80,0.25,0.99,0.99\n" for i in range(20_000))
+    upload = client.post("/data/upload-data/1?streaming=true", files={"file": ("history.csv", io.BytesIO((header + rows).encode('utf-8')), "text/csv")})
+    assert upload.status_code == 201, upload.text
+
+    response = benchmark(client.get, "/data/health-summary")
+    assert response.json()["data"][0]["record_count"] == 20_000
@@ -0,0 +1,59 @@
+import pytest
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from app.migrations import run_migrations
+
+pytestmark = pytest.mark.performance
+
+ROWS = 50_000
+
+def _seed(conn: sqlite3.Connection):
+    # Hourly readings for 20 turbines, interleaved the way concurrent ingestion writes them.
+    rng = random.Random(7)
+    start = datetime(2025, 1, 1)
+    conn.executemany(
+        "INSERT INTO sensor_readings (turbine_id, timestamp, t48, mf) VALUES (?, ?, ?, ?)",
+        (
+            (i % 20 + 1, (start + timedelta(hours=i // 20)).isoformat(), rng.uniform(400, 900), rng.random())
+            for i in range(ROWS)
+        ),
+    )
+    conn.commit()
+
+@pytest.fixture(params=["unindexed", "migrated"])
+def db(request):
+    conn = sqlite3.connect(":memory:")
+    if request.param == "migrated":
+        run_migrations(conn)
+    else:
+        conn.execute("CREATE TABLE sensor_readings (id INTEGER PRIMARY KEY, turbine_id INTEGER, timestamp TEXT, t48 REAL, mf REAL, reading_date TEXT GENERATED ALWAYS AS (date(timestamp)) STORED)")
+    _seed(conn)
+    conn.execute("ANALYZE")
+    yield request.param, conn
+    conn.close()
+
+DATE_RANGE_QUERY = "SELECT * FROM sensor_readings WHERE turbine_id IN (?) AND reading_date BETWEEN ? AND ?"
+LATEST_PAGE_QUERY = "SELECT * FROM sensor_readings WHERE turbine_id = ? ORDER BY timestamp DESC, id DESC LIMIT 11"
+
+def _plan(conn, query, params):
+    return " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+
+def test_benchmark_date_range_filter(db, benchmark):
+    variant, conn = db
+    params = (3, "2025-02-01", "2025-02-07")
+    plan = _plan(conn, DATE_RANGE_QUERY, params)
+    print(f"\n[{variant}] {plan}")
+    if variant == "migrated":
+        assert "idx_sensor_readings_turbine_date" in plan
+    else:
+        assert "SCAN sensor_readings" in plan
+    benchmark(lambda: conn.execute(DATE_RANGE_QUERY, params).fetchall())
+
+def test_benchmark_latest_page(db, benchmark):
+    variant, conn = db
+    plan = _plan(conn, LATEST_PAGE_QUERY, (3,))
+    print(f"\n[{variant}] {plan}")
+    if variant == "migrated":
+        assert "idx_sensor_readings_turbine_ts" in plan and "TEMP B-TREE" not in plan
+    benchmark(lambda: conn.execute(LATEST_PAGE_QUERY, (3,)).fetchall())
@@ -0,0 +1,39 @@
+import sqlite3
+import numpy as np
+import pytest
+from pydantic import TypeAdapter
+from app import models, serialization
+from app.pagination import build_page
+
+pytestmark = pytest.mark.performance
+
+ROWS = 10_000
+FIELDS = serialization.fields(models.TurbineReading)
+ADAPTER = TypeAdapter(models.PaginatedTurbineReadings)
+
+@pytest.fixture(scope="module")
+def rows():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    names = ["id", "timestamp"] + FIELDS
+    conn.execute(f"CREATE TABLE readings ({', '.join(names)})")
+    rng = np.random.default_rng(9)
+    conn.executemany(
+        f"INSERT INTO readings VALUES ({', '.join('?' for _ in names)})",
+        ((i, "2025-01-01 00:00:00", *rng.uniform(0, 1000, len(FIELDS) - 1).tolist(), 1) for i in range(ROWS))
+    )
+    return conn.execute("SELECT * FROM readings").fetchall()
+
+def _rows_per_second(benchmark):
+    benchmark.extra_info["rows_per_second"] = round(ROWS / benchmark.stats.stats.mean)
+
+def test_benchmark_validated_serialization(rows, benchmark):
+    def validated():
+        return ADAPTER.dump_json(ADAPTER.validate_python(build_page(rows, ROWS, "id", None, 1)))
+
+    benchmark(validated)
+    _rows_per_second(benchmark)
+
+def test_benchmark_fast_path_serialization(rows, benchmark):
+    benchmark(lambda: serialization.dumps(build_page(rows, ROWS, "id", None, 1, FIELDS)))
+    _rows_per_second(benchmark)
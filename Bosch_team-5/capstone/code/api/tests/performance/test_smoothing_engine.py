@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+from app import etl, smoothing
+
+pytestmark = pytest.mark.performance
+
+ROWS = 100_000
+VALUES = np.random.default_rng(3).normal(500, 50, size=(ROWS, len(etl.REQUIRED_COLUMNS)))
+
+@pytest.mark.parametrize("kind", smoothing.KINDS)
+@pytest.mark.parametrize("frame_rows", [1_000, 50_000])
+def test_benchmark_smoothing_in_frames(benchmark, kind, frame_rows):
+    """100,000 readings of every sensor column, smoothed in frames that carry the window."""
+    frames = np.split(VALUES, range(frame_rows, ROWS, frame_rows))
+
+    def run():
+        smoother = smoothing.Smoother(VALUES.shape[1], kind, etl.SMOOTHING_WINDOW)
+        return [smoother.apply(frame) for frame in frames][-1]
+
+    last = benchmark(run)
+    assert np.isfinite(last).all()
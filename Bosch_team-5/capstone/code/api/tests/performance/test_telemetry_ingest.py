@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app import telemetry
+
+pytestmark = pytest.mark.performance
+
+FRAMES = 20
+FRAME_READINGS = 2_500
+
+def _frame(start: int) -> bytes:
+    records = np.zeros(FRAME_READINGS, dtype=telemetry.RECORD)
+    records["timestamp"] = 1_735_689_600.0 + start + np.arange(FRAME_READINGS)
+    for name in telemetry.FIELDS:
+        records[name] = 0.2 if name == "mf" else 1.0 + np.arange(FRAME_READINGS) % 17 / 10
+    return records.tobytes()
+
+def test_benchmark_websocket_stream(client: TestClient, benchmark):
+    """50,000 readings over one stream, in binary frames of 2,500, committed in batches of 5,000."""
+    frames = [_frame(i * FRAME_READINGS) for i in range(FRAMES)]
+
+    def stream():
+        with client.websocket_connect("/data/stream/1") as ws:
+            for frame in frames:
+                ws.send_bytes(frame)
+            # Wait until every reading is committed.
+            while ws.receive_json()["committed"] < FRAMES * FRAME_READINGS:
+                pass
+
+    benchmark.pedantic(stream, rounds=3)
+    stats = client.get("/metrics/telemetry").json()
+    assert stats["flushed_rows"] == 3 * FRAMES * FRAME_READINGS
+    print(f"\n{FRAMES * FRAME_READINGS / benchmark.stats.stats.mean:,.0f} readings/s")
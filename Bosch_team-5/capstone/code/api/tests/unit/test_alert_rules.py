@@ -0,0 +1,56 @@
+import sqlite3
+import numpy as np
+from app.alerts import RuleRegistry, RuleSet, ThresholdRule, load_rules
+from app.migrations import run_migrations
+
+def _migrated_db() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    run_migrations(conn)
+    return conn
+
+def test_seeded_rules_match_scalar_thresholds():
+    columns = {
+        "t48": np.array([960.0, 700.0, 700.0]),
+        "decay_coeff_turbine": np.array([0.99, 0.95, 0.99]),
+        "decay_coeff_comp": np.array([0.99, 0.99, 0.99]),
+        "p1": np.array([1.0, 1.0, 0.0]),
+        "p2": np.array([12.0, 8.0, 8.0]),
+        "gtn": np.array([3000.0, 3000.0, 3000.0]),
+    }
+    columns["mf"] = np.array([0.1, 0.1, 0.1])
+    alerts = load_rules(_migrated_db()).evaluate(columns, np.array(["a", "b", "c"]), 7)
+
+    # Row "b" also trips the total decay score (0.06 < 0.01 + 0.05); p1 == 0 yields a
+    # pressure ratio of 0, which is below 9 at speed.
+    assert [(a[1], a[2]) for a in alerts] == [
+        ("a", "t48"), ("b", "decay_coeff_turbine"), ("b", "total_decay_score"),
+        ("b", "pressure_ratio"), ("c", "pressure_ratio"),
+    ]
+    assert alerts[0] == (7, "a", "t48", "Overheat", "High", 960.0, 950.0, "Critical Turbine Exit Temperature: 960.00 °C")
+    assert alerts[1][-1] == "Medium Turbine Decay Detected: 0.9500"
+
+    # The t48 bands do not overlap: one alert per reading, the more severe above 950.
+    columns["t48"] = np.array([850.0, 950.0, 951.0])
+    t48_alerts = [a[3] for a in load_rules(_migrated_db()).evaluate(columns, np.array(["a", "b", "c"]), 7) if a[2] == "t48"]
+    assert t48_alerts == ["High Exit Temperature", "High Exit Temperature", "Overheat"]
+
+def test_per_row_turbine_ids_and_reported_threshold():
+    rules = RuleSet([ThresholdRule("mf", ">", 0.3, "High Fuel Flow", "Critical", "mf={value:.2f} kg/s", reported_threshold=0.5)])
+    alerts = rules.evaluate({"mf": np.array([0.1, 0.4, 0.6])}, np.array(["x", "y", "z"]), np.array([1, 2, 3]))
+    assert [(a[0], a[6], a[7]) for a in alerts] == [(2, 0.5, "mf=0.40 kg/s"), (3, 0.5, "mf=0.60 kg/s")]
+
+def test_registry_hot_reloads_edited_rules_and_keeps_stats():
+    db = _migrated_db()
+    registry = RuleRegistry(check_interval=0)
+    columns = {"t48": np.array([850.0]), "mf": np.array([0.1]), "decay_coeff_comp": np.array([1.0]),
+               "decay_coeff_turbine": np.array([1.0]), "p1": np.array([1.0]), "p2": np.array([12.0]), "gtn": np.array([3000.0])}
+
+    assert [a[3] for a in registry.rules(db).evaluate(columns, np.array(["t"]), 1)] == ["High Exit Temperature"]
+    db.execute("UPDATE alert_rules SET threshold = 900 WHERE name = 't48_high'")
+    db.commit()
+    assert registry.rules(db).evaluate(columns, np.array(["t"]), 1) == []
+
+    stats = {row["name"]: row for row in registry.stats()}
+    assert stats["t48_high"]["hits"] == 0 and stats["t48_high"]["batches"] == 1
+    # Unchanged rules carry their counters across the reload.
+    assert stats["mf_high"]["batches"] == 2 and stats["mf_high"]["rows_evaluated"] == 2
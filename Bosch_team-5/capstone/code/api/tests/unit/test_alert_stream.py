@@ -0,0 +1,79 @@
+import asyncio
+import sqlite3
+import threading
+import aiosqlite
+from app import alert_stream, alerts, cache
+from app.migrations import run_migrations
+
+def _alert(alert_id, turbine_id=1, severity="High"):
+    return (alert_id, turbine_id, "2025-01-01T00:00:00", "t48", "Overheat", severity, 960.0, 950.0, "hot")
+
+def test_subscriptions_filter_by_turbine_and_severity():
+    async def scenario():
+        hub = alert_stream.AlertHub()
+        everything, turbine_two, critical = hub.subscribe(), hub.subscribe([2]), hub.subscribe(None, ["Critical"])
+        hub.publish([_alert(1), _alert(2, 2), _alert(3, 2, "Critical")])
+        return [[row[0] for row in (await sub.next(0))[0]] for sub in (everything, turbine_two, critical)]
+
+    assert asyncio.run(scenario()) == [[1, 2, 3], [2, 3], [3]]
+
+def test_a_slow_subscriber_keeps_the_newest_alerts_and_counts_the_dropped():
+    async def scenario():
+        hub = alert_stream.AlertHub(buffer=3)
+        subscription = hub.subscribe()
+        for alert_id in range(1, 6):
+            hub.publish([_alert(alert_id)])
+        rows, dropped = await subscription.next(0)
+        return [row[0] for row in rows], dropped, hub.stats()
+
+    ids, dropped, stats = asyncio.run(scenario())
+    assert (ids, dropped) == ([3, 4, 5], 2)
+    assert (stats["published"], stats["dropped"], stats["buffered"]) == (5, 2, 0)
+
+def test_alerts_published_from_another_thread_wake_the_subscriber():
+    async def scenario():
+        hub = alert_stream.AlertHub()
+        subscription = hub.subscribe()
+        threading.Timer(0.05, hub.publish, args=([_alert(7)],)).start()
+        rows, _ = await subscription.next(5)
+        hub.unsubscribe(subscription)
+        return rows, hub.stats()["subscribers"]
+
+    rows, subscribers = asyncio.run(scenario())
+    assert rows == [_alert(7)] and subscribers == 0
+
+def test_insert_alerts_records_the_ids_sqlite_assigned(tmp_path):
+    conn = sqlite3.connect(tmp_path / "alerts.db")
+    run_migrations(conn)
+    new = [_alert(None, turbine_id)[1:] for turbine_id in (1, 2, 3)]
+    alerts.insert_alerts(conn, new[:1])
+    writes = cache.WriteSet()
+    alerts.insert_alerts(conn, new, writes)
+    conn.commit()
+    stored = conn.execute(f"SELECT {', '.join(alert_stream.ALERT_FIELDS)} FROM alerts WHERE alert_id > 1 ORDER BY alert_id").fetchall()
+    conn.close()
+    assert writes.alerts == stored
+
+def test_only_replayed_alerts_are_skipped_from_the_live_stream(tmp_path):
+    conn = sqlite3.connect(tmp_path / "alerts.db")
+    run_migrations(conn)
+    alerts.insert_alerts(conn, [_alert(None)[1:] for _ in range(3)])
+    conn.commit()
+    conn.close()
+
+    async def scenario():
+        hub = alert_stream.AlertHub()
+        subscription = hub.subscribe()
+        db = await aiosqlite.connect(tmp_path / "alerts.db")
+        events = alert_stream.sse(db, subscription, last_id=1, keepalive=0.05)
+        ids = [await anext(events) for _ in range(3)]
+        # Alert 3 was also replayed; 4 was committed before 5 but published after it.
+        hub.publish([_alert(3), _alert(5)])
+        ids.append(await anext(events))
+        hub.publish([_alert(4)])
+        ids.append(await anext(events))
+        await events.aclose()
+        await db.close()
+        return [event.split(b"\n", 1)[0] for event in ids]
+
+    assert asyncio.run(scenario()) == [b"id: 2", b"id: 3", b": connected", b"id: 5", b"id: 4"]
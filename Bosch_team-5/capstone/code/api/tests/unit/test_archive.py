@@ -0,0 +1,48 @@
+import sqlite3
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from app import archive, etl
+from app.migrations import run_migrations
+
+pytest.importorskip("pyarrow")
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_ROOT", tmp_path / "archive")
+    monkeypatch.setattr(archive, "ROW_GROUP_ROWS", 500)
+    conn = sqlite3.connect(tmp_path / "archive.db")
+    run_migrations(conn)
+    rng = np.random.default_rng(5)
+    n = 3 * 30 * 24
+    for turbine_id in (1, 2):
+        df = pd.DataFrame({col: rng.uniform(1.0, 900.0, n) for col in etl.REQUIRED_COLUMNS})
+        df["timestamp"] = (pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(n), unit="h")).strftime("%Y-%m-%d %H:%M:%S")
+        etl.insert_readings(conn, df, turbine_id)
+    conn.commit()
+    yield conn
+    conn.close()
+
+def test_old_readings_move_into_turbine_month_partitions(db):
+    moved = archive.archive_readings(db, timedelta(days=10), now=datetime(2025, 3, 11))
+    assert moved == 2 * (31 + 28) * 24
+    assert db.execute("SELECT MIN(reading_date) FROM sensor_readings").fetchone()[0] == "2025-03-01"
+    partitions = db.execute("SELECT turbine_id, month, row_count, path FROM archive_files ORDER BY turbine_id, month").fetchall()
+    assert [(t, m, c) for t, m, c, _ in partitions] == [(1, "2025-01", 744), (1, "2025-02", 672), (2, "2025-01", 744), (2, "2025-02", 672)]
+    assert partitions[0][3].startswith("turbine_id=1/month=2025-01/")
+    assert archive.archive_readings(db, timedelta(days=10), now=datetime(2025, 3, 11)) == 0
+
+def test_reads_prune_partitions_columns_and_row_groups(db):
+    archive.archive_readings(db, timedelta(days=10), now=datetime(2025, 3, 11))
+    start, end = datetime(2025, 2, 3, 5, 30), datetime(2025, 2, 4, 2)
+    paths = archive.files(db, [1], start, end)
+    assert paths == [row[0] for row in db.execute("SELECT path FROM archive_files WHERE turbine_id = 1 AND month = '2025-02'")]
+
+    table = archive.read(paths, ["t48"], start, end)
+    assert table.column_names == ["turbine_id", "timestamp", "t48"]
+    assert table.column("timestamp").to_pylist() == [f"2025-02-03 {h:02d}:00:00" for h in range(6, 24)] + ["2025-02-04 00:00:00", "2025-02-04 01:00:00"]
+
+    stats = dict(db.execute("SELECT month, column_stats FROM archive_files WHERE turbine_id = 1").fetchall())
+    assert "t48" in stats["2025-02"]
+    assert archive.stats(db)["rows"] == 2 * (31 + 28) * 24
@@ -0,0 +1,62 @@
+import asyncio
+import sqlite3
+import threading
+import pytest
+from app import async_db
+from app.migrations import run_migrations
+
+@pytest.fixture
+def adb(tmp_path):
+    path = tmp_path / "async.db"
+    conn = sqlite3.connect(path)
+    run_migrations(conn)
+    conn.close()
+    adb = async_db.AsyncDatabase(path, readers=2, cpu_workers=1, queue_limit=2)
+    yield adb
+    asyncio.run(adb.close())
+
+def _insert(conn, location, commit=True):
+    conn.execute("INSERT INTO turbine_metadata (location) VALUES (?)", (location,))
+    if commit:
+        conn.commit()
+    return threading.current_thread().name
+
+def test_writes_run_in_order_on_one_thread_and_uncommitted_work_is_rolled_back(adb):
+    async def scenario():
+        threads = await asyncio.gather(*(adb.write(_insert, f"site {i}") for i in range(5)))
+        await adb.write(_insert, "never committed", False)
+        with pytest.raises(sqlite3.IntegrityError):
+            await adb.write(lambda conn: conn.execute("INSERT INTO turbine_metadata (turbine_id) VALUES (1)"))
+        reader = await adb.reader()
+        rows = await reader.execute_fetchall("SELECT location FROM turbine_metadata ORDER BY turbine_id")
+        return threads, [row[0] for row in rows]
+
+    threads, locations = asyncio.run(scenario())
+    assert len(set(threads)) == 1
+    assert locations == [f"site {i}" for i in range(5)]
+
+def test_readers_are_shared_round_robin_and_survive_a_new_event_loop(adb):
+    first = asyncio.run(adb.reader())
+
+    async def two_readers():
+        return await asyncio.gather(adb.reader(), adb.reader())
+
+    second, third = asyncio.run(two_readers())
+    assert first is third and first is not second
+    assert asyncio.run(third.execute_fetchall("SELECT 1"))[0][0] == 1
+    assert adb.stats()["open_readers"] == 2
+
+def test_offload_rejects_calls_beyond_the_queue_limit(adb):
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(adb.offload(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(async_db.Overloaded):
+            await adb.offload(release.wait)
+        release.set()
+        return await asyncio.gather(*running)
+
+    assert asyncio.run(scenario()) == [True, True]
+    stats = adb.stats()
+    assert (stats["offloaded"], stats["rejected"], stats["pending_offloads"]) == (2, 1, 0)
@@ -0,0 +1,25 @@
+from datetime import datetime
+import numpy as np
+from app import buckets
+
+def test_cover_uses_coarsest_aligned_pieces():
+    pieces = buckets.cover(datetime(2025, 1, 1, 10, 30), datetime(2025, 1, 3, 5, 15))
+    assert [(kind, str(a), str(b)) for kind, a, b in pieces] == [
+        ("raw", "2025-01-01 10:30:00", "2025-01-01 11:00:00"),
+        ("hour", "2025-01-01 11:00:00", "2025-01-02 00:00:00"),
+        ("day", "2025-01-02 00:00:00", "2025-01-03 00:00:00"),
+        ("hour", "2025-01-03 00:00:00", "2025-01-03 05:00:00"),
+        ("raw", "2025-01-03 05:00:00", "2025-01-03 05:15:00"),
+    ]
+    assert buckets.cover(datetime(2025, 1, 1), datetime(2025, 1, 2)) == [("day", datetime(2025, 1, 1), datetime(2025, 1, 2))]
+
+def test_summarize_keys_buckets_in_utc_and_skips_undated_rows():
+    columns = {"t48": np.array([600.0, 700.0, 800.0]), "p1": np.array([1.0, 1.0, 1.0]), "p2": np.array([10.0, 10.0, 10.0])}
+    timestamps = ["2025-01-01T23:30:00+02:00", "2025-01-01 21:10:00", None]
+    rows = buckets.summarize(columns, timestamps, 7)
+    keys = {(row[1], row[2]): row for row in rows}
+    assert set(keys) == {("day", "2025-01-01"), ("hour", "2025-01-01 21:00:00")}
+    day = dict(zip(buckets._BUCKET_COLUMNS, keys[("day", "2025-01-01")]))
+    assert day["record_count"] == 2
+    assert (day["t48_min"], day["t48_max"], day["t48_sum"]) == (600.0, 700.0, 1300.0)
+    assert day["first_timestamp"] == "2025-01-01 21:10:00"
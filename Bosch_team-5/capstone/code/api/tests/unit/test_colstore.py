@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from app import cache, colstore, etl
+from app.migrations import run_migrations
+
+def _hours(start: str, n: int) -> np.ndarray:
+    return (pd.Timestamp(start) + pd.to_timedelta(np.arange(n), unit="h")).strftime("%Y-%m-%d %H:%M:%S").to_numpy()
+
+@pytest.fixture
+def store(tmp_path):
+    return colstore.ColumnStore(tmp_path / "colstore")
+
+def test_time_range_slices_are_views_of_the_mapped_files(store):
+    store.append(7, _hours("2025-01-01", 48), {"t48": np.arange(48.0), "mf": np.arange(48.0) / 10})
+    columns = store.open(7)
+    assert columns.sorted and columns.count == 48 and columns.columns == ["mf", "t48"]
+
+    window = columns.slice(np.datetime64("2025-01-01T05:30"), np.datetime64("2025-01-01T09:00"), ["t48"])
+    assert window["t48"].tolist() == [6.0, 7.0, 8.0]
+    assert window["timestamp"][0] == np.datetime64("2025-01-01T06:00")
+    assert np.shares_memory(window["t48"], columns.column("t48"))
+
+def test_float32_store_and_naive_timestamps_as_utc(tmp_path):
+    store = colstore.ColumnStore(tmp_path / "f32", np.float32)
+    store.append([1, 2, 1], np.array(["2025-01-01T01:00:00+01:00", "2025-01-01 00:00:00", "not a time"], dtype=object), {"t48": np.array([1.5, 2.5, 3.5])})
+    assert store.turbines() == [1, 2]
+    first = store.open(1)
+    assert first.count == 1 and first.column("t48").dtype == np.float32
+    assert first.timestamps[0] == np.datetime64("2025-01-01T00:00", "ns").astype(np.int64)
+
+def test_staged_rows_stay_hidden_until_commit_and_rollbacks_are_overwritten(store):
+    store.append(1, _hours("2025-01-01", 2), {"t48": np.array([1.0, 2.0])})
+
+    rolled_back = cache.WriteSet()
+    store.stage(rolled_back, 1, _hours("2025-01-02", 3), {"t48": np.array([9.0, 9.0, 9.0])})
+    assert store.open(1).count == 2
+
+    writes = cache.WriteSet()
+    store.stage(writes, 1, _hours("2025-01-03", 1), {"t48": np.array([3.0])})
+    store.stage(writes, 1, _hours("2025-01-04", 1), {"t48": np.array([4.0])})
+    store.commit(rolled_back)
+    assert store.open(1).count == 2
+    store.commit(writes)
+    assert store.open(1).column("t48").tolist() == [1.0, 2.0, 3.0, 4.0]
+
+def test_a_second_writer_waits_for_committed_rows_to_be_published(store):
+    first = cache.WriteSet()
+    store.stage(first, 1, _hours("2025-01-01", 2), {"t48": np.array([1.0, 2.0])})
+    # The first transaction has committed in SQLite but not published yet when a writer on
+    # another thread stages the same turbine.
+    second = threading.Thread(target=store.append, args=(1, _hours("2025-01-02", 1), {"t48": np.array([3.0])}))
+    second.start()
+    second.join(0.2)
+    assert second.is_alive()
+    store.commit(first)
+    second.join(5)
+    assert store.open(1).column("t48").tolist() == [1.0, 2.0, 3.0]
+
+def test_rows_left_by_another_thread_are_taken_over_after_the_wait(store, monkeypatch):
+    monkeypatch.setattr(colstore, "STAGE_WAIT_SECONDS", 0.05)
+    abandoned = threading.Thread(target=store.stage, args=(cache.WriteSet(), 1, _hours("2025-01-01", 2), {"t48": np.array([9.0, 9.0])}))
+    abandoned.start()
+    abandoned.join()
+    store.append(1, _hours("2025-01-02", 1), {"t48": np.array([3.0])})
+    assert store.open(1).column("t48").tolist() == [3.0]
+
+def test_out_of_order_appends_fall_back_to_masks_until_compacted(store):
+    store.append(1, _hours("2025-01-02", 3), {"t48": np.array([4.0, 5.0, 6.0])})
+    store.append(1, _hours("2025-01-01", 3), {"t48": np.array([1.0, 2.0, 3.0])})
+    columns = store.open(1)
+    assert not columns.sorted
+    assert columns.slice(np.datetime64("2025-01-01T01:00"), np.datetime64("2025-01-02T01:00"))["t48"].tolist() == [4.0, 2.0, 3.0]
+
+    store.compact(1)
+    columns = store.open(1)
+    assert columns.sorted and columns.column("t48").tolist() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+def test_compaction_leaves_staged_rows_alone_until_they_publish(store):
+    store.append(1, _hours("2025-01-02", 2), {"t48": np.array([3.0, 4.0])})
+    store.append(1, _hours("2025-01-01", 1), {"t48": np.array([1.0])})
+    writes = cache.WriteSet()
+    store.stage(writes, 1, _hours("2025-01-03", 1), {"t48": np.array([5.0])})
+    assert store.compact(1) is False
+
+    store.commit(writes)
+    assert store.open(1).column("t48").tolist() == [3.0, 4.0, 1.0, 5.0]
+    assert store.compact(1) is True
+    assert store.open(1).column("t48").tolist() == [1.0, 3.0, 4.0, 5.0]
+
+def test_ingestion_publishes_on_commit_and_backfill_matches(tmp_path, store, monkeypatch):
+    monkeypatch.setattr(colstore, "store", store)
+    conn = sqlite3.connect(tmp_path / "readings.db")
+    run_migrations(conn)
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({col: rng.uniform(1.0, 900.0, 24) for col in etl.REQUIRED_COLUMNS})
+    df["timestamp"] = _hours("2025-01-01", 24)
+
+    writes = cache.WriteSet()
+    etl.insert_readings(conn, df, 5, writes)
+    assert store.open(5).count == 0
+    conn.commit()
+    etl.after_commit(writes)
+
+    live = store.frame(["t48", "mf"])
+    backfilled = colstore.ColumnStore(tmp_path / "backfill")
+    assert backfilled.backfill(conn, etl.REQUIRED_COLUMNS) == 24
+    pd.testing.assert_frame_equal(live, backfilled.frame(["t48", "mf"]))
+    assert live["t48"].tolist() == df["t48"].tolist()
+    conn.close()
@@ -0,0 +1,42 @@
+import pytest
+import threading
+from app.database import ConnectionPool, PoolTimeout
+
+def test_connections_are_reused_and_tuned(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", max_size=2)
+    first = pool.acquire()
+    assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert first.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    pool.release(first)
+
+    assert pool.acquire() is first
+    assert pool.stats()["connections"] == 1
+    pool.close()
+
+def test_pool_is_bounded_and_times_out(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", max_size=1, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    # A waiter is served as soon as the connection comes back.
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    pool.timeout = 2.0
+    waiter.start()
+    pool.release(held)
+    waiter.join()
+    assert got == [held]
+    stats = pool.stats()
+    assert stats["timeouts"] == 1 and stats["waits"] == 1 and stats["in_use"] == 1
+
+def test_release_rolls_back_open_transaction(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", max_size=1)
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.execute("INSERT INTO t VALUES (1)")
+    assert conn.in_transaction
+    pool.release(conn)
+
+    conn = pool.acquire()
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app import derived
+
+def _legacy_derived(df: pd.DataFrame) -> pd.DataFrame:
+    """The per-endpoint pandas formulas the kernel replaced."""
+    gamma, k_to_c = 1.4, 273.15
+    out = pd.DataFrame(index=df.index)
+    out['pressure_ratio'] = df['p2'] / df['p1']
+    t1_k, t2_k = df['t1'] + k_to_c, df['t2'] + k_to_c
+    t2s_k = t1_k * (out['pressure_ratio']**((gamma - 1) / gamma))
+    out['compressor_efficiency'] = ((t2s_k - t1_k) / (t2_k - t1_k)) * 100
+    out['thermal_efficiency'] = (1 - (1 / (out['pressure_ratio']**((gamma - 1) / gamma)))) * 100
+    out['temp_ratio_t48_p48'] = df['t48'] / df['p48']
+    out['temp_ratio_t1_p1'] = df['t1'] / df['p1']
+    out['temp_ratio_t2_p2'] = df['t2'] / df['p2']
+    out['torque_diff'] = df['ts'] - df['tp']
+    out['rpm_ratio_gtn_ggn'] = df['gtn'] / df['ggn']
+    out['fuel_per_rpm'] = df['mf'] / df['gtn']
+    out['total_prop_torque'] = df['ts'] + df['tp']
+    out['power_proxy_kw'] = df['gtt'] * (df['gtn'] * (2 * np.pi / 60))
+    out['total_decay_score'] = (1 - df['decay_coeff_comp']) + (1 - df['decay_coeff_turbine'])
+    return out.replace([np.inf, -np.inf], np.nan)
+
+@pytest.fixture
+def readings() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({name: rng.uniform(0.5, 900.0, 500) for name in derived.BASE_INPUTS})
+    # Zero divisors and equal temperatures exercise the inf -> NaN handling.
+    df.loc[:4, 'p1'] = 0.0
+    df.loc[5:9, 'gtn'] = 0.0
+    df.loc[10:14, 't2'] = df.loc[10:14, 't1']
+    return df
+
+def test_kernel_matches_legacy_formulas(readings):
+    expected = _legacy_derived(readings)
+    result = derived.compute_derived({name: readings[name].to_numpy() for name in derived.BASE_INPUTS})
+    assert set(result) == set(derived.DERIVED_METRICS)
+    for name in derived.DERIVED_METRICS:
+        np.testing.assert_allclose(result[name], expected[name].to_numpy(), rtol=1e-12, equal_nan=True, err_msg=name)
+        assert not np.isinf(result[name]).any()
+
+def test_kernel_writes_into_preallocated_buffers(readings):
+    buffers = derived.allocate(len(readings))
+    result = derived.compute_derived({name: readings[name].to_numpy() for name in derived.BASE_INPUTS}, out=buffers)
+    assert all(result[name] is buffers[name] for name in derived.DERIVED_METRICS)
+
+def test_row_and_column_entry_points_agree(readings):
+    frame = derived.add_derived_columns(readings.copy())
+    row = derived.derive_row(readings.iloc[20].to_dict())
+    for name, value in row.items():
+        assert value == pytest.approx(frame[name].iloc[20])
@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+import numpy as np
+import pytest
+from app import cache, drift
+from app.migrations import run_migrations
+
+ROWS = 400
+
+def _readings(seed=11):
+    """Steady decay coefficients and pressure ratio, then a slow turbine decay and one pressure spike."""
+    rng = np.random.default_rng(seed)
+    comp = 0.99 + rng.normal(0, 0.002, ROWS)
+    turbine = 0.99 + rng.normal(0, 0.002, ROWS)
+    turbine[250:] -= np.linspace(0, 0.02, ROWS - 250)
+    p1 = np.ones(ROWS)
+    p2 = 10 + rng.normal(0, 0.05, ROWS)
+    p2[300] = 13.0
+    columns = {"decay_coeff_comp": comp, "decay_coeff_turbine": turbine, "p1": p1, "p2": p2}
+    timestamps = np.array([f"2025-01-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}" for i in range(ROWS)])
+    return columns, timestamps
+
+def _db():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    run_migrations(conn)
+    return conn
+
+def _run(monitor, conn, columns, timestamps, rows):
+    writes = cache.WriteSet()
+    found = monitor.evaluate(conn, {name: values[rows] for name, values in columns.items()}, timestamps[rows], 1, writes)
+    monitor.commit(writes)
+    return found
+
+def _state_fields(state):
+    return {field: getattr(state, field).tolist() for field in drift.DriftState.FIELDS}
+
+def test_online_scoring_matches_the_batch_bit_for_bit():
+    columns, timestamps = _readings()
+    conn = _db()
+    batch, online = drift.DriftMonitor(), drift.DriftMonitor()
+    batch_alerts = _run(batch, conn, columns, timestamps, slice(None))
+    online_alerts = [alert for i in range(ROWS) for alert in _run(online, conn, columns, timestamps, slice(i, i + 1))]
+
+    assert online_alerts == batch_alerts
+    assert _state_fields(online.state(1)) == _state_fields(batch.state(1))
+    kinds = {(alert[2], alert[3]) for alert in batch_alerts}
+    assert ("decay_coeff_turbine", "Downward Drift") in kinds
+    assert ("pressure_ratio", "Statistical Outlier") in kinds and ("pressure_ratio", "Upward Drift") not in kinds
+    assert all(alert[1] >= timestamps[drift.WARMUP_READINGS] for alert in batch_alerts)
+
+def test_an_open_excursion_raises_one_alert():
+    values = np.full((300, len(drift.DRIFT_METRICS)), 0.99)
+    values[150:, 1] = 0.97
+    _, result = drift.score(drift.DriftState(), values)
+    assert result["outliers"][:, 1].sum() == 1 and result["downward"][:, 1].sum() == 1
+    assert not result["outliers"][:, [0, 2]].any() and not result["upward"].any()
+
+def test_uncommitted_writes_leave_the_state_alone_and_saves_resume():
+    columns, timestamps = _readings()
+    conn = _db()
+    monitor = drift.DriftMonitor(persist_interval=0)
+    rolled_back = cache.WriteSet()
+    monitor.evaluate(conn, columns, timestamps, 1, rolled_back)
+    conn.rollback()
+    assert monitor.state(1).count.tolist() == [0, 0, 0]
+
+    writes = cache.WriteSet()
+    monitor.evaluate(conn, columns, timestamps, 1, writes)
+    conn.commit()
+    monitor.commit(writes)
+    assert set(writes.drift_saved) == {1} and monitor.stats()["unsaved_turbines"] == 0
+    assert _state_fields(drift.load_state(conn, 1)) == _state_fields(monitor.state(1))
+
+@pytest.mark.parametrize("split", [1, 37])
+def test_counts_follow_alerts_for_mixed_turbines(split):
+    columns, timestamps = _readings()
+    conn = _db()
+    ids = np.where(np.arange(ROWS) % 2, 1, 2)
+    counts = np.zeros(ROWS, dtype=np.int64)
+    monitor = drift.DriftMonitor()
+    found = []
+    for start in range(0, ROWS, split):
+        rows = slice(start, start + split)
+        writes = cache.WriteSet()
+        found += monitor.evaluate(conn, {name: values[rows] for name, values in columns.items()}, timestamps[rows], ids[rows], writes, counts[rows])
+        monitor.commit(writes)
+    assert counts.sum() == len(found) > 0
+
+def test_a_write_on_another_thread_builds_on_the_uncommitted_one():
+    columns, timestamps = _readings()
+    conn = _db()
+    monitor = drift.DriftMonitor()
+    first = cache.WriteSet()
+    monitor.evaluate(conn, {name: values[:10] for name, values in columns.items()}, timestamps[:10], 1, first)
+    second = threading.Thread(target=_run, args=(monitor, conn, columns, timestamps, slice(10, 15)))
+    second.start()
+    second.join(0.2)
+    assert second.is_alive()
+    monitor.commit(first)
+    second.join(5)
+    assert monitor.state(1).count.tolist() == [15, 15, 15]
+
+def test_a_hold_left_by_a_rolled_back_write_on_another_thread_expires(monkeypatch):
+    monkeypatch.setattr(drift, "COMMIT_WAIT_SECONDS", 0.05)
+    columns, timestamps = _readings()
+    conn = _db()
+    monitor = drift.DriftMonitor()
+    rolled_back = threading.Thread(target=monitor.evaluate, args=(conn, {name: values[:10] for name, values in columns.items()}, timestamps[:10], 1, cache.WriteSet()))
+    rolled_back.start()
+    rolled_back.join()
+    _run(monitor, conn, columns, timestamps, slice(10, 15))
+    assert monitor.state(1).count.tolist() == [5, 5, 5]
@@ -0,0 +1,126 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import pytest
+from app import async_db, colstore, database, ingest_queue, models
+from app.migrations import run_migrations
+
+def _reading(second: int) -> models.TurbineReadingCreate:
+    values = {name: 1.0 for name in models.TurbineReadingCreate.model_fields if name != "timestamp"}
+    return models.TurbineReadingCreate(timestamp=f"2025-01-01T00:00:{second:02d}", **values)
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(colstore, "store", colstore.ColumnStore(tmp_path / "colstore"))
+    path = tmp_path / "queue.db"
+    conn = sqlite3.connect(path)
+    run_migrations(conn)
+    conn.close()
+    adb = async_db.AsyncDatabase(path)
+    monkeypatch.setattr(async_db, "db", adb)
+    yield path
+    asyncio.run(adb.close())
+
+def _stored(path) -> list:
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT turbine_id, timestamp FROM sensor_readings ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+def test_group_commits_by_size_and_interval(db_path):
+    queue = ingest_queue.WriteBehindQueue(batch_rows=4, flush_interval_ms=20)
+    queue.start()
+    try:
+        for second in range(10):
+            queue.put(1 + second % 2, _reading(second))
+        assert queue.flush(timeout=5)
+    finally:
+        queue.stop()
+    assert _stored(db_path) == [(1 + s % 2, f"2025-01-01T00:00:{s:02d}") for s in range(10)]
+    stats = queue.stats()
+    assert (stats["committed_rows"], stats["failed_rows"], stats["queue_depth"]) == (10, 0, 0)
+    assert stats["commits"] >= 3  # at most four readings per group commit
+
+def test_full_queue_rejects_and_stop_flushes_what_was_accepted(db_path):
+    queue = ingest_queue.WriteBehindQueue(max_depth=2, batch_rows=100, flush_interval_ms=60_000)
+    with pytest.raises(ingest_queue.WriterStopped):
+        queue.put(1, _reading(0))
+    queue.start()
+    queue.put(1, _reading(0))
+    queue.put(1, _reading(1))
+    with pytest.raises(ingest_queue.QueueFull):
+        queue.put(1, _reading(2))
+    assert _stored(db_path) == []
+
+    queue.stop()
+    assert len(_stored(db_path)) == 2
+    assert queue.stats()["rejected"] == 1
+    with pytest.raises(ingest_queue.WriterStopped):
+        queue.put(1, _reading(3))
+
+def test_a_batch_waits_out_another_writers_lock(db_path, monkeypatch):
+    # Shorter than the lock below, so the writer's own wait gives up and the batch is retried.
+    monkeypatch.setattr(database, "CONNECTION_PRAGMAS", database.CONNECTION_PRAGMAS[:-1] + ("PRAGMA busy_timeout = 20",))
+    blocker = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+    blocker.execute("BEGIN IMMEDIATE")
+    release = threading.Timer(1.0, blocker.execute, ("COMMIT",))
+    queue = ingest_queue.WriteBehindQueue(batch_rows=4, flush_interval_ms=0)
+    queue.start()
+    try:
+        release.start()
+        for second in range(3):
+            queue.put(1, _reading(second))
+        time.sleep(0.2)
+        # Still queued, not written off.
+        assert (queue.stats()["queue_depth"], queue.stats()["failed_rows"]) == (3, 0)
+        assert queue.flush(timeout=10)
+    finally:
+        queue.stop()
+        release.join()
+        blocker.close()
+    assert len(_stored(db_path)) == 3
+    stats = queue.stats()
+    assert (stats["committed_rows"], stats["failed_rows"], stats["queue_depth"]) == (3, 0, 0)
+    assert stats["lock_retries"] > 0
+
+def test_a_failed_batch_is_dead_lettered(db_path, monkeypatch):
+    def fail(conn, *args):
+        raise ValueError("bad batch")
+
+    monkeypatch.setattr(ingest_queue, "_commit_group", fail)
+    queue = ingest_queue.WriteBehindQueue(batch_rows=4, flush_interval_ms=0)
+    queue.start()
+    try:
+        queue.put(2, _reading(0))
+        assert queue.flush(timeout=5)
+    finally:
+        queue.stop()
+    stats = queue.stats()
+    assert (stats["committed_rows"], stats["failed_rows"], stats["dead_lettered_rows"], stats["queue_depth"]) == (0, 1, 1, 0)
+    conn = sqlite3.connect(db_path)
+    turbine_id, reading, error = conn.execute("SELECT turbine_id, reading, error FROM ingest_dead_letters").fetchone()
+    conn.close()
+    assert turbine_id == 2 and models.TurbineReadingCreate.model_validate_json(reading) == _reading(0)
+    assert "bad batch" in error
+
+def test_lock_retries_give_up_at_the_deadline(db_path, monkeypatch, caplog):
+    monkeypatch.setattr(database, "CONNECTION_PRAGMAS", database.CONNECTION_PRAGMAS[:-1] + ("PRAGMA busy_timeout = 20",))
+    # Opened (and switched to WAL) before the lock is taken.
+    async_db.db.submit(lambda conn: None).result()
+    blocker = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+    blocker.execute("BEGIN IMMEDIATE")
+    queue = ingest_queue.WriteBehindQueue(batch_rows=4, flush_interval_ms=0, retry_deadline=0.3)
+    queue.start()
+    try:
+        queue.put(1, _reading(0))
+        assert queue.flush(timeout=5)
+    finally:
+        assert queue.stop(timeout=5)
+        blocker.execute("COMMIT")
+        blocker.close()
+    stats = queue.stats()
+    assert (stats["committed_rows"], stats["failed_rows"], stats["queue_depth"]) == (0, 1, 0)
+    assert stats["lock_retries"] > 0
+    # The dead-letter table is locked too, so the loss is logged.
+    assert "Lost 1 write-behind readings" in caplog.text
@@ -0,0 +1,47 @@
+import sqlite3
+from app import buckets, database
+from app.migrations import MIGRATIONS, run_migrations, schema_version
+
+def test_fresh_database_reaches_latest_version():
+    conn = sqlite3.connect(":memory:")
+    assert run_migrations(conn) == MIGRATIONS[-1][0]
+    # Re-running is a no-op.
+    assert run_migrations(conn) == MIGRATIONS[-1][0]
+
+    conn.execute("INSERT INTO sensor_readings (turbine_id, timestamp) VALUES (1, '2025-09-23T10:15:00')")
+    assert conn.execute("SELECT reading_date FROM sensor_readings").fetchone()[0] == "2025-09-23"
+
+def test_legacy_tables_are_upgraded_in_place():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE sensor_readings (id INTEGER PRIMARY KEY, turbine_id INTEGER, timestamp TEXT, t48 REAL)")
+    conn.execute("CREATE TABLE alerts (alert_id INTEGER PRIMARY KEY, turbine_id INTEGER, timestamp TEXT)")
+    conn.execute("INSERT INTO sensor_readings (turbine_id, timestamp, t48) VALUES (1, '2025-09-23 10:15:00', 600)")
+    conn.commit()
+
+    run_migrations(conn)
+
+    assert schema_version(conn) == MIGRATIONS[-1][0]
+    assert conn.execute("SELECT reading_date, t48 FROM sensor_readings").fetchone() == ("2025-09-23", 600)
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(sensor_readings)")}
+    assert {"idx_sensor_readings_turbine_ts", "idx_sensor_readings_turbine_date"} <= indexes
+
+def test_derived_tables_are_rebuilt_after_the_migrations():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE sensor_readings (id INTEGER PRIMARY KEY, turbine_id INTEGER, timestamp TEXT, t48 REAL)")
+    conn.execute("CREATE TABLE alerts (alert_id INTEGER PRIMARY KEY, turbine_id INTEGER, timestamp TEXT)")
+    conn.executemany("INSERT INTO sensor_readings (turbine_id, timestamp, t48) VALUES (1, ?, ?)", [("2025-09-23 10:15:00", 600), ("2025-09-23 11:15:00", 700)])
+    conn.commit()
+
+    run_migrations(conn)
+    assert conn.execute("SELECT COUNT(*) FROM turbine_rollups").fetchone()[0] == 0
+    assert database.rebuild_pending(conn) == ["reading_buckets", "turbine_rollups"]
+    assert conn.execute("SELECT value_count, value_sum FROM turbine_rollups WHERE metric = 't48'").fetchone() == (2, 1300.0)
+    assert conn.execute("SELECT record_count, t48_max FROM reading_buckets WHERE resolution = 'day'").fetchone() == (2, 700.0)
+    assert database.rebuild_pending(conn) == []
+
+def test_frozen_bucket_schema_matches_the_bucket_code():
+    conn = sqlite3.connect(":memory:")
+    run_migrations(conn)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(reading_buckets)")]
+    # A new bucket statistic needs a migration of its own.
+    assert columns[6:] == buckets.STATS_COLUMNS
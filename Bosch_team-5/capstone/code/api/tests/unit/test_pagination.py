@@ -0,0 +1,24 @@
+import sqlite3
+from app.migrations import run_migrations
+from app.pagination import build_page, keyset_query
+
+def test_keyset_walk_covers_dated_and_undated_rows():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    run_migrations(conn)
+    # Every fifth row lacks a timestamp, as rows loaded by older uploads do.
+    conn.executemany(
+        "INSERT INTO sensor_readings (turbine_id, timestamp) VALUES (1, ?)",
+        [(f"2025-01-01T{i % 6:02d}:00:00" if i % 5 else None,) for i in range(40)]
+    )
+    expected = [row["id"] for row in conn.execute("SELECT id FROM sensor_readings ORDER BY timestamp DESC, id DESC")]
+
+    rows = conn.execute("SELECT * FROM sensor_readings WHERE turbine_id = 1 ORDER BY timestamp DESC, id DESC LIMIT 8").fetchall()
+    page = build_page(rows, 7, "id", None, 1)
+    seen = [row["id"] for row in page["data"]]
+    while page["metadata"]["next_cursor"]:
+        query, params = keyset_query("sensor_readings", "WHERE turbine_id = ?", [1], "id", page["metadata"]["next_cursor"], 8)
+        page = build_page(conn.execute(query, params).fetchall(), 7, "id", None, 1)
+        seen.extend(row["id"] for row in page["data"])
+
+    assert seen == expected
@@ -0,0 +1,55 @@
+import sqlite3
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from app import buckets, etl, parallel
+from app.migrations import run_migrations
+
+WINDOW = (datetime(2025, 1, 1, 3, 17), datetime(2025, 1, 2, 9, 41))
+TURBINES = list(range(1, 11))
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "fleet.db"
+    conn = sqlite3.connect(path)
+    run_migrations(conn)
+    rng = np.random.default_rng(20)
+    n = 2 * 24 * 60
+    for turbine_id in TURBINES:
+        df = pd.DataFrame({col: rng.uniform(1.0, 900.0, n) for col in etl.REQUIRED_COLUMNS})
+        df["timestamp"] = (pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(n), unit="min")).strftime("%Y-%m-%d %H:%M:%S")
+        etl.insert_readings(conn, df, turbine_id)
+    conn.commit()
+    conn.close()
+    return path
+
+@pytest.fixture
+def pool():
+    pool = parallel.AnalyticsPool(workers=3, min_turbines=4)
+    yield pool
+    pool.stop()
+
+def test_worker_results_match_inline_composition(db_path, pool):
+    conn = sqlite3.connect(db_path)
+    try:
+        for window in (WINDOW, None):
+            assert pool.compose(db_path, conn, TURBINES, window) == buckets.compose(conn, TURBINES, window)
+    finally:
+        conn.close()
+    assert pool.stats()["parallel_requests"] == 2
+    assert pool.stats()["inline_requests"] == 0
+
+def test_small_requests_and_single_worker_pools_run_inline(db_path, pool):
+    conn = sqlite3.connect(db_path)
+    try:
+        assert pool.compose(db_path, conn, TURBINES[:3], WINDOW) == buckets.compose(conn, TURBINES[:3], WINDOW)
+        assert parallel.AnalyticsPool(workers=1, min_turbines=1).compose(db_path, conn, TURBINES, WINDOW) == buckets.compose(conn, TURBINES, WINDOW)
+    finally:
+        conn.close()
+    assert pool.stats()["inline_requests"] == 1
+    assert not pool.stats()["running"]
+
+def test_slices_spread_turbines_evenly():
+    assert parallel._slices([1, 2, 3, 4, 5, 6, 7], 3) == [[1, 4, 7], [2, 5], [3, 6]]
+    assert parallel._slices([1, 2], 4) == [[1], [2]]
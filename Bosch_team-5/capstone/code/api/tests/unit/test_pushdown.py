@@ -0,0 +1,72 @@
+import sqlite3
+from datetime import datetime
+import numpy as np
+import pytest
+from app import buckets, derived, etl
+from app.migrations import run_migrations
+
+@pytest.fixture
+def db(tmp_path):
+    conn = sqlite3.connect(tmp_path / "pushdown.db")
+    run_migrations(conn)
+    rng = np.random.default_rng(19)
+    n = 600
+    values = {col: rng.uniform(-50.0, 900.0, n) for col in etl.REQUIRED_COLUMNS}
+    # Zero divisors, negative pressure ratios, equal temperatures and gaps, as stored data has them.
+    values["p1"][:20] = 0.0
+    values["p2"][20:40] = -values["p2"][20:40]
+    values["t2"][40:60] = values["t1"][40:60]
+    values["gtn"][60:70] = 0.0
+    values["mf"][70:80] = np.nan
+    values["t48"][80:85] = 5  # integers stored in REAL columns
+    stamps = [f"2025-01-01 {i // 60 % 24:02d}:{i % 60:02d}:{i % 7:02d}" for i in range(n)]
+    stamps[100:110] = [None] * 5 + ["not a time"] * 5
+    stamps[110:120] = [f"2025-01-01T0{i % 3}:15:00+01:00" for i in range(10)]
+    rows = [(stamps[i], *[None if np.isnan(values[col][i]) else values[col][i].item() for col in etl.REQUIRED_COLUMNS], 1 + i % 3) for i in range(n)]
+    names = ["timestamp"] + etl.REQUIRED_COLUMNS + ["turbine_id"]
+    conn.executemany(f"INSERT INTO sensor_readings ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})", rows)
+    conn.commit()
+    yield conn
+    conn.close()
+
+def test_sql_expressions_match_the_kernel_row_by_row(db):
+    metrics = list(derived.SQL_EXPRESSIONS)
+    rows = db.execute(f"SELECT {', '.join(derived.BASE_INPUTS)}, {', '.join(derived.SQL_EXPRESSIONS.values())} FROM sensor_readings").fetchall()
+    base = np.array([row[:len(derived.BASE_INPUTS)] for row in rows], dtype=np.float64)
+    pushed = np.array([row[len(derived.BASE_INPUTS):] for row in rows], dtype=np.float64)
+    kernel = derived.compute_derived({name: base[:, i] for i, name in enumerate(derived.BASE_INPUTS)})
+    for i, metric in enumerate(metrics):
+        np.testing.assert_allclose(pushed[:, i], kernel[metric], rtol=1e-12, equal_nan=True, err_msg=metric)
+
+@pytest.mark.parametrize("window", [
+    None,
+    (datetime(2025, 1, 1, 0, 0), datetime(2025, 1, 1, 1, 0)),
+    (datetime(2025, 1, 1, 0, 14, 30), datetime(2025, 1, 1, 2, 59, 59)),
+    (datetime(2025, 1, 1, 12, 0), datetime(2025, 1, 1, 13, 0)),
+])
+def test_pushdown_partials_match_numpy(db, monkeypatch, window):
+    start, end = window or (None, None)
+    pushed = sorted(buckets._raw_partials(db, [1, 2, 3], start, end))
+    monkeypatch.setattr(buckets, "RAW_PUSHDOWN", False)
+    reduced = sorted(buckets._raw_partials(db, [1, 2, 3], start, end))
+    assert [row[:4] for row in pushed] == [row[:4] for row in reduced]
+    assert len(pushed) == (3 if start is None or start.hour < 12 else 0)
+    for ours, theirs in zip(pushed, reduced):
+        assert ours[4:] == pytest.approx(theirs[4:], rel=1e-9, abs=1e-9)
+
+def test_compose_is_the_same_with_and_without_pushdown(db, monkeypatch):
+    buckets.rebuild(db, etl.REQUIRED_COLUMNS)
+    window = (datetime(2025, 1, 1, 0, 20), datetime(2025, 1, 1, 9, 40))
+    pushed = buckets.compose(db, [1, 2, 3], window)
+    monkeypatch.setattr(buckets, "RAW_PUSHDOWN", False)
+    assert pushed.keys() == buckets.compose(db, [1, 2, 3], window).keys()
+    for turbine_id, figures in buckets.compose(db, [1, 2, 3], window).items():
+        assert pushed[turbine_id] == pytest.approx(figures, rel=1e-9, abs=1e-9)
+
+def test_falls_back_to_numpy_without_math_functions(db, monkeypatch):
+    monkeypatch.setattr(buckets, "_math_functions", False)
+    [reduced] = buckets._raw_partials(db, [1], None, None)
+    monkeypatch.setattr(buckets, "_math_functions", None)
+    [pushed] = buckets._raw_partials(db, [1], None, None)
+    assert reduced[:4] == pushed[:4] == (1, 3, "not a time", "not a time")
+    assert reduced[4:] == pytest.approx(pushed[4:], rel=1e-9, abs=1e-9)
@@ -0,0 +1,77 @@
+from datetime import datetime
+from app import cache
+
+JAN_1, JAN_2, JAN_3 = datetime(2025, 1, 1), datetime(2025, 1, 2), datetime(2025, 1, 3)
+
+def _fill(response_cache, key, body, turbines, window=None, fleet=False):
+    lookup = response_cache.lookup(key, fleet)
+    assert lookup.body is None
+    response_cache.store(lookup, body, turbines, window)
+
+def _writes(turbine_id, span, new_turbine=False):
+    writes = cache.WriteSet()
+    writes.add(turbine_id, span, new_turbine)
+    return writes
+
+def test_invalidation_is_per_turbine_and_window():
+    response_cache = cache.ResponseCache()
+    _fill(response_cache, "day-1", b"a", [1], (JAN_1, JAN_2))
+    _fill(response_cache, "day-2", b"b", [1], (JAN_2, JAN_3))
+    _fill(response_cache, "all-time", b"c", [1])
+    _fill(response_cache, "other", b"d", [2])
+    _fill(response_cache, "fleet", b"e", [2], fleet=True)
+
+    assert response_cache.invalidate(_writes(1, (datetime(2025, 1, 2, 10), datetime(2025, 1, 2, 11)))) == 2
+    assert response_cache.lookup("day-1").body == b"a"
+    assert response_cache.lookup("day-2").body is None
+    assert response_cache.lookup("all-time").body is None
+    assert response_cache.lookup("other").body == b"d"
+    assert response_cache.lookup("fleet").body == b"e"
+
+    # Undated rows only affect all-time entries; a turbine's first readings reshape every fleet page.
+    _fill(response_cache, "all-time", b"c", [1])
+    assert response_cache.invalidate(_writes(1, None)) == 1
+    assert response_cache.invalidate(_writes(3, (JAN_1, JAN_2), new_turbine=True)) == 1
+    assert response_cache.lookup("fleet").body is None
+
+def test_size_bound_evicts_least_recently_used():
+    response_cache = cache.ResponseCache(max_entries=10, max_bytes=10)
+    _fill(response_cache, "a", b"1234", [1])
+    _fill(response_cache, "b", b"1234", [1])
+    assert response_cache.lookup("a").body == b"1234"
+    _fill(response_cache, "c", b"1234", [1])
+    assert response_cache.lookup("b").body is None
+    assert response_cache.lookup("a").body == b"1234"
+    stats = response_cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 8, 1)
+
+def test_expired_and_raced_entries_are_not_served():
+    response_cache = cache.ResponseCache(ttl_seconds=0)
+    _fill(response_cache, "a", b"x", [1])
+    assert response_cache.lookup("a").body is None
+    assert response_cache.stats()["expirations"] == 1
+
+    response_cache = cache.ResponseCache()
+    lookup = response_cache.lookup("a")
+    response_cache.invalidate(_writes(1, (JAN_1, JAN_2)))
+    response_cache.store(lookup, b"computed before the write committed", [1])
+    assert response_cache.lookup("a").body is None
+
+def test_writes_elsewhere_do_not_discard_a_computed_report():
+    response_cache = cache.ResponseCache()
+    lookup = response_cache.lookup("day-1")
+    response_cache.invalidate(_writes(2, (JAN_1, JAN_2)))
+    response_cache.invalidate(_writes(1, (JAN_2, JAN_3)))
+    response_cache.store(lookup, b"r", [1], (JAN_1, JAN_2))
+    assert response_cache.lookup("day-1").body == b"r"
+
+    # After more writes than are remembered, or a clear, the body is dropped.
+    lookup = response_cache.lookup("day-2")
+    for _ in range(cache.INVALIDATION_LOG + 1):
+        response_cache.invalidate(_writes(2, (JAN_1, JAN_2)))
+    response_cache.store(lookup, b"r", [1], (JAN_2, JAN_3))
+    assert response_cache.lookup("day-2").body is None
+    lookup = response_cache.lookup("day-2")
+    response_cache.clear()
+    response_cache.store(lookup, b"r", [1], (JAN_2, JAN_3))
+    assert response_cache.lookup("day-2").body is None
@@ -0,0 +1,43 @@
+import json
+import sqlite3
+import numpy as np
+import pytest
+from pydantic import TypeAdapter
+from typing import Dict
+from main import app
+from app import models, serialization
+from app.pagination import build_page
+
+def _rows(n: int) -> list:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    names = ["id", "timestamp"] + serialization.fields(models.TurbineReading)
+    conn.execute(f"CREATE TABLE readings ({', '.join(names)})")
+    rng = np.random.default_rng(4)
+    values = [(i, f"2025-01-01 00:00:{i:02d}", *rng.uniform(-1e6, 1e6, len(names) - 3).tolist(), 7) for i in range(n)]
+    conn.executemany(f"INSERT INTO readings VALUES ({', '.join('?' for _ in names)})", values)
+    return conn.execute("SELECT * FROM readings ORDER BY id").fetchall()
+
+@pytest.fixture(params=["orjson", "pydantic-core"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+
+def test_fast_path_matches_validated_output(encoder):
+    page = build_page(_rows(21), 20, "id", 21, 1, serialization.fields(models.TurbineReading))
+    adapter = TypeAdapter(models.PaginatedTurbineReadings)
+    assert json.loads(serialization.dumps(page)) == json.loads(adapter.dump_json(adapter.validate_python(page)))
+
+    report = {"min": np.float64(1.5), "avg": float("nan"), "max": 3}
+    adapter = TypeAdapter(Dict[int, models.Stats])
+    assert json.loads(serialization.dumps({4: report})) == json.loads(adapter.dump_json(adapter.validate_python({4: report}))) == {"4": {"min": 1.5, "avg": None, "max": 3}}
+
+    scalars = {"count": np.int64(7), "mean": np.float32(0.5), "gap": np.float32("nan"), "open": np.bool_(True)}
+    assert json.loads(serialization.dumps(scalars)) == {"count": 7, "mean": 0.5, "gap": None, "open": True}
+
+def test_fast_routes_keep_their_openapi_schema():
+    responses = app.openapi()["paths"]
+    for path, model in [("/data/sensor-metrics/{turbine_id}", "PaginatedTurbineReadings"), ("/data/alerts", "PaginatedAlerts"), ("/data/health-summary", "PaginatedHealthSummary")]:
+        assert responses[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"] == {"$ref": f"#/components/schemas/{model}"}
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from app.sketch import KLLSketch
+
+def _rank_error(values: np.ndarray, estimate: float, q: float) -> float:
+    return abs(np.searchsorted(np.sort(values), estimate) / len(values) - q)
+
+def test_small_inputs_are_exact_like_pandas():
+    values = np.random.default_rng(0).normal(size=150)
+    sketch = KLLSketch(k=200).update(values)
+    assert sketch.is_exact
+    assert sketch.quantile(0.25) == pd.Series(values).quantile(0.25)
+
+def test_chunked_updates_stay_within_error_bound():
+    values = np.random.default_rng(1).lognormal(size=200_000)
+    sketch = KLLSketch.for_error(0.01, seed=3)
+    for chunk in np.array_split(values, 37):
+        sketch.update(chunk)
+
+    assert sketch.count == len(values)
+    assert sum(len(level) for level in sketch.levels) < 1_500
+    for q in (0.25, 0.5, 0.75):
+        assert _rank_error(values, sketch.quantile(q), q) < 0.01
+
+def test_merge_and_roundtrip_preserve_quantiles():
+    rng = np.random.default_rng(2)
+    history, upload = rng.uniform(0, 100, 50_000), rng.uniform(50, 150, 50_000)
+    merged = KLLSketch(seed=4).update(history).merge(KLLSketch(seed=5).update(upload))
+    restored = KLLSketch.from_bytes(merged.to_bytes())
+
+    assert restored.count == 100_000
+    assert restored.quantile(0.5) == merged.quantile(0.5)
+    assert _rank_error(np.concatenate([history, upload]), restored.quantile(0.75), 0.75) < 0.02
+
+def test_nan_values_are_ignored():
+    sketch = KLLSketch().update([1.0, np.nan, 3.0])
+    assert sketch.count == 2 and sketch.quantile(0.5) == 2.0
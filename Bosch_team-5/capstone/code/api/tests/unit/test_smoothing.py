@@ -0,0 +1,51 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from app import smoothing
+from app.migrations import run_migrations
+
+def _values(n=200, columns=3, seed=7):
+    values = np.random.default_rng(seed).normal(100, 15, size=(n, columns))
+    values[[4, 5, 6, 90], 1] = np.nan
+    return values
+
+def _in_pieces(smoother, values, cuts=(1, 2, 7, 50, 51)):
+    return np.concatenate([smoother.apply(piece) for piece in np.split(values, cuts)])
+
+def test_sma_matches_pandas_rolling_whatever_the_split():
+    values = _values()
+    expected = pd.DataFrame(values).rolling(window=5, min_periods=1).mean().to_numpy()
+    np.testing.assert_allclose(smoothing.Smoother(3, "sma", 5).apply(values), expected, rtol=1e-12)
+    np.testing.assert_allclose(_in_pieces(smoothing.Smoother(3, "sma", 5), values), expected, rtol=1e-12)
+
+def test_ema_matches_pandas_ewm_whatever_the_split():
+    values = _values()
+    expected = pd.DataFrame(values).ewm(span=3, adjust=False, ignore_na=True).mean().to_numpy()
+    smoother = smoothing.Smoother(3, "ema", 3)
+    np.testing.assert_allclose(_in_pieces(smoother, values), expected, rtol=1e-12)
+    np.testing.assert_allclose(smoother.latest, expected[-1], rtol=1e-12)
+
+def test_unknown_kinds_and_windows_are_rejected():
+    with pytest.raises(ValueError, match="Unknown smoothing kind"):
+        smoothing.Smoother(1, "median")
+    with pytest.raises(ValueError):
+        smoothing.Smoother(1, "sma", 0)
+
+@pytest.mark.parametrize("kind", smoothing.KINDS)
+def test_persisted_state_resumes_the_window(kind):
+    conn = sqlite3.connect(":memory:")
+    run_migrations(conn)
+    columns, values = ["a", "b", "c"], _values()
+    expected = smoothing.Smoother(3, kind, 4).apply(values)
+
+    first = smoothing.load_smoother(conn, 1, columns, kind, 4)
+    head = first.apply(values[:120])
+    smoothing.save_smoother(conn, 1, columns, first)
+    resumed = smoothing.load_smoother(conn, 1, columns, kind, 4)
+    assert resumed.count == 120
+    np.testing.assert_allclose(np.concatenate([head, resumed.apply(values[120:])]), expected, rtol=1e-12)
+
+    # State saved with another window, or for another turbine, does not apply.
+    assert smoothing.load_smoother(conn, 1, columns, kind, 5).count == 0
+    assert smoothing.load_smoother(conn, 2, columns, kind, 4).count == 0
@@ -0,0 +1,40 @@
+import json
+import numpy as np
+import pytest
+from app import telemetry
+
+def _records(n, start=1_735_689_600.0):
+    records = np.zeros(n, dtype=telemetry.RECORD)
+    records["timestamp"] = start + np.arange(n)
+    for i, name in enumerate(telemetry.FIELDS):
+        records[name] = np.arange(n) + i / 100
+    return records
+
+def test_binary_frames_decode_to_rows_and_utc_timestamps():
+    matrix, timestamps = telemetry.decode_binary(_records(3).tobytes())
+    assert matrix.shape == (3, len(telemetry.FIELDS)) and matrix.flags.writeable
+    assert matrix[2, 1] == 2.01
+    assert timestamps.tolist() == ["2025-01-01T00:00:00.000000", "2025-01-01T00:00:01.000000", "2025-01-01T00:00:02.000000"]
+    with pytest.raises(telemetry.FrameError):
+        telemetry.decode_binary(_records(2).tobytes()[:-8])
+
+def test_ndjson_frames_accept_iso_epoch_and_missing_timestamps():
+    reading = {name: 1.5 for name in telemetry.FIELDS}
+    frame = "\n".join(json.dumps({**reading, **stamp}) for stamp in ({"timestamp": "2025-01-01T00:00:00+01:00"}, {"timestamp": 1735689600}, {})) + "\n"
+    matrix, timestamps = telemetry.decode_ndjson(frame)
+    assert matrix.shape == (3, len(telemetry.FIELDS)) and (matrix == 1.5).all()
+    assert timestamps[:2].tolist() == ["2025-01-01T00:00:00+01:00", "2025-01-01T00:00:00.000000"]
+    assert timestamps[2] > "2025"
+    with pytest.raises(telemetry.FrameError, match="missing 'mf'"):
+        telemetry.decode_ndjson(json.dumps({name: 1.0 for name in telemetry.FIELDS if name != "mf"}))
+    with pytest.raises(telemetry.FrameError):
+        telemetry.decode_ndjson("{not json")
+
+def test_turbine_state_keeps_the_last_window_and_running_figures():
+    state = telemetry.TurbineState(window=3)
+    matrix, timestamps = telemetry.decode_binary(_records(5).tobytes())
+    state.update(matrix[:2], timestamps[:2])
+    state.update(matrix[2:], timestamps[2:])
+    snapshot = state.snapshot()
+    assert snapshot["count"] == 5 and snapshot["last_timestamp"] == timestamps[-1]
+    assert (snapshot["last"]["lp"], snapshot["smoothed"]["lp"], snapshot["mean"]["lp"], snapshot["min"]["lp"], snapshot["max"]["lp"]) == (4.0, 3.0, 2.0, 0.0, 4.0)
@@ -0,0 +1,46 @@
+import sqlite3
+from app import turbines
+
+def _db() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE turbine_metadata (turbine_id INTEGER PRIMARY KEY, location TEXT)")
+    conn.executemany("INSERT INTO turbine_metadata (turbine_id) VALUES (?)", [(1,), (2,)])
+    return conn
+
+def test_unknown_ids_are_cached_negatively_until_they_expire():
+    db, registry = _db(), turbines.TurbineRegistry(negative_ttl=60)
+    assert registry.missing(db, [2, 1, 7, 7]) == [7]
+    assert registry.missing(db, [7]) == [7]
+    assert (registry.hits, registry.negative_hits, registry.lookups) == (2, 1, 1)
+
+    db.execute("INSERT INTO turbine_metadata (turbine_id) VALUES (7)")
+    assert not registry.exists(db, 7)  # still negatively cached
+    registry.negative_ttl = 0
+    registry._unknown.clear()
+    assert registry.exists(db, 7)
+    assert registry.stats()["turbines"] == 3
+
+def test_a_reset_during_the_lookup_is_not_overwritten():
+    db, registry = _db(), turbines.TurbineRegistry(negative_ttl=60)
+
+    class Resetting:
+        def execute(self, sql, params=()):
+            if "IN (" in sql:
+                registry.invalidate()
+            return db.execute(sql, params)
+
+    assert registry.missing(Resetting(), [1, 3]) == [3]
+    assert registry.stats()["loaded"] is False
+    assert registry.missing(db, [1, 2]) == []
+
+def test_additions_clear_negative_entries():
+    db, registry = _db(), turbines.TurbineRegistry(negative_ttl=60)
+    assert registry.missing(db, [3]) == [3]
+
+    db.execute("INSERT INTO turbine_metadata (turbine_id) VALUES (3)")
+    registry.add(3)
+    assert registry.exists(db, 3)
+    assert registry.lookups == 1
+
+    registry.invalidate()
+    assert registry.stats()["loaded"] is False
@@ -1,6 +1,22 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
+
+# Share the API's streaming quantile sketch so offline and upload pipelines clip alike.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+from app.derived import compute_derived
+from app.sketch import KLLSketch, build_sketches
+from app.smoothing import Smoother
+
+def sketch_iqr_bounds(file_path, column_names, columns, chunk_size=10_000, rank_error=0.005):
+    """
+    Computes IQR clip bounds in a single chunked pass over the raw file, holding only
+    one chunk plus an O(1/rank_error) sketch per column in memory.
+    """
+    chunks = pd.read_csv(file_path, sep=r"\s+", names=column_names, chunksize=chunk_size)
+    sketches = build_sketches(chunks, columns, k=KLLSketch.for_error(rank_error).k)
+    return {col: sketch.iqr_bounds() for col, sketch in sketches.items()}
 
 def process_sensor_data(file_path):
     """
@@ -31,12 +47,11 @@ def process_sensor_data(file_path):
     print(f"\nRemoved {initial_rows - rows_after_dedup} duplicate rows.")
 
     # --- Handle Outliers ---
+    outlier_columns = ['GTT', 'GTn', 'T48', 'P48', 'mf']
+    bounds = sketch_iqr_bounds(file_path, column_names, outlier_columns)
+
     def handle_outliers_iqr(df_in, col_name):
-        Q1 = df_in[col_name].quantile(0.25)
-        Q3 = df_in[col_name].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
+        lower_bound, upper_bound = bounds[col_name]
         
         outliers_count = ((df_in[col_name] < lower_bound) | (df_in[col_name] > upper_bound)).sum()
         if outliers_count > 0:
@@ -48,7 +63,7 @@ def process_sensor_data(file_path):
         return df_out
 
     # Apply outlier handling to critical columns
-    for col in ['GTT', 'GTn', 'T48', 'P48', 'mf']:
+    for col in outlier_columns:
         df = handle_outliers_iqr(df, col)
 
     # --- Comprehensive Data Smoothing (In-Place) ---
@@ -59,31 +74,29 @@ def process_sensor_data(file_path):
         'P48', 'P1', 'P2', 'Pexh', 'TIC', 'mf'
     ]
     
-    for col in columns_to_smooth:
-        df[col] = df[col].rolling(window=window_size, min_periods=1).mean()
+    # The API's smoothing engine, so offline output matches what uploads store for the same window.
+    df[columns_to_smooth] = Smoother(len(columns_to_smooth), "sma", window_size).apply(df[columns_to_smooth].to_numpy())
     
     print(f"In-place smoothing applied with a window size of {window_size}.")
 
 
     print("\n--- 3. Derived Feature Computation ---")
 
-    # Calculations now use the smoothed data from the original columns
-    df['T1_P1_ratio'] = df['T1'] / df['P1']
-    df['T2_P2_ratio'] = df['T2'] / df['P2']
-    df['T48_P48_ratio'] = df['T48'] / df['P48']
-    df['Propeller_Torque_Diff'] = df['Ts'] - df['Tp']
+    # Calculations now use the smoothed data from the original columns, through the same
+    # kernel the API uses (ratios, torque differential, power proxy, decay score).
+    derived = compute_derived({col.lower(): df[col].to_numpy() for col in column_names}, finite=False)
+    df['T1_P1_ratio'] = derived['temp_ratio_t1_p1']
+    df['T2_P2_ratio'] = derived['temp_ratio_t2_p2']
+    df['T48_P48_ratio'] = derived['temp_ratio_t48_p48']
+    df['Propeller_Torque_Diff'] = derived['torque_diff']
     print("Derived Temperature-Pressure Ratios and Torque Differentials created.")
 
-    # --- Calculate Power Output Proxy ---
-    # Power (kW) = Torque (kN.m) * Angular Velocity (rad/s)
-    # Convert GTn from RPM to rad/s: (RPM * 2 * pi) / 60
-    angular_velocity_rad_s = df['GTn'] * (2 * np.pi / 60)
-    df['Power_Proxy_kW'] = df['GTT'] * angular_velocity_rad_s
+    # Power (kW) = Torque (kN.m) * Angular Velocity (rad/s), with GTn converted from RPM.
+    df['Power_Proxy_kW'] = derived['power_proxy_kw']
     print("Derived Power Output Proxy (kW) created.")
-    
-    # --- Calculate Total Decay Score ---
+
     # A healthy component has a decay coeff of 1. The score represents the sum of deviations from healthy.
-    df['total_decay_score'] = (1 - df['decay_coeff_comp']) + (1 - df['decay_coeff_turbine'])
+    df['total_decay_score'] = derived['total_decay_score']
     print("Derived Total Decay Score created.")
 
     print("\n--- 4. Finalizing DataFrame ---")
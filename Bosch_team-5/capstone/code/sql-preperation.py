@@ -4,24 +4,24 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 import os
+import sys
+import tempfile
+
+# Use the API's schema and alert rule registry so offline analysis flags the same anomalies.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+from app import alerts, buckets, colstore, etl, rollups
+from app.migrations import run_migrations
 
 def setup_database(conn: sqlite3.Connection, df: pd.DataFrame):
     """
     Creates SQL tables and populates them with sensor and metadata.
     """
     print("--- 1. Setting up the SQLite Database ---")
+    run_migrations(conn)
     cursor = conn.cursor()
 
-    # a. Create turbine_metadata table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS turbine_metadata (
-            turbine_id INTEGER PRIMARY KEY,
-            model_name TEXT NOT NULL,
-            install_date DATE
-        )
-    ''')
-    # Insert some sample metadata
-    cursor.execute("INSERT OR IGNORE INTO turbine_metadata VALUES (101, 'Frigate-GT-7B', '2020-01-15')")
+    # a. Populate turbine_metadata (schema owned by the API migrations)
+    cursor.execute("INSERT OR IGNORE INTO turbine_metadata (turbine_id, model) VALUES (101, 'Frigate-GT-7B')")
     print("  - 'turbine_metadata' table created and populated.")
 
     # b. Load the DataFrame into the sensor_readings table
@@ -34,41 +34,15 @@ def setup_database(conn: sqlite3.Connection, df: pd.DataFrame):
     
     df.to_sql('sensor_readings', conn, if_exists='replace', index=False)
     print("  - 'sensor_readings' table created and populated from CSV.")
-
-    # c. Create and populate the alerts table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS alerts (
-            alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            reading_timestamp DATETIME,
-            alert_type TEXT NOT NULL,
-            description TEXT,
-            severity TEXT
-        )
-    ''')
-    
-    # Populate alerts based on rules (e.g., high exit temp or severe decay)
-    cursor.execute('''
-        INSERT INTO alerts (reading_timestamp, alert_type, description, severity)
-        SELECT 
-            timestamp,
-            'High Exit Temperature',
-            'HP Turbine exit temperature (T48) is above 800 C',
-            'Warning'
-        FROM sensor_readings
-        WHERE t48 > 800
-    ''')
-    
-    cursor.execute('''
-        INSERT INTO alerts (reading_timestamp, alert_type, description, severity)
-        SELECT 
-            timestamp,
-            'Severe Decay Detected',
-            'Total decay score is critically high (> 0.06)',
-            'Critical'
-        FROM sensor_readings
-        WHERE total_decay_score > 0.06
-    ''')
-    print("  - 'alerts' table created and populated based on operational rules.")
+    rollups.rebuild(conn, etl.REQUIRED_COLUMNS)
+    buckets.rebuild(conn, etl.REQUIRED_COLUMNS)
+    print("  - 'turbine_rollups' and 'reading_buckets' rebuilt from the loaded readings.")
+
+    # c. Populate the alerts table from the shared rule registry
+    metric_columns = {col: df[col].to_numpy(dtype=float) for col in df.columns if col not in ('turbine_id', 'timestamp')}
+    ruleset = alerts.registry.rules(conn)
+    logged = alerts.insert_alerts(conn, ruleset.evaluate(metric_columns, df['timestamp'].astype(str).to_numpy(), 101))
+    print(f"  - 'alerts' table populated with {logged} alerts from {len(ruleset.rules)} registry rules.")
     conn.commit()
 
 def analyze_fuel_patterns(conn: sqlite3.Connection) -> pd.DataFrame:
@@ -174,12 +148,19 @@ def visualize_results(df_fuel: pd.DataFrame, df_efficiency: pd.DataFrame, output
     print(f"  - Saved 'efficiency_vs_decay.png' to {output_folder}")
     plt.close()
 
-def visualize_additional_analysis(conn: sqlite3.Connection, output_folder: str):
+def build_column_store(conn: sqlite3.Connection, root: str) -> colstore.ColumnStore:
+    """Copies every numeric sensor column into a memory-mapped column store for full-fleet scans."""
+    metrics = [row[1] for row in conn.execute("PRAGMA table_info(sensor_readings)") if row[1] not in ('turbine_id', 'timestamp') and row[2] in ('REAL', 'INTEGER')]
+    store = colstore.ColumnStore(root)
+    store.backfill(conn, metrics)
+    return store
+
+def visualize_additional_analysis(store: colstore.ColumnStore, output_folder: str):
     """Generates and saves additional exploratory visualizations."""
     print("\n--- 5. Visualizing Additional Analysis ---")
     sns.set_theme(style="whitegrid")
 
-    df_all = pd.read_sql_query("SELECT * FROM sensor_readings", conn)
+    df_all = store.frame()
     # Drop non-numeric/identifier columns for correlation
     df_numeric = df_all.drop(columns=['turbine_id', 'timestamp'])
     
@@ -218,7 +199,7 @@ def visualize_additional_analysis(conn: sqlite3.Connection, output_folder: str):
     plt.close()
     
     # f. Propeller Load Balance Over Time (Sample)
-    df_sample = pd.read_sql_query("SELECT timestamp, ts, tp FROM sensor_readings LIMIT 500", conn)
+    df_sample = df_all[['timestamp', 'ts', 'tp']].head(500)
     plt.figure(figsize=(14, 7))
     sns.lineplot(data=df_sample, x='timestamp', y='ts', label='Starboard Torque (Ts)')
     sns.lineplot(data=df_sample, x='timestamp', y='tp', label='Port Torque (Tp)', linestyle='--')
@@ -255,7 +236,8 @@ if __name__ == '__main__':
     df_fuel_analysis = analyze_fuel_patterns(conn)
     df_efficiency_analysis = analyze_efficiency(conn)
     visualize_results(df_fuel_analysis, df_efficiency_analysis, output_viz_folder)
-    visualize_additional_analysis(conn, output_viz_folder)
+    with tempfile.TemporaryDirectory() as colstore_root:
+        visualize_additional_analysis(build_column_store(conn, colstore_root), output_viz_folder)
 
     print("\n--- 6. Sample of Generated Alerts ---")
     alerts_df = pd.read_sql_query("SELECT * FROM alerts LIMIT 5", conn)